@@ -1,18 +1,30 @@
 from __future__ import annotations
 
+import json
 import sys
 
 from .cli import parse_args
 from .config import config_from_env_and_args
 from .errors import BootstrapError
-from .service import run
 
 
 def main() -> int:
     args = parse_args()
 
     try:
-        config = config_from_env_and_args(args)
+        status_only = bool(getattr(args, "status", False))
+        config = config_from_env_and_args(args, require_credentials=not status_only)
+        if status_only:
+            # Deliberately avoids importing the service/installer stack.
+            from .status import check
+
+            records = check(config)
+            for record in records:
+                print(json.dumps(record, sort_keys=True))
+            return 0 if all(record["installed"] for record in records) else 1
+
+        from .service import run
+
         token = run(config)
         print(token)
         return 0
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+import urllib.parse
+from collections import deque
+
+from .errors import CircuitOpenError
+
+
+def endpoint_class(method: str, url: str, body: bytes | None = None) -> str:
+    """
+    Group requests whose latency should be comparable: HTTP method, path and
+    the Matomo `module` + API `method` / controller `action` (taken from the
+    query string or an urlencoded body), e.g. "POST /index.php API.UsersManager.getUser".
+    """
+    parts = urllib.parse.urlsplit(url)
+    params = urllib.parse.parse_qs(parts.query)
+    if body:
+        try:
+            params.update(urllib.parse.parse_qs(body.decode("ascii")))
+        except UnicodeDecodeError:
+            pass
+    module = params.get("module", [""])[0]
+    detail = (params.get("method") or params.get("action") or [""])[0]
+    name = ".".join(p for p in (module, detail) if p)
+    return f"{method} {parts.path or '/'} {name}".rstrip()
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(q * len(ordered)))
+    return ordered[rank - 1]
+
+
+class AdaptiveTimeouts:
+    """
+    Per-endpoint-class timeouts derived from recently observed latencies:
+    `multiplier * p<percentile>` of the last `window` successful requests,
+    clamped to [floor_s, ceiling_s]. Classes with fewer than `min_samples`
+    observations use the ceiling.
+
+    `connect_timeout_s` bounds TCP connection setup separately, so a host that
+    silently drops packets is detected quickly even before any samples exist.
+    """
+
+    def __init__(
+        self,
+        *,
+        floor_s: float = 2.0,
+        ceiling_s: float = 20.0,
+        percentile: float = 0.95,
+        multiplier: float = 4.0,
+        window: int = 50,
+        min_samples: int = 5,
+        connect_timeout_s: float = 5.0,
+    ):
+        if floor_s <= 0 or ceiling_s < floor_s:
+            raise ValueError("need 0 < floor_s <= ceiling_s")
+        self.floor_s = floor_s
+        self.ceiling_s = ceiling_s
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.window = window
+        self.min_samples = min_samples
+        self.connect_timeout_s = min(max(connect_timeout_s, floor_s), ceiling_s)
+        self._samples: dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, cls: str, elapsed_s: float) -> None:
+        with self._lock:
+            samples = self._samples.get(cls)
+            if samples is None:
+                samples = self._samples[cls] = deque(maxlen=self.window)
+            samples.append(elapsed_s)
+
+    def timeout_for(self, cls: str) -> float:
+        with self._lock:
+            samples = list(self._samples.get(cls, ()))
+        if len(samples) < self.min_samples:
+            return self.ceiling_s
+        derived = self.multiplier * _percentile(samples, self.percentile)
+        return min(self.ceiling_s, max(self.floor_s, derived))
+
+
+class CircuitBreaker:
+    """
+    Fails fast once an instance is clearly down.
+
+    After `failure_threshold` consecutive failures (connection errors,
+    timeouts, gateway errors) the circuit opens and requests raise
+    `CircuitOpenError` without touching the network. After `reset_timeout_s`
+    one trial request is let through (half-open): success closes the circuit,
+    failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    # A reverse proxy answering these usually means "backend unreachable".
+    FAILURE_STATUSES = frozenset({502, 504})
+
+    def __init__(self, *, failure_threshold: int = 5, reset_timeout_s: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_request(self, target: str) -> None:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            waited = time.monotonic() - self._opened_at
+            if self.state == self.OPEN and waited >= self.reset_timeout_s:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            retry_in = max(0.0, self.reset_timeout_s - waited)
+        raise CircuitOpenError(
+            f"{target} looks down after {self.failures} consecutive failures; "
+            f"not sending requests for another {retry_in:.0f}s"
+        )
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def record(self, status: int | None) -> None:
+        """Record an attempt outcome; `status` None means no HTTP response."""
+        if status is None or status in self.FAILURE_STATUSES:
+            self.record_failure()
+        else:
+            self.record_success()
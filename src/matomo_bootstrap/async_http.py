@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import asyncio
+import http.client
+import http.cookiejar
+import io
+import ssl
+import sys
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Dict, Tuple
+
+from .pool import PoolStats
+from .retry import IDEMPOTENT_METHODS
+from .uds import is_unix_base_url, split_unix_base_url
+
+_MAX_REDIRECTS = 10
+_REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+_USER_AGENT = f"Python-urllib/{sys.version_info.major}.{sys.version_info.minor}"
+
+
+class _CookieResponse:
+    """Just enough of a urllib response for `CookieJar.extract_cookies`."""
+
+    def __init__(self, headers: http.client.HTTPMessage):
+        self._headers = headers
+
+    def info(self) -> http.client.HTTPMessage:
+        return self._headers
+
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.request_sent = False
+
+    def is_stale(self) -> bool:
+        return self.writer.is_closing() or self.reader.at_eof()
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class AsyncHttpClient:
+    """
+    asyncio counterpart of `HttpClient`: same `get`/`post` contract
+    (returns `(status, body)` for every HTTP status, follows redirects like
+    urllib), but every call is a coroutine and runs on the caller's event loop.
+
+    - `cookies` may be shared with other clients (sync or async) so one login
+      session serves all of them.
+    - `limiter` bounds the number of in-flight requests; pass the same
+      semaphore to several clients to bound them together.
+    - Idle HTTP/1.1 connections are kept per host and reused.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: int = 20,
+        debug: bool = False,
+        *,
+        cookies: http.cookiejar.CookieJar | None = None,
+        max_concurrency: int = 10,
+        limiter: asyncio.Semaphore | None = None,
+        max_idle_connections: int = 4,
+        ssl_context: ssl.SSLContext | None = None,
+    ):
+        self.unix_socket: str | None = None
+        if is_unix_base_url(base_url):
+            self.unix_socket, base_url = split_unix_base_url(base_url)
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.debug = debug
+
+        self.cookies = cookies if cookies is not None else http.cookiejar.CookieJar()
+        self.limiter = limiter or asyncio.Semaphore(max_concurrency)
+        self.max_idle_connections = max_idle_connections
+        self.stats = PoolStats()
+
+        self._ssl_context = ssl_context
+        self._idle: dict[tuple[str, str, int], list[_Connection]] = {}
+
+    def _dbg(self, msg: str) -> None:
+        if self.debug:
+            print(msg, file=sys.stderr)
+
+    async def close(self) -> None:
+        idle_lists = list(self._idle.values())
+        self._idle.clear()
+        for idle in idle_lists:
+            for conn in idle:
+                conn.close()
+
+    async def __aenter__(self) -> AsyncHttpClient:
+        return self
+
+    async def __aexit__(self, *_exc) -> None:
+        await self.close()
+
+    async def get(self, path: str, params: Dict[str, str]) -> Tuple[int, str]:
+        qs = urllib.parse.urlencode(params)
+        if path == "/":
+            url = f"{self.base_url}/"
+        else:
+            url = f"{self.base_url}{path}"
+        if qs:
+            url = f"{url}?{qs}"
+
+        self._dbg(f"[HTTP] GET {url}")
+
+        return await self._request("GET", url, None)
+
+    async def post(self, path: str, data: Dict[str, str]) -> Tuple[int, str]:
+        url = self.base_url + path
+        encoded = urllib.parse.urlencode(data).encode()
+
+        self._dbg(f"[HTTP] POST {url} keys={list(data.keys())}")
+
+        return await self._request("POST", url, encoded)
+
+    async def _request(
+        self, method: str, url: str, body: bytes | None
+    ) -> Tuple[int, str]:
+        async with self.limiter:
+            for _ in range(_MAX_REDIRECTS + 1):
+                req = urllib.request.Request(url, data=body, method=method)
+                self.cookies.add_cookie_header(req)
+                try:
+                    status, headers, payload = await asyncio.wait_for(
+                        self._roundtrip(req), timeout=self.timeout
+                    )
+                except asyncio.TimeoutError as exc:
+                    raise urllib.error.URLError(TimeoutError("timed out")) from exc
+                except urllib.error.URLError:
+                    raise
+                except (OSError, asyncio.IncompleteReadError) as exc:
+                    raise urllib.error.URLError(exc) from exc
+                self.cookies.extract_cookies(_CookieResponse(headers), req)
+
+                location = headers.get("Location")
+                if status not in _REDIRECT_STATUSES or not location:
+                    return status, payload.decode("utf-8", errors="replace")
+                if method not in ("GET", "HEAD") and status in (307, 308):
+                    # urllib refuses to replay a body on 307/308; so do we.
+                    return status, payload.decode("utf-8", errors="replace")
+
+                url = urllib.parse.urljoin(url, location)
+                if method not in ("GET", "HEAD"):
+                    method, body = "GET", None
+                self._dbg(f"[HTTP] redirect {status} -> {url}")
+
+        raise urllib.error.URLError(f"too many redirects: {url}")
+
+    async def _roundtrip(
+        self, req: urllib.request.Request
+    ) -> tuple[int, http.client.HTTPMessage, bytes]:
+        parsed = urllib.parse.urlsplit(req.full_url)
+        scheme = parsed.scheme
+        host = parsed.hostname or ""
+        port = parsed.port or (443 if scheme == "https" else 80)
+        key = (scheme, host, port)
+
+        head = self._encode_head(req, parsed)
+
+        conn = self._acquire(key)
+        if conn is not None:
+            try:
+                return await self._exchange(key, conn, req, head)
+            except (ConnectionError, asyncio.IncompleteReadError) as exc:
+                if isinstance(exc, asyncio.IncompleteReadError) and exc.partial:
+                    raise
+                self.stats.connections_discarded += 1
+                # Replay only what is safe to send twice (idempotent, or never
+                # written): a written non-idempotent request may have been processed.
+                if req.get_method() not in IDEMPOTENT_METHODS and conn.request_sent:
+                    raise urllib.error.URLError(exc) from exc
+
+        conn = await self._connect(scheme, host, port)
+        return await self._exchange(key, conn, req, head)
+
+    def _acquire(self, key: tuple[str, str, int]) -> _Connection | None:
+        idle = self._idle.get(key)
+        while idle:
+            conn = idle.pop()
+            if conn.is_stale():
+                conn.close()
+                self.stats.connections_discarded += 1
+                continue
+            self.stats.connections_reused += 1
+            return conn
+        return None
+
+    def _release(self, key: tuple[str, str, int], conn: _Connection) -> None:
+        idle = self._idle.setdefault(key, [])
+        if len(idle) < self.max_idle_connections:
+            idle.append(conn)
+        else:
+            conn.close()
+            self.stats.connections_discarded += 1
+
+    async def _connect(self, scheme: str, host: str, port: int) -> _Connection:
+        ssl_ctx = None
+        if scheme == "https":
+            ssl_ctx = self._ssl_context or ssl.create_default_context()
+        elif scheme != "http":
+            raise urllib.error.URLError(f"unknown url type: {scheme}")
+        if self.unix_socket and ssl_ctx is None:
+            reader, writer = await asyncio.open_unix_connection(self.unix_socket)
+        else:
+            reader, writer = await asyncio.open_connection(
+                host, port, ssl=ssl_ctx, server_hostname=host if ssl_ctx else None
+            )
+        self.stats.connections_opened += 1
+        return _Connection(reader, writer)
+
+    @staticmethod
+    def _encode_head(req: urllib.request.Request, parsed) -> bytes:
+        selector = parsed.path or "/"
+        if parsed.query:
+            selector = f"{selector}?{parsed.query}"
+        headers = {
+            "Host": parsed.netloc,
+            "User-Agent": _USER_AGENT,
+            "Accept-Encoding": "identity",
+            "Connection": "keep-alive",
+        }
+        if req.data is not None:
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+            headers["Content-Length"] = str(len(req.data))
+        for name, value in req.header_items():
+            headers[name.title()] = value
+
+        lines = [f"{req.get_method()} {selector} HTTP/1.1"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _exchange(
+        self,
+        key: tuple[str, str, int],
+        conn: _Connection,
+        req: urllib.request.Request,
+        head: bytes,
+    ) -> tuple[int, http.client.HTTPMessage, bytes]:
+        try:
+            conn.request_sent = False
+            conn.writer.write(head)
+            if req.data is not None:
+                conn.writer.write(req.data)
+            await conn.writer.drain()
+            conn.request_sent = True
+
+            status_and_headers = await conn.reader.readuntil(b"\r\n\r\n")
+            status_line, _, header_block = status_and_headers.partition(b"\r\n")
+            version, status, _reason = _parse_status_line(status_line)
+            headers = http.client.parse_headers(io.BytesIO(header_block))
+
+            payload, reusable = await _read_body(
+                conn.reader, req.get_method(), status, headers
+            )
+        except BaseException:
+            conn.close()
+            raise
+
+        connection_header = (headers.get("Connection") or "").lower()
+        if version == "HTTP/1.0" or "close" in connection_header:
+            reusable = False
+        if reusable:
+            self._release(key, conn)
+        else:
+            conn.close()
+        return status, headers, payload
+
+
+def _parse_status_line(line: bytes) -> tuple[str, int, str]:
+    try:
+        version, status, *reason = line.decode("latin-1").split(" ", 2)
+        return version, int(status), (reason[0] if reason else "").strip()
+    except ValueError as exc:
+        raise http.client.BadStatusLine(line.decode("latin-1", "replace")) from exc
+
+
+async def _read_body(
+    reader: asyncio.StreamReader,
+    method: str,
+    status: int,
+    headers: http.client.HTTPMessage,
+) -> tuple[bytes, bool]:
+    """
+    Read a response body; returns `(body, connection_reusable)`.
+    """
+    if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+        return b"", True
+
+    if "chunked" in (headers.get("Transfer-Encoding") or "").lower():
+        chunks: list[bytes] = []
+        while True:
+            size_line = await reader.readuntil(b"\r\n")
+            size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                # Skip optional trailers up to the terminating empty line.
+                while (await reader.readuntil(b"\r\n")) != b"\r\n":
+                    pass
+                return b"".join(chunks), True
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+    length = headers.get("Content-Length")
+    if length is not None:
+        return await reader.readexactly(int(length)), True
+
+    return await reader.read(), False
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from .paths import cache_dir, url_key
+from .probe import ProbeResult
+
+INSTALLED = "installed"
+TOKEN_ISSUED = "token-issued"
+
+
+def fingerprint(state: ProbeResult) -> dict[str, object]:
+    """What a later run compares to decide the checkpoint still applies."""
+    return {"installed": state.installed, "version": state.version}
+
+
+class Checkpoint:
+    """
+    Completed bootstrap phases of one instance (base URL), loaded from disk.
+
+    `phases` maps a phase (INSTALLED, TOKEN_ISSUED) to the time it
+    completed. The issued token is kept with the phase so a re-run can return
+    it after a single validation probe; the file is therefore written 0600.
+    Every change is written through atomically.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.phases: dict[str, float] = {}
+        self.fingerprint: dict[str, object] = {}
+        self.token: dict[str, str] = {}
+        self._lock = threading.Lock()
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict):
+            self.phases = dict(data.get("phases") or {})
+            self.fingerprint = dict(data.get("fingerprint") or {})
+            self.token = dict(data.get("token") or {})
+
+    def done(self, phase: str) -> bool:
+        return phase in self.phases
+
+    def matches(self, state: ProbeResult) -> bool:
+        """
+        Does a fresh probe agree with the recorded instance? An unknown version
+        (no view access) only has to agree on being installed.
+        """
+        if not self.fingerprint:
+            return True
+        current = fingerprint(state)
+        if current["installed"] != self.fingerprint.get("installed"):
+            return False
+        version, recorded = current["version"], self.fingerprint.get("version")
+        return not (version and recorded and version != recorded)
+
+    def token_for(self, admin_user: str, description: str) -> str | None:
+        if not self.done(TOKEN_ISSUED):
+            return None
+        if (
+            self.token.get("user", "").lower() != admin_user.lower()
+            or self.token.get("description") != description
+        ):
+            return None
+        return self.token.get("value") or None
+
+    def complete(self, *phases: str, state: ProbeResult | None = None) -> None:
+        with self._lock:
+            now = time.time()
+            for phase in phases:
+                self.phases.setdefault(phase, now)
+            if state is not None:
+                current = fingerprint(state)
+                if current["version"] is None and self.matches(state):
+                    # An anonymous probe cannot read the version; keep the known one.
+                    current["version"] = self.fingerprint.get("version")
+                self.fingerprint = current
+            self._save()
+
+    def record_token(self, token: str, *, admin_user: str, description: str) -> None:
+        with self._lock:
+            self.token = {
+                "value": token,
+                "user": admin_user,
+                "description": description,
+            }
+            self.phases[TOKEN_ISSUED] = time.time()
+            self._save()
+
+    def discard(self, *phases: str) -> None:
+        """Forget `phases` (all of them, and the fingerprint, if none given)."""
+        with self._lock:
+            if not phases:
+                self.phases.clear()
+                self.fingerprint = {}
+                phases = (TOKEN_ISSUED,)
+            for phase in phases:
+                self.phases.pop(phase, None)
+                if phase == TOKEN_ISSUED:
+                    self.token = {}
+            self._save()
+
+    def _save(self) -> None:
+        payload = json.dumps(
+            {
+                "phases": self.phases,
+                "fingerprint": self.fingerprint,
+                "token": self.token,
+            },
+            indent=2,
+            sort_keys=True,
+        )
+        fd, tmp = tempfile.mkstemp(dir=str(self.path.parent), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+
+
+class CheckpointStore:
+    """
+    Directory of bootstrap checkpoints, one JSON file per base URL. Like the
+    session store, the directory is created 0700 and files 0600.
+    """
+
+    def __init__(self, directory: str | os.PathLike | None = None):
+        self.directory = (
+            Path(directory).expanduser() if directory else cache_dir("checkpoints")
+        )
+
+    def path_for(self, base_url: str) -> Path:
+        return self.directory / f"{url_key(base_url)}.json"
+
+    def open(self, base_url: str) -> Checkpoint:
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        os.chmod(self.directory, 0o700)
+        return Checkpoint(self.path_for(base_url))
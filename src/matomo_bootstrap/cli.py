@@ -10,7 +10,9 @@ def parse_args() -> argparse.Namespace:
     p.add_argument(
         "--base-url",
         default=os.environ.get("MATOMO_URL"),
-        help="Matomo base URL (or MATOMO_URL env)",
+        help="Matomo base URL (or MATOMO_URL env); "
+        "unix:///path/to.sock:/ talks HTTP over a Unix socket; "
+        "a comma-separated list names replicas (the fastest healthy one is used)",
     )
     p.add_argument(
         "--admin-user",
@@ -38,13 +40,98 @@ def parse_args() -> argparse.Namespace:
         default=int(os.environ.get("MATOMO_TIMEOUT", "20")),
         help="Network timeout in seconds (or MATOMO_TIMEOUT env)",
     )
+    p.add_argument(
+        "--timeout-floor",
+        type=float,
+        default=float(os.environ.get("MATOMO_TIMEOUT_FLOOR", "2")),
+        help="Lower bound for latency-derived request timeouts in seconds; "
+        "--timeout is the upper bound (or MATOMO_TIMEOUT_FLOOR env)",
+    )
+    p.add_argument(
+        "--retries",
+        type=int,
+        default=int(os.environ.get("MATOMO_HTTP_RETRIES", "3")),
+        help="Retries for transient HTTP failures (or MATOMO_HTTP_RETRIES env)",
+    )
+    p.add_argument(
+        "--deadline",
+        type=float,
+        default=float(os.environ.get("MATOMO_DEADLINE_S", "0")),
+        help="Overall time budget of a run in seconds; every wait is clamped to "
+        "what is left of it (or MATOMO_DEADLINE_S env; 0 = no limit)",
+    )
+    p.add_argument(
+        "--session-dir",
+        default=os.environ.get("MATOMO_SESSION_DIR"),
+        help="Directory to persist the Matomo login session between runs "
+        "(or MATOMO_SESSION_DIR env; disabled if unset)",
+    )
+    p.add_argument(
+        "--checkpoint-dir",
+        default=os.environ.get("MATOMO_CHECKPOINT_DIR"),
+        help="Directory to record completed bootstrap phases (and the issued "
+        "token) per base URL, so re-runs resume after one validation probe "
+        "(or MATOMO_CHECKPOINT_DIR env; disabled if unset)",
+    )
+    p.add_argument(
+        "--installer",
+        choices=("http", "web", "console"),
+        default=os.environ.get("MATOMO_INSTALLER"),
+        help="How to install Matomo: 'web' drives the installer with "
+        "Playwright/Chromium; 'http' posts the installer forms directly and "
+        "falls back to 'web' on pages it does not know; 'console' runs Matomo's "
+        "console install command (needs the ExtraTools plugin and "
+        "--matomo-container-name) and falls back to 'http' (or MATOMO_INSTALLER "
+        "env; default: 'web')",
+    )
+    p.add_argument(
+        "--install-lock",
+        default=os.environ.get("MATOMO_INSTALL_LOCK", "file"),
+        help="How concurrent runs avoid installing at once: 'file' (lock file "
+        "in --lock-dir) or 'none' (or MATOMO_INSTALL_LOCK env; default: 'file')",
+    )
+    p.add_argument(
+        "--lock-dir",
+        default=os.environ.get("MATOMO_LOCK_DIR"),
+        help="Directory of the install lock files; share it between runs on "
+        "different hosts if possible (or MATOMO_LOCK_DIR env; default: system tmp)",
+    )
+    p.add_argument(
+        "--probe-mode",
+        choices=("api", "html"),
+        default=os.environ.get("MATOMO_PROBE_MODE", "api"),
+        help="How to detect the instance state: 'api' asks API.getMatomoVersion "
+        "(cheap, also reports the version), 'html' renders / "
+        "(or MATOMO_PROBE_MODE env)",
+    )
     p.add_argument("--debug", action="store_true", help="Enable debug logs on stderr")
+    p.add_argument(
+        "--status",
+        "--check",
+        action="store_true",
+        help="Only probe the instance and print its state as JSON (one line per "
+        "base URL); exit 0 if installed, 1 otherwise. Needs no admin credentials "
+        "and never loads the browser installer",
+    )
 
-    # Optional (future use)
     p.add_argument(
         "--matomo-container-name",
         default=os.environ.get("MATOMO_CONTAINER_NAME"),
-        help="Matomo container name (optional; also MATOMO_CONTAINER_NAME env)",
+        help="Matomo container (docker) or pod (kubectl) the console installer "
+        "runs in (optional; also MATOMO_CONTAINER_NAME env)",
+    )
+    p.add_argument(
+        "--console-runner",
+        choices=("docker", "kubectl", "local"),
+        default=os.environ.get("MATOMO_CONSOLE_RUNNER", "docker"),
+        help="How the console installer runs Matomo's console: docker exec, "
+        "kubectl exec or on this host (or MATOMO_CONSOLE_RUNNER env)",
+    )
+    p.add_argument(
+        "--console-path",
+        default=os.environ.get("MATOMO_CONSOLE_PATH", "/var/www/html/console"),
+        help="Path of Matomo's console script where it runs "
+        "(or MATOMO_CONSOLE_PATH env)",
     )
 
     return p.parse_args()
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import gzip
+import zlib
+
+ACCEPT_ENCODING = "gzip, deflate"
+
+# Read size used when pulling compressed bytes off the wire.
+_CHUNK_SIZE = 64 * 1024
+
+
+class _Decoder:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._obj = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        else:
+            self._obj = zlib.decompressobj(zlib.MAX_WBITS)
+        self._first = True
+
+    def decompress(self, data: bytes, max_length: int) -> bytes:
+        try:
+            out = self._obj.decompress(data, max_length)
+        except zlib.error:
+            # Some servers send raw DEFLATE (no zlib header) for "deflate".
+            if not (self._first and self.encoding == "deflate"):
+                raise
+            self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+            out = self._obj.decompress(data, max_length)
+        self._first = False
+        return out
+
+    @property
+    def unconsumed_tail(self) -> bytes:
+        """Input held back because `max_length` was reached."""
+        return self._obj.unconsumed_tail
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+
+class DecodingReader:
+    """
+    File-like view of a response body that transparently undoes
+    `Content-Encoding: gzip|deflate` while reading, chunk by chunk, so a
+    compressed body never has to be held in memory twice.
+
+    `raw_bytes` counts bytes read off the wire (before decompression).
+    """
+
+    def __init__(self, raw, content_encoding: str | None):
+        self._raw = raw
+        encoding = (content_encoding or "").strip().lower()
+        if encoding in ("gzip", "x-gzip"):
+            self._decoder: _Decoder | None = _Decoder("gzip")
+        elif encoding == "deflate":
+            self._decoder = _Decoder("deflate")
+        else:
+            self._decoder = None
+        self._buffer = bytearray()
+        self._eof = False
+        self.raw_bytes = 0
+
+    def _pull(self, size: int) -> bytes:
+        chunk = self._raw.read(size)
+        self.raw_bytes += len(chunk)
+        return chunk
+
+    def _fill(self) -> bool:
+        """Decode at most one more chunk into the buffer; False at EOF."""
+        if self._eof:
+            return False
+        decoder = self._decoder
+        # Input held back by the last step comes first: each step inflates at
+        # most _CHUNK_SIZE bytes, however well a wire chunk compresses.
+        data = (decoder.unconsumed_tail if decoder else b"") or self._pull(_CHUNK_SIZE)
+        if not data:
+            self._eof = True
+            if decoder is not None:
+                self._buffer += decoder.flush()
+            return False
+        if decoder is not None:
+            data = decoder.decompress(data, _CHUNK_SIZE)
+        self._buffer += data
+        return True
+
+    def _take(self, size: int) -> bytes:
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            while self._fill():
+                pass
+            return self._take(len(self._buffer))
+        while len(self._buffer) < size and self._fill():
+            pass
+        return self._take(size)
+
+    def read1(self, size: int = -1) -> bytes:
+        """Return buffered bytes, reading only as much as needed to get some."""
+        if not self._buffer:
+            self._fill()
+            # A compressed chunk may decode to nothing yet (e.g. gzip header).
+            while not self._buffer and self._fill():
+                pass
+        if size is None or size < 0:
+            size = len(self._buffer)
+        return self._take(size)
+
+
+def gzip_body(data: bytes) -> bytes:
+    return gzip.compress(data, compresslevel=6)
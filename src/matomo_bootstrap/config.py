@@ -3,6 +3,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 import os
 
+# Only stdlib imports here: `--status` loads this module on every poll.
+
 
 @dataclass(frozen=True)
 class Config:
@@ -12,17 +14,40 @@ class Config:
     admin_email: str
     token_description: str = "matomo-bootstrap"
     timeout: int = 20
+    timeout_floor: float = 2.0
+    retries: int = 3
+    deadline: float | None = None  # overall budget of a run in seconds
     debug: bool = False
-    matomo_container_name: str | None = (
-        None  # optional, for future console installer usage
-    )
+    session_dir: str | None = None  # persist login sessions between runs
+    checkpoint_dir: str | None = None  # record completed phases between runs
+    installer: str = "web"  # "web" (Playwright), "http" (form posts), "console"
+    install_lock: tuple[str, ...] = ("file",)  # see installers.lock
+    lock_dir: str | None = None  # file install lock directory (default: tmp)
+    probe_mode: str = "api"  # "api" (API.getMatomoVersion) or "html" (GET /)
+    matomo_container_name: str | None = None  # console installer: where to exec
+    console_runner: str = "docker"  # "docker", "kubectl" or "local"
+    console_path: str = "/var/www/html/console"  # Matomo's console script
+    base_urls: tuple[str, ...] = ()  # replicas; empty means just base_url
+
+    @property
+    def endpoints(self) -> tuple[str, ...]:
+        return self.base_urls or (self.base_url,)
+
+
+def split_base_urls(value: str) -> tuple[str, ...]:
+    """Split a comma-separated list of base URLs (blank entries are dropped)."""
+    return tuple(part.strip() for part in value.split(",") if part.strip())
 
 
-def config_from_env_and_args(args) -> Config:
+def config_from_env_and_args(args, *, require_credentials: bool = True) -> Config:
     """
     Build a Config object from CLI args (preferred) and environment variables (fallback).
+    Without `require_credentials` (status checks) only the base URL is required.
     """
     base_url = getattr(args, "base_url", None) or os.environ.get("MATOMO_URL")
+    # A comma-separated list names several replicas of the same instance.
+    base_urls = split_base_urls(base_url or "")
+    base_url = base_urls[0] if base_urls else None
     admin_user = getattr(args, "admin_user", None) or os.environ.get(
         "MATOMO_ADMIN_USER"
     )
@@ -42,34 +67,125 @@ def config_from_env_and_args(args) -> Config:
     timeout = int(
         getattr(args, "timeout", None) or os.environ.get("MATOMO_TIMEOUT") or "20"
     )
+    timeout_floor = getattr(args, "timeout_floor", None)
+    if timeout_floor is None:
+        timeout_floor = os.environ.get("MATOMO_TIMEOUT_FLOOR") or "2"
+    timeout_floor = float(timeout_floor)
+    if timeout_floor <= 0:
+        raise ValueError("--timeout-floor must be > 0")
+    timeout_floor = min(timeout_floor, timeout)
+    retries = getattr(args, "retries", None)
+    if retries is None:
+        retries = os.environ.get("MATOMO_HTTP_RETRIES") or "3"
+    retries = int(retries)
+    if retries < 0:
+        raise ValueError("--retries must be >= 0")
+    deadline = getattr(args, "deadline", None)
+    if deadline is None:
+        deadline = os.environ.get("MATOMO_DEADLINE_S") or "0"
+    deadline = float(deadline)
+    if deadline < 0:
+        raise ValueError("--deadline must be >= 0")
     debug = bool(getattr(args, "debug", False))
+    session_dir = (
+        getattr(args, "session_dir", None)
+        or os.environ.get("MATOMO_SESSION_DIR")
+        or None
+    )
+
+    checkpoint_dir = (
+        getattr(args, "checkpoint_dir", None)
+        or os.environ.get("MATOMO_CHECKPOINT_DIR")
+        or None
+    )
 
     matomo_container_name = (
         getattr(args, "matomo_container_name", None)
         or os.environ.get("MATOMO_CONTAINER_NAME")
         or None
     )
+    console_runner = (
+        getattr(args, "console_runner", None)
+        or os.environ.get("MATOMO_CONSOLE_RUNNER")
+        or "docker"
+    ).lower()
+    if console_runner not in ("docker", "kubectl", "local"):
+        raise ValueError("--console-runner must be 'docker', 'kubectl' or 'local'")
+    console_path = (
+        getattr(args, "console_path", None)
+        or os.environ.get("MATOMO_CONSOLE_PATH")
+        or "/var/www/html/console"
+    )
+
+    installer = (
+        getattr(args, "installer", None) or os.environ.get("MATOMO_INSTALLER") or "web"
+    ).lower()
+    if installer not in ("http", "web", "console"):
+        raise ValueError("--installer must be 'http', 'web' or 'console'")
+    needs_container = installer == "console" and console_runner != "local"
+    if needs_container and not matomo_container_name:
+        raise ValueError(
+            "--installer console needs --matomo-container-name "
+            "(or MATOMO_CONTAINER_NAME) unless --console-runner is 'local'"
+        )
+
+    install_lock_raw = (
+        getattr(args, "install_lock", None)
+        or os.environ.get("MATOMO_INSTALL_LOCK")
+        or "file"
+    )
+    install_lock = tuple(
+        kind
+        for kind in (part.strip().lower() for part in install_lock_raw.split(","))
+        if kind and kind != "none"
+    )
+    if any(kind != "file" for kind in install_lock):
+        raise ValueError("--install-lock must be 'file' or 'none'")
+    lock_dir = (
+        getattr(args, "lock_dir", None) or os.environ.get("MATOMO_LOCK_DIR") or None
+    )
+
+    probe_mode = (
+        getattr(args, "probe_mode", None)
+        or os.environ.get("MATOMO_PROBE_MODE")
+        or "api"
+    ).lower()
+    if probe_mode not in ("api", "html"):
+        raise ValueError("--probe-mode must be 'api' or 'html'")
 
     missing: list[str] = []
     if not base_url:
         missing.append("--base-url (or MATOMO_URL)")
-    if not admin_user:
-        missing.append("--admin-user (or MATOMO_ADMIN_USER)")
-    if not admin_password:
-        missing.append("--admin-password (or MATOMO_ADMIN_PASSWORD)")
-    if not admin_email:
-        missing.append("--admin-email (or MATOMO_ADMIN_EMAIL)")
+    if require_credentials:
+        if not admin_user:
+            missing.append("--admin-user (or MATOMO_ADMIN_USER)")
+        if not admin_password:
+            missing.append("--admin-password (or MATOMO_ADMIN_PASSWORD)")
+        if not admin_email:
+            missing.append("--admin-email (or MATOMO_ADMIN_EMAIL)")
 
     if missing:
         raise ValueError("missing required values: " + ", ".join(missing))
 
     return Config(
         base_url=str(base_url),
-        admin_user=str(admin_user),
-        admin_password=str(admin_password),
-        admin_email=str(admin_email),
+        admin_user=str(admin_user or ""),
+        admin_password=str(admin_password or ""),
+        admin_email=str(admin_email or ""),
         token_description=str(token_description),
         timeout=timeout,
+        timeout_floor=timeout_floor,
+        retries=retries,
+        deadline=deadline or None,
         debug=debug,
+        session_dir=session_dir,
+        checkpoint_dir=checkpoint_dir,
+        installer=installer,
+        install_lock=install_lock,
+        lock_dir=lock_dir,
+        probe_mode=probe_mode,
         matomo_container_name=matomo_container_name,
+        console_runner=console_runner,
+        console_path=console_path,
+        base_urls=base_urls if len(base_urls) > 1 else (),
     )
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from .errors import DeadlineExceededError
+
+
+class Deadline:
+    """
+    Overall time budget of one bootstrap run, shared by all phases.
+
+    Waits are clamped to the remaining budget with `clamp()`; once it is used
+    up, `DeadlineExceededError` names the phase that was running (see
+    `phase()`) and how long each phase took. A budget of None never expires.
+    """
+
+    def __init__(
+        self,
+        budget_s: float | None = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.budget_s = budget_s
+        self._clock = clock
+        self.started_at = clock()
+        self.current_phase = "startup"
+        self.spent: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        if self.budget_s is None:
+            return math.inf
+        return max(0.0, self.started_at + self.budget_s - self._clock())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def exceeded(self) -> DeadlineExceededError:
+        with self._lock:
+            spent = dict(self.spent)
+            phase = self.current_phase
+        summary = ", ".join(f"{name}={secs:.1f}s" for name, secs in spent.items())
+        return DeadlineExceededError(
+            f"deadline of {self.budget_s:g}s exceeded during phase '{phase}'"
+            + (f" (spent: {summary})" if summary else "")
+        )
+
+    def check(self) -> None:
+        """Raise `DeadlineExceededError` if the budget is used up."""
+        if self.expired:
+            raise self.exceeded()
+
+    def clamp(self, timeout_s: float) -> float:
+        """`timeout_s` limited to the remaining budget; raises once expired."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise self.exceeded()
+        return min(timeout_s, remaining)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[Deadline]:
+        """Attribute the time spent in the block to phase `name`."""
+        with self._lock:
+            previous, self.current_phase = self.current_phase, name
+        started = self._clock()
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self.spent[name] = self.spent.get(name, 0.0) + (self._clock() - started)
+                self.current_phase = previous
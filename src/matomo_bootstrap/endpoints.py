@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Sequence
+
+from .probe import ERRORING, PROBE_API, UNREACHABLE, ProbeResult, probe_url
+
+ProbeFn = Callable[[str], ProbeResult]
+
+
+def _health_rank(result: ProbeResult) -> int:
+    """0 = answers like Matomo (installer or installed), 1 = erroring, 2 = down."""
+    if result.state == UNREACHABLE:
+        return 2
+    if result.state == ERRORING:
+        return 1
+    return 0
+
+
+class EndpointSelector:
+    """
+    Picks one of several Matomo replicas (base URLs) for a run.
+
+    `select()` probes all candidates concurrently and takes the first healthy
+    answer, i.e. the lowest-latency replica that looks like Matomo, without
+    waiting for slow ones. If none is healthy, the best-ranked answer wins
+    (earlier URLs first on ties). The choice is sticky: later `select()`
+    calls return it again until it is reported via `fail()`, which excludes
+    it and makes the next `select()` re-probe the remaining replicas.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        *,
+        timeout: float = 5,
+        mode: str = PROBE_API,
+        probe: ProbeFn | None = None,
+        debug: bool = False,
+    ):
+        if not urls:
+            raise ValueError("at least one base URL is required")
+        self.urls = tuple(urls)
+        self.debug = debug
+        self.failed: dict[str, str] = {}
+        self.current: str | None = None
+        self._probe = probe or (lambda url: probe_url(url, timeout=timeout, mode=mode))
+
+    def _dbg(self, msg: str) -> None:
+        if self.debug:
+            print(msg, file=sys.stderr)
+
+    @property
+    def candidates(self) -> tuple[str, ...]:
+        return tuple(url for url in self.urls if url not in self.failed)
+
+    def select(self) -> tuple[str, ProbeResult | None]:
+        """
+        Return `(url, probe result)`; the result is None when the sticky
+        choice is returned without probing again.
+        """
+        if self.current is not None:
+            return self.current, None
+
+        candidates = self.candidates
+        if not candidates:
+            raise RuntimeError("no base URL left to fail over to")
+
+        results: dict[str, ProbeResult] = {}
+        chosen: str | None = None
+        pool = ThreadPoolExecutor(max_workers=len(candidates))
+        try:
+            futures = {pool.submit(self._probe, url): url for url in candidates}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    result = ProbeResult(
+                        UNREACHABLE, error=f"{type(exc).__name__}: {exc}"
+                    )
+                results[url] = result
+                self._dbg(
+                    f"[endpoints] {url} -> {result.label} in {result.elapsed_s:.3f}s"
+                )
+                if _health_rank(result) == 0:
+                    chosen = url
+                    break
+        finally:
+            # Do not wait for slower replicas once a healthy one answered.
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        if chosen is None:
+            chosen = min(
+                results,
+                key=lambda url: (_health_rank(results[url]), self.urls.index(url)),
+            )
+        self.current = chosen
+        self._dbg(f"[endpoints] selected {chosen} ({results[chosen].label})")
+        return chosen, results[chosen]
+
+    def fail(self, url: str, reason: object) -> bool:
+        """
+        Exclude `url` (it degraded mid-run). Returns True when another
+        replica is left to fail over to.
+        """
+        self.failed[url] = str(reason)
+        if self.current == url:
+            self.current = None
+        self._dbg(f"[endpoints] {url} failed: {reason}")
+        return bool(self.candidates)
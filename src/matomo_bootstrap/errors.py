@@ -8,3 +8,15 @@ class MatomoNotReadyError(BootstrapError):
 
 class TokenCreationError(BootstrapError):
     """Failed to create API token."""
+
+
+class MatomoApiError(BootstrapError):
+    """A Matomo API call returned an error result."""
+
+
+class CircuitOpenError(MatomoNotReadyError):
+    """Requests are short-circuited because Matomo looks down."""
+
+
+class DeadlineExceededError(BootstrapError):
+    """The overall time budget of the run is used up."""
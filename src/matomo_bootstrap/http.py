@@ -2,59 +2,529 @@ from __future__ import annotations
 
 import http.cookiejar
 import sys
+import time
 import urllib.error
 import urllib.parse
 import urllib.request
-from typing import Dict, Tuple
+from typing import Callable, Dict, Iterator, Mapping, Tuple
+
+from .adaptive import AdaptiveTimeouts, CircuitBreaker, endpoint_class
+from .compression import ACCEPT_ENCODING, DecodingReader, gzip_body
+from .deadline import Deadline
+from .pool import ConnectionPool, PoolStats, build_keepalive_opener
+from .retry import (
+    AttemptRecord,
+    RetryBudget,
+    RetryPolicy,
+    is_maintenance_response,
+    parse_retry_after,
+)
+from .timing import RequestTiming, TimingHook, WireTiming, build_request_timing
+from .uds import build_unix_opener, is_unix_base_url, split_unix_base_url
+
+# Per-attempt records kept for tuning / debugging (oldest dropped first).
+_MAX_ATTEMPT_RECORDS = 200
+
+
+def _wire_timing(resp) -> WireTiming | None:
+    # HTTPError wraps the pooled response in `.fp`.
+    if isinstance(resp, urllib.error.HTTPError):
+        resp = resp.fp
+    return getattr(resp, "wire_timing", None)
+
+
+def _format_timing(t: RequestTiming) -> str:
+    def ms(value: float | None) -> str:
+        return "-" if value is None else f"{value * 1000:.1f}ms"
+
+    return (
+        f"[HTTP] {t.method} {t.url} -> {t.status if t.error is None else t.error} "
+        f"dns={ms(t.dns_s)} connect={ms(t.connect_s)} tls={ms(t.tls_s)} "
+        f"ttfb={ms(t.ttfb_s)} transfer={ms(t.transfer_s)} total={ms(t.total_s)} "
+        f"bytes={t.response_bytes}/{t.body_bytes} "
+        f"{'reused' if t.reused_connection else 'new'}"
+    )
+
+
+class StreamedResponse:
+    """
+    Response whose body is read lazily from the socket.
+
+    - `max_bytes` caps how much (decoded) body can be read; `truncated` tells
+      whether the cap cut the body short
+    - 4xx/5xx responses are returned like any other status (no HTTPError)
+    - closing before the body is exhausted drops the connection instead of
+      returning it to the keep-alive pool, so an early close never has to
+      drain the rest of a large page
+    """
+
+    def __init__(
+        self,
+        raw,
+        *,
+        status: int,
+        url: str,
+        max_bytes: int | None = None,
+        on_close: Callable[[StreamedResponse], None] | None = None,
+    ):
+        self._raw = raw
+        self.status = status
+        self.url = url
+        self.headers: Mapping[str, str] = raw.headers
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self.truncated = False
+        self._cap_checked = False
+        self._reader = DecodingReader(raw, raw.headers.get("Content-Encoding"))
+        self._closed = False
+        self._on_close = on_close
+
+    @property
+    def raw_bytes(self) -> int:
+        return self._reader.raw_bytes
+
+    def _budget(self, size: int) -> int:
+        if self.max_bytes is None:
+            return size
+        remaining = self.max_bytes - self.bytes_read
+        if size < 0 or size > remaining:
+            return remaining
+        return size
+
+    def _account(self, data: bytes) -> bytes:
+        self.bytes_read += len(data)
+        if (
+            self.max_bytes is not None
+            and self.bytes_read >= self.max_bytes
+            and not self._cap_checked
+        ):
+            # Peek one byte to find out whether the cap actually truncated.
+            self._cap_checked = True
+            self.truncated = bool(self._reader.read1(1))
+        return data
+
+    def read(self, size: int = -1) -> bytes:
+        budget = self._budget(size)
+        if self._closed or budget == 0:
+            return b""
+        return self._account(self._reader.read(budget))
+
+    def iter_chunks(self, chunk_size: int = 8192) -> Iterator[bytes]:
+        while not self._closed:
+            budget = self._budget(chunk_size)
+            if budget == 0:
+                return
+            chunk = self._reader.read1(budget)
+            if not chunk:
+                return
+            yield self._account(chunk)
+
+    def text(self, errors: str = "replace") -> str:
+        return self.read().decode("utf-8", errors=errors)
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._raw.close()
+            if self._on_close is not None:
+                self._on_close(self)
+
+    def __enter__(self) -> StreamedResponse:
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
 
 
 class HttpClient:
-    def __init__(self, base_url: str, timeout: int = 20, debug: bool = False):
+    def __init__(
+        self,
+        base_url: str,
+        timeout: int = 20,
+        debug: bool = False,
+        *,
+        cookies: http.cookiejar.CookieJar | None = None,
+        max_idle_connections: int = 4,
+        retry_policy: RetryPolicy | None = None,
+        retry_budget: RetryBudget | None = None,
+        compress_requests: bool = False,
+        compress_min_bytes: int = 1024,
+        adaptive_timeouts: AdaptiveTimeouts | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        deadline: Deadline | None = None,
+    ):
+        # unix:///path.sock:/prefix talks HTTP over a Unix socket; URLs are
+        # then built against http://localhost/prefix.
+        self.unix_socket: str | None = None
+        if is_unix_base_url(base_url):
+            self.unix_socket, base_url = split_unix_base_url(base_url)
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
         self.debug = debug
 
-        self.cookies = http.cookiejar.CookieJar()
-        self.opener = urllib.request.build_opener(
-            urllib.request.HTTPCookieProcessor(self.cookies)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.retry_budget = retry_budget or RetryBudget()
+        self.attempts: list[AttemptRecord] = []
+
+        # Optional: per-endpoint timeouts from observed latency (otherwise the
+        # fixed `timeout`) and fail-fast once the instance looks down.
+        self.adaptive_timeouts = adaptive_timeouts
+        self.circuit_breaker = circuit_breaker
+
+        # Optional run-wide budget: request timeouts and retry sleeps are
+        # clamped to it, and requests fail with DeadlineExceededError once it
+        # is used up.
+        self.deadline = deadline
+
+        # Opt-in: only servers configured to inflate request bodies (e.g. a
+        # reverse proxy with a gzip input filter) accept compressed POSTs.
+        self.compress_requests = compress_requests
+        self.compress_min_bytes = compress_min_bytes
+
+        # Timing hooks; with none registered no per-request record is built.
+        self._timing_hooks: list[TimingHook] = []
+        if debug:
+            self.add_timing_hook(lambda t: self._dbg(_format_timing(t)))
+
+        self.cookies = cookies if cookies is not None else http.cookiejar.CookieJar()
+        self.pool = ConnectionPool(
+            max_idle_per_host=max_idle_connections,
+            connect_timeout_s=(
+                adaptive_timeouts.connect_timeout_s if adaptive_timeouts else None
+            ),
         )
+        cookie_processor = urllib.request.HTTPCookieProcessor(self.cookies)
+        if self.unix_socket:
+            self.opener = build_unix_opener(
+                self.pool, self.unix_socket, cookie_processor
+            )
+        else:
+            self.opener = build_keepalive_opener(self.pool, cookie_processor)
+
+    @property
+    def stats(self) -> PoolStats:
+        return self.pool.stats
+
+    def close(self) -> None:
+        self._dbg(
+            f"[HTTP] connections opened={self.stats.connections_opened} "
+            f"reused={self.stats.connections_reused}"
+        )
+        self.pool.close()
+
+    def __enter__(self) -> HttpClient:
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def add_timing_hook(self, hook: TimingHook) -> None:
+        """
+        Call `hook(RequestTiming)` after every request attempt (including
+        failed and retried ones). For streamed responses the hook runs when the
+        response is closed. Exceptions raised by hooks are logged and ignored.
+        """
+        self._timing_hooks.append(hook)
+
+    def remove_timing_hook(self, hook: TimingHook) -> None:
+        self._timing_hooks.remove(hook)
+
+    def _emit_timing(
+        self,
+        req: urllib.request.Request,
+        started: float,
+        *,
+        status: int | None = None,
+        wire: WireTiming | None = None,
+        response_bytes: int = 0,
+        body_bytes: int = 0,
+        error: Exception | None = None,
+    ) -> None:
+        timing = build_request_timing(
+            method=req.get_method(),
+            url=req.get_full_url(),
+            status=status,
+            wire=wire,
+            started_at=started,
+            finished_at=time.perf_counter(),
+            request_bytes=len(req.data or b""),
+            response_bytes=response_bytes,
+            body_bytes=body_bytes,
+            error=None if error is None else f"{type(error).__name__}: {error}",
+        )
+        for hook in list(self._timing_hooks):
+            try:
+                hook(timing)
+            except Exception as exc:
+                self._dbg(f"[HTTP] timing hook {hook!r} failed: {exc}")
 
     def _dbg(self, msg: str) -> None:
         if self.debug:
             print(msg, file=sys.stderr)
 
-    def _open(self, req: urllib.request.Request) -> Tuple[int, str]:
+    def _endpoint_class(self, req: urllib.request.Request) -> str:
+        body = req.data if not req.has_header("Content-encoding") else None
+        return endpoint_class(req.get_method(), req.get_full_url(), body)
+
+    def _timeout_for(
+        self, req: urllib.request.Request, timeout: float | None = None
+    ) -> float:
+        if timeout is not None:
+            pass
+        elif self.adaptive_timeouts is None:
+            timeout = self.timeout
+        else:
+            timeout = self.adaptive_timeouts.timeout_for(self._endpoint_class(req))
+        if self.deadline is not None:
+            timeout = self.deadline.clamp(timeout)
+        return timeout
+
+    def _open_raw(self, req: urllib.request.Request, timeout: float | None = None):
+        """Open `req`; HTTPError (4xx/5xx) is returned as the response."""
         try:
-            with self.opener.open(req, timeout=self.timeout) as resp:
-                body = resp.read().decode("utf-8", errors="replace")
-                return resp.status, body
+            return self.opener.open(req, timeout=self._timeout_for(req, timeout))
         except urllib.error.HTTPError as exc:
+            if exc.fp is None:
+                raise
+            return exc
+
+    def _open_once(
+        self, req: urllib.request.Request
+    ) -> tuple[int, Mapping[str, str], str, str]:
+        timed = bool(self._timing_hooks)
+        started = time.perf_counter() if timed else 0.0
+        try:
+            resp = self._open_raw(req)
+        except (urllib.error.URLError, OSError) as exc:
+            if timed:
+                self._emit_timing(req, started, error=exc)
+            raise
+
+        reader = DecodingReader(resp, resp.headers.get("Content-Encoding"))
+        body_bytes = 0
+        try:
             # urllib raises HTTPError for 4xx/5xx but it still contains status + body
             try:
-                body = exc.read().decode("utf-8", errors="replace")
+                data = reader.read()
+                body_bytes = len(data)
+                body = data.decode("utf-8", errors="replace")
             except Exception:
-                body = str(exc)
-            return exc.code, body
+                if not isinstance(resp, urllib.error.HTTPError):
+                    raise
+                body = str(resp)
+        finally:
+            # Returns the underlying keep-alive connection to the pool.
+            resp.close()
+        if timed:
+            self._emit_timing(
+                req,
+                started,
+                status=resp.status,
+                wire=_wire_timing(resp),
+                response_bytes=reader.raw_bytes,
+                body_bytes=body_bytes,
+            )
+        return resp.status, resp.headers, body, body
 
-    def get(self, path: str, params: Dict[str, str]) -> Tuple[int, str]:
-        qs = urllib.parse.urlencode(params)
+    def _record_attempt(self, record: AttemptRecord) -> None:
+        self.attempts.append(record)
+        if len(self.attempts) > _MAX_ATTEMPT_RECORDS:
+            del self.attempts[: len(self.attempts) - _MAX_ATTEMPT_RECORDS]
+
+    def _with_retries(
+        self,
+        req: urllib.request.Request,
+        once: Callable[[urllib.request.Request], tuple],
+        *,
+        discard: Callable[[object], None] | None = None,
+        policy: RetryPolicy | None = None,
+    ):
+        """
+        Run `once(req) -> (status, headers, body_for_policy, result)` under
+        the retry policy and return `(status, result)` of the final attempt.
+        `discard(result)` releases the result of an attempt that is retried.
+        """
+        method = req.get_method()
+        url = req.get_full_url()
+        policy = policy or self.retry_policy
+        breaker = self.circuit_breaker
+        adaptive = self.adaptive_timeouts
+        cls = self._endpoint_class(req) if adaptive is not None else ""
+        self.retry_budget.deposit()
+
+        attempt = 0
+        while True:
+            attempt += 1
+            if breaker is not None:
+                breaker.before_request(self.base_url)
+            started = time.monotonic()
+            status: int | None = None
+            body = ""
+            headers: Mapping[str, str] = {}
+            result = None
+            error: Exception | None = None
+            try:
+                status, headers, body, result = once(req)
+            except (urllib.error.URLError, OSError) as exc:
+                error = exc
+            elapsed = time.monotonic() - started
+            if breaker is not None:
+                breaker.record(status)
+            if adaptive is not None and status is not None and status < 500:
+                adaptive.record(cls, elapsed)
+
+            delay: float | None = None
+            if breaker is not None and breaker.state == breaker.OPEN:
+                # Retrying would only hit the open circuit; fail with the real error.
+                pass
+            elif policy.should_retry(
+                method, attempt, status=status, body=body, error=error
+            ):
+                if self.retry_budget.withdraw():
+                    delay = policy.delay(
+                        attempt,
+                        retry_after=parse_retry_after(headers.get("Retry-After")),
+                        maintenance=is_maintenance_response(status, body),
+                    )
+                else:
+                    self._dbg("[HTTP] retry budget exhausted; not retrying")
+                if (
+                    delay is not None
+                    and self.deadline is not None
+                    and delay >= self.deadline.remaining()
+                ):
+                    # The retry could not start before the run's deadline.
+                    self._dbg("[HTTP] deadline too close; not retrying")
+                    delay = None
+
+            self._record_attempt(
+                AttemptRecord(
+                    method=method,
+                    url=url,
+                    attempt=attempt,
+                    status=status,
+                    error=None if error is None else f"{type(error).__name__}: {error}",
+                    elapsed_s=elapsed,
+                    retry_delay_s=delay,
+                )
+            )
+
+            if delay is None:
+                if error is not None:
+                    raise error
+                return status, result
+
+            if discard is not None and result is not None:
+                discard(result)
+            outcome = f"HTTP {status}" if error is None else type(error).__name__
+            self._dbg(
+                f"[HTTP] {method} {url} attempt {attempt} -> {outcome} "
+                f"after {elapsed:.3f}s; retrying in {delay:.2f}s"
+            )
+            time.sleep(delay)
+
+    def _open(self, req: urllib.request.Request) -> Tuple[int, str]:
+        return self._with_retries(req, self._open_once)
+
+    def _url(self, path: str, params: Dict[str, str] | None = None) -> str:
+        qs = urllib.parse.urlencode(params or {})
         if path == "/":
             url = f"{self.base_url}/"
         else:
             url = f"{self.base_url}{path}"
         if qs:
             url = f"{url}?{qs}"
+        return url
+
+    def _request(
+        self, method: str, url: str, data: Dict[str, str] | None
+    ) -> urllib.request.Request:
+        if data is None:
+            req = urllib.request.Request(url, method=method)
+        else:
+            encoded = urllib.parse.urlencode(data).encode()
+            req = urllib.request.Request(url, data=encoded, method=method)
+            if self.compress_requests and len(encoded) >= self.compress_min_bytes:
+                req.data = gzip_body(encoded)
+                req.add_header("Content-Encoding", "gzip")
+        req.add_header("Accept-Encoding", ACCEPT_ENCODING)
+        return req
+
+    def get(self, path: str, params: Dict[str, str]) -> Tuple[int, str]:
+        url = self._url(path, params)
 
         self._dbg(f"[HTTP] GET {url}")
 
-        req = urllib.request.Request(url, method="GET")
-        return self._open(req)
+        return self._open(self._request("GET", url, None))
 
     def post(self, path: str, data: Dict[str, str]) -> Tuple[int, str]:
         url = self.base_url + path
-        encoded = urllib.parse.urlencode(data).encode()
 
         self._dbg(f"[HTTP] POST {url} keys={list(data.keys())}")
 
-        req = urllib.request.Request(url, data=encoded, method="POST")
-        return self._open(req)
+        return self._open(self._request("POST", url, data))
+
+    def stream(
+        self,
+        method: str,
+        path: str,
+        params: Dict[str, str] | None = None,
+        data: Dict[str, str] | None = None,
+        *,
+        max_bytes: int | None = None,
+        retry_policy: RetryPolicy | None = None,
+        timeout: float | None = None,
+    ) -> StreamedResponse:
+        """
+        Like `get`/`post`, but return a `StreamedResponse` instead of reading
+        the body. Use it as a context manager so the connection is released.
+        Retries only consider the status line; the body is never inspected.
+        `retry_policy` and `timeout` override the client's for this call.
+        """
+        method = method.upper()
+        if method == "POST":
+            url = self.base_url + path
+        else:
+            url = self._url(path, params)
+
+        self._dbg(f"[HTTP] {method} {url} (stream, max_bytes={max_bytes})")
+
+        def _once(req: urllib.request.Request):
+            timed = bool(self._timing_hooks)
+            started = time.perf_counter() if timed else 0.0
+            try:
+                raw = self._open_raw(req, timeout)
+            except (urllib.error.URLError, OSError) as exc:
+                if timed:
+                    self._emit_timing(req, started, error=exc)
+                raise
+
+            on_close = None
+            if timed:
+
+                def on_close(resp: StreamedResponse) -> None:
+                    self._emit_timing(
+                        req,
+                        started,
+                        status=resp.status,
+                        wire=_wire_timing(raw),
+                        response_bytes=resp.raw_bytes,
+                        body_bytes=resp.bytes_read,
+                    )
+
+            resp = StreamedResponse(
+                raw,
+                status=raw.status,
+                url=raw.geturl(),
+                max_bytes=max_bytes,
+                on_close=on_close,
+            )
+            return resp.status, resp.headers, "", resp
+
+        _, resp = self._with_retries(
+            self._request(method, url, data if method == "POST" else None),
+            _once,
+            discard=lambda r: r.close(),
+            policy=retry_policy,
+        )
+        return resp
@@ -3,9 +3,21 @@ from __future__ import annotations
 from abc import ABC, abstractmethod
 
 from ..config import Config
+from ..deadline import Deadline
+from ..probe import ProbeResult
 
 
 class Installer(ABC):
     @abstractmethod
-    def ensure_installed(self, config: Config) -> None:
+    def ensure_installed(
+        self,
+        config: Config,
+        state: ProbeResult | None = None,
+        deadline: Deadline | None = None,
+    ) -> ProbeResult:
+        """
+        Install Matomo unless `state` (or a fresh probe) shows it is installed.
+        Returns the probed state after installation. Waits must not outlast
+        `deadline` (the run's overall budget).
+        """
         raise NotImplementedError
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import queue
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, ContextManager, Iterator, TypeVar
+
+T = TypeVar("T")
+
+BrowserLauncher = Callable[[], ContextManager[object]]
+
+
+@contextmanager
+def launch_chromium(*, headless: bool = True, slow_mo: float | None = None) -> Iterator:
+    """Start the Playwright driver and Chromium; both are shut down on exit."""
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=headless, slow_mo=slow_mo)
+        try:
+            yield browser
+        finally:
+            browser.close()
+
+
+class BrowserWorker:
+    """
+    Owns a browser in a background thread, started as soon as the worker is
+    created (e.g. while still waiting for Matomo to come up).
+
+    Playwright's sync API must be used from the thread that started it, so
+    work is handed over with `run(fn)`, which calls `fn(browser)` on the
+    worker thread and returns its result. `close()` shuts the browser down,
+    whether or not it was ever used; launch errors only surface from `run()`.
+    The worker closes the browser on its own thread, so `close()` does not
+    wait for a launch still in progress unless asked to.
+    """
+
+    def __init__(self, launch: BrowserLauncher):
+        self._launch = launch
+        self._jobs: queue.Queue = queue.Queue()
+        self._ready = threading.Event()
+        self._launch_error: BaseException | None = None
+        self._thread = threading.Thread(
+            target=self._main, name="matomo-bootstrap-browser", daemon=True
+        )
+        self._thread.start()
+
+    def _main(self) -> None:
+        try:
+            with self._launch() as browser:
+                self._ready.set()
+                while True:
+                    job = self._jobs.get()
+                    if job is None:
+                        return
+                    fn, future = job
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        future.set_result(fn(browser))
+                    except BaseException as exc:
+                        future.set_exception(exc)
+        except BaseException as exc:
+            self._launch_error = exc
+        finally:
+            self._ready.set()
+            # Fail jobs queued after a launch error instead of leaving them hanging.
+            while True:
+                try:
+                    job = self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not None and job[1].set_running_or_notify_cancel():
+                    job[1].set_exception(
+                        self._launch_error or RuntimeError("browser worker stopped")
+                    )
+
+    @property
+    def ready(self) -> bool:
+        """True once the browser has been launched (or failed to launch)."""
+        return self._ready.is_set()
+
+    def run(self, fn: Callable[[object], T]) -> T:
+        self._ready.wait()
+        if self._launch_error is not None:
+            raise self._launch_error
+        if not self._thread.is_alive():
+            raise RuntimeError("browser worker stopped")
+        future: Future = Future()
+        self._jobs.put((fn, future))
+        return future.result()
+
+    def close(self, *, wait: bool = False) -> None:
+        self._jobs.put(None)
+        if wait:
+            self._thread.join()
+
+    def __enter__(self) -> BrowserWorker:
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
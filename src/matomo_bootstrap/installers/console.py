@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Mapping, Sequence
+
+from .base import Installer
+from .web import DEFAULT_SITE_NAME, DEFAULT_SITE_URL, wait_http
+from ..config import Config
+from ..deadline import Deadline
+from ..errors import BootstrapError
+from ..probe import UNREACHABLE, ProbeResult, probe_url
+
+# Matomo's console inside the official Docker image.
+DEFAULT_CONSOLE = "/var/www/html/console"
+CONSOLE_INSTALL_TIMEOUT_S = int(os.environ.get("MATOMO_CONSOLE_TIMEOUT_S", "300"))
+CONSOLE_CHECK_TIMEOUT_S = 30
+# Installation command of the ExtraTools plugin (core Matomo has none).
+INSTALL_COMMAND = "matomo:install"
+
+RUNNER_DOCKER = "docker"
+RUNNER_KUBECTL = "kubectl"
+RUNNER_LOCAL = "local"
+RUNNERS = (RUNNER_DOCKER, RUNNER_KUBECTL, RUNNER_LOCAL)
+
+# Read by matomo:install instead of --first-user-pass, which would show up in
+# the process list of the host and the container.
+PASSWORD_ENV = "MATOMO_FIRST_USER_PASSWORD"
+_OUTPUT_TAIL_LINES = 20
+# Exports one stdin line per variable named in $1, then runs the command.
+_READ_ENV_SCRIPT = (
+    "names=$1; shift; for name in $names; do IFS= read -r value || exit 1; "
+    'export "$name=$value"; done; exec "$@"'
+)
+
+
+def _log(msg: str) -> None:
+    print(msg, file=sys.stderr)
+
+
+class ConsoleCommandError(BootstrapError):
+    """A Matomo console command failed or timed out."""
+
+
+class ConsoleUnavailableError(BootstrapError):
+    """The Matomo console (or its install command) cannot be run."""
+
+
+@dataclass(frozen=True)
+class CommandResult:
+    returncode: int
+    output: list[str]  # last lines of combined stdout/stderr
+
+
+class CommandRunner:
+    """
+    Runs `php <console> ...` on this host. Subclasses only change where the
+    command runs (`prefix`), e.g. inside a container.
+
+    Output (stdout and stderr combined) is passed line by line to `on_line`
+    while the command runs. A command still running after `timeout` seconds
+    is killed (ConsoleCommandError); for `docker exec` / `kubectl exec` this
+    ends the client, the process in the container may keep running.
+
+    `env` adds variables to the console's environment without putting them
+    on any command line (secrets): exec runners send them over stdin to a
+    shell in the container.
+    """
+
+    env_via_stdin = False
+
+    def __init__(self, console: str = DEFAULT_CONSOLE, *, php: str = "php"):
+        self.console = console
+        self.php = php
+
+    def prefix(self, *, stdin: bool = False) -> list[str]:
+        return []
+
+    def command(self, args: Sequence[str], env_names: Sequence[str] = ()) -> list[str]:
+        console = [self.php, self.console, *args]
+        if not (env_names and self.env_via_stdin):
+            return [*self.prefix(), *console]
+        return [
+            *self.prefix(stdin=True),
+            "sh",
+            "-c",
+            _READ_ENV_SCRIPT,
+            "sh",
+            " ".join(env_names),
+            *console,
+        ]
+
+    def run(
+        self,
+        args: Sequence[str],
+        *,
+        timeout: float,
+        on_line: Callable[[str], None] | None = None,
+        env: Mapping[str, str] | None = None,
+    ) -> CommandResult:
+        env = dict(env or {})
+        if any("\n" in value for value in env.values()):
+            raise ValueError("console environment values must be single lines")
+        argv = self.command(args, tuple(env))
+        stdin_env = bool(env) and self.env_via_stdin
+        try:
+            proc = subprocess.Popen(
+                argv,
+                stdin=subprocess.PIPE if stdin_env else subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                errors="replace",
+                bufsize=1,
+                env={**os.environ, **env} if env and not stdin_env else None,
+            )
+        except OSError as exc:
+            raise ConsoleUnavailableError(
+                f"Cannot run {argv[0]!r}: {exc.strerror or exc}"
+            ) from exc
+        if stdin_env:
+            try:
+                proc.stdin.write("".join(f"{value}\n" for value in env.values()))
+                proc.stdin.close()
+            except OSError:
+                pass  # the command exited early; its output says why
+
+        tail: deque[str] = deque(maxlen=_OUTPUT_TAIL_LINES)
+
+        def pump() -> None:
+            for line in proc.stdout:
+                line = line.rstrip("\n")
+                tail.append(line)
+                if on_line is not None:
+                    on_line(line)
+
+        reader = threading.Thread(target=pump, daemon=True)
+        reader.start()
+        try:
+            returncode = proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired as exc:
+            proc.kill()
+            proc.wait()
+            raise ConsoleCommandError(
+                f"Console command timed out after {timeout:g}s: {' '.join(argv)}"
+            ) from exc
+        finally:
+            reader.join(timeout=5)
+            proc.stdout.close()
+        return CommandResult(returncode, list(tail))
+
+
+class DockerExecRunner(CommandRunner):
+    env_via_stdin = True
+
+    def __init__(
+        self,
+        container: str,
+        console: str = DEFAULT_CONSOLE,
+        *,
+        user: str | None = "www-data",
+        docker: str = "docker",
+    ):
+        super().__init__(console)
+        self.container = container
+        self.user = user
+        self.docker = docker
+
+    def prefix(self, *, stdin: bool = False) -> list[str]:
+        interactive = ["--interactive"] if stdin else []
+        user = ["--user", self.user] if self.user else []
+        return [self.docker, "exec", *interactive, *user, self.container]
+
+
+class KubectlExecRunner(CommandRunner):
+    """`pod` may be anything `kubectl exec` accepts, e.g. `deploy/matomo`."""
+
+    env_via_stdin = True
+
+    def __init__(
+        self,
+        pod: str,
+        console: str = DEFAULT_CONSOLE,
+        *,
+        namespace: str | None = None,
+        container: str | None = None,
+        kubectl: str = "kubectl",
+    ):
+        super().__init__(console)
+        self.pod = pod
+        self.namespace = namespace
+        self.container = container
+        self.kubectl = kubectl
+
+    def prefix(self, *, stdin: bool = False) -> list[str]:
+        interactive = ["--stdin"] if stdin else []
+        namespace = ["--namespace", self.namespace] if self.namespace else []
+        container = ["--container", self.container] if self.container else []
+        return [
+            self.kubectl,
+            "exec",
+            *interactive,
+            *namespace,
+            self.pod,
+            *container,
+            "--",
+        ]
+
+
+def build_runner(config: Config) -> CommandRunner:
+    if config.console_runner == RUNNER_LOCAL:
+        return CommandRunner(config.console_path)
+    if not config.matomo_container_name:
+        raise ValueError(
+            f"--console-runner {config.console_runner} needs "
+            "--matomo-container-name (or MATOMO_CONTAINER_NAME)"
+        )
+    if config.console_runner == RUNNER_KUBECTL:
+        return KubectlExecRunner(config.matomo_container_name, config.console_path)
+    return DockerExecRunner(config.matomo_container_name, config.console_path)
+
+
+class ConsoleInstaller(Installer):
+    """
+    Installs Matomo with its console (`matomo:install` of the ExtraTools
+    plugin) through a `CommandRunner`: no browser and no installer HTTP
+    round trips, and PHP CLI instead of php-fpm request limits. The plugin
+    takes the database settings from the Matomo container itself.
+
+    Without the console or the command, the installation is handed to
+    `fallback` (if given). The superuser password reaches the command through
+    its environment (`PASSWORD_ENV`), never through a command line.
+    """
+
+    def __init__(
+        self,
+        runner: CommandRunner,
+        *,
+        fallback: Installer | None = None,
+        timeout_s: float = CONSOLE_INSTALL_TIMEOUT_S,
+        probe: Callable[..., ProbeResult] = probe_url,
+    ):
+        self.runner = runner
+        self.fallback = fallback
+        self.timeout_s = timeout_s
+        self._probe = probe
+
+    def install_args(self, config: Config) -> list[str]:
+        return [
+            INSTALL_COMMAND,
+            "--no-interaction",
+            f"--first-user={config.admin_user}",
+            f"--first-user-email={config.admin_email}",
+            f"--first-site-name={DEFAULT_SITE_NAME}",
+            f"--first-site-url={DEFAULT_SITE_URL}",
+        ]
+
+    def install_env(self, config: Config) -> dict[str, str]:
+        return {PASSWORD_ENV: config.admin_password}
+
+    def ensure_installed(
+        self,
+        config: Config,
+        state: ProbeResult | None = None,
+        deadline: Deadline | None = None,
+    ) -> ProbeResult:
+        base_url = config.base_url
+        deadline = deadline or Deadline()
+
+        if state is None or state.state == UNREACHABLE:
+            with deadline.phase("install:wait-http"):
+                wait_http(base_url, deadline=deadline)
+            with deadline.phase("install:probe"):
+                state = self._probe(base_url, timeout=deadline.clamp(5))
+        _log(f"[install] Instance state: {state.label}")
+
+        if state.installed:
+            _log("[install] Matomo already looks installed. Skipping installer.")
+            return state
+
+        try:
+            with deadline.phase("install:console-check"):
+                self._check_available(deadline)
+        except ConsoleUnavailableError as exc:
+            if self.fallback is None:
+                raise
+            _log(f"[install] {exc}; falling back to {type(self.fallback).__name__}.")
+            return self.fallback.ensure_installed(
+                config, state=state, deadline=deadline
+            )
+
+        with deadline.phase("install:console"):
+            self._run(
+                self.install_args(config),
+                self.timeout_s,
+                deadline,
+                env=self.install_env(config),
+            )
+
+        state = self._probe(base_url, timeout=deadline.clamp(5))
+        if not state.installed:
+            raise BootstrapError(
+                f"Console installation finished but Matomo is not installed "
+                f"({state.label})."
+            )
+        _log("[install] Installation finished.")
+        return state
+
+    def _check_available(self, deadline: Deadline) -> None:
+        result = self.runner.run(
+            ["help", INSTALL_COMMAND, "--no-interaction"],
+            timeout=deadline.clamp(CONSOLE_CHECK_TIMEOUT_S),
+        )
+        if result.returncode != 0:
+            detail = result.output[-1] if result.output else "no output"
+            raise ConsoleUnavailableError(
+                f"Matomo console has no {INSTALL_COMMAND} command "
+                f"(exit {result.returncode}: {detail})"
+            )
+
+    def _run(
+        self,
+        args: list[str],
+        timeout_s: float,
+        deadline: Deadline,
+        *,
+        env: Mapping[str, str] | None = None,
+    ) -> None:
+        _log(
+            f"[install] Running {' '.join(self.runner.command(args, tuple(env or ())))}"
+        )
+        result = self.runner.run(
+            args,
+            timeout=deadline.clamp(timeout_s),
+            on_line=lambda line: _log(f"[console] {line}"),
+            env=env,
+        )
+        if result.returncode != 0:
+            raise ConsoleCommandError(
+                f"{args[0]} failed with exit code {result.returncode}: "
+                + " | ".join(result.output[-5:])
+            )
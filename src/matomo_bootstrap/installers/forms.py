@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import urllib.parse
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+
+# Elements whose text Matomo uses for form validation and system check errors.
+ERROR_CLASSES = frozenset(
+    {
+        "alert-danger",
+        "form-errors",
+        "error",
+        "errorMessage",
+        "system-check-error",
+        "invalid-feedback",
+    }
+)
+
+_VOID_TAGS = frozenset(
+    {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta"}
+)
+_TEXT_INPUT_TYPES = frozenset(
+    {"", "text", "hidden", "password", "email", "url", "number", "search", "tel"}
+)
+
+
+@dataclass
+class HtmlSelect:
+    name: str
+    options: list[tuple[str, str]] = field(default_factory=list)  # (value, label)
+    selected: str | None = None
+
+    @property
+    def value(self) -> str:
+        if self.selected is not None:
+            return self.selected
+        return self.options[0][0] if self.options else ""
+
+    def value_for_label(self, label: str) -> str | None:
+        for value, text in self.options:
+            if text == label:
+                return value
+        return None
+
+
+@dataclass
+class HtmlForm:
+    """A form as the browser would submit it without any user input."""
+
+    id: str
+    action: str
+    method: str
+    fields: list[tuple[str, str]] = field(default_factory=list)
+    selects: dict[str, HtmlSelect] = field(default_factory=dict)
+    submit: tuple[str, str] | None = None  # first named submit button
+    has_submit: bool = False
+
+    def has_field(self, name: str) -> bool:
+        return name in self.selects or any(key == name for key, _ in self.fields)
+
+    def values(self, overrides: dict[str, str] | None = None) -> dict[str, str]:
+        """
+        Default values of all controls (hidden nonces included), then
+        `overrides`. Fields a form repeats keep their last value.
+        """
+        data = dict(self.fields)
+        data.update((name, select.value) for name, select in self.selects.items())
+        if self.submit is not None:
+            data.setdefault(*self.submit)
+        data.update(overrides or {})
+        return data
+
+
+@dataclass
+class HtmlLink:
+    href: str
+    text: str
+    id: str = ""
+
+
+@dataclass
+class HtmlPage:
+    url: str
+    forms: list[HtmlForm] = field(default_factory=list)
+    links: list[HtmlLink] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+    title: str = ""
+
+    def form(self, *ids: str, action: str | None = None) -> HtmlForm | None:
+        """First form with one of `ids`, or whose action mentions `action`."""
+        for form in self.forms:
+            if form.id in ids:
+                return form
+            if action and f"action={action}" in form.action:
+                return form
+        return None
+
+    def absolute(self, href: str) -> str:
+        return urllib.parse.urljoin(self.url, href)
+
+
+class _PageParser(HTMLParser):
+    def __init__(self, url: str):
+        super().__init__(convert_charrefs=True)
+        self.page = HtmlPage(url=url)
+        self._form: HtmlForm | None = None
+        self._select: HtmlSelect | None = None
+        self._option: tuple[str, bool] | None = None  # (value, selected)
+        self._option_text: list[str] = []
+        self._option_has_value = False
+        self._textarea: str | None = None
+        self._textarea_text: list[str] = []
+        self._link: HtmlLink | None = None
+        self._link_text: list[str] = []
+        self._in_title = False
+        # Open elements as (tag, is an error container).
+        self._stack: list[tuple[str, bool]] = []
+        self._error_text: list[str] = []
+
+    # -- structure ---------------------------------------------------------
+
+    def handle_starttag(self, tag, attrs) -> None:
+        attrs = {key: value or "" for key, value in attrs}
+        if tag not in _VOID_TAGS:
+            is_error = bool(ERROR_CLASSES.intersection(attrs.get("class", "").split()))
+            self._stack.append((tag, is_error))
+
+        if tag == "title":
+            self._in_title = True
+        elif tag == "form":
+            self._form = HtmlForm(
+                id=attrs.get("id", ""),
+                action=self.page.absolute(attrs.get("action", "")),
+                method=(attrs.get("method") or "get").upper(),
+            )
+            self.page.forms.append(self._form)
+        elif tag == "a" and attrs.get("href"):
+            self._link = HtmlLink(href=attrs["href"], text="", id=attrs.get("id", ""))
+            self._link_text = []
+        elif self._form is not None:
+            self._form_control(tag, attrs)
+
+    def handle_startendtag(self, tag, attrs) -> None:
+        self.handle_starttag(tag, attrs)
+        if tag not in _VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag) -> None:
+        if tag == "title":
+            self._in_title = False
+        elif tag == "form":
+            self._form = None
+        elif tag == "a" and self._link is not None:
+            self._link.text = " ".join("".join(self._link_text).split())
+            self.page.links.append(self._link)
+            self._link = None
+        elif tag == "option":
+            self._close_option()
+        elif tag == "select":
+            self._close_option()
+            self._select = None
+        elif tag == "textarea" and self._textarea is not None and self._form:
+            self._form.fields.append((self._textarea, "".join(self._textarea_text)))
+            self._textarea = None
+
+        if not any(open_tag == tag for open_tag, _ in self._stack):
+            return  # stray end tag
+        while self._stack:
+            open_tag, is_error = self._stack.pop()
+            if is_error and not any(error for _, error in self._stack):
+                self._flush_error()
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data) -> None:
+        if self._in_title:
+            self.page.title += data
+        if self._link is not None:
+            self._link_text.append(data)
+        if self._option is not None:
+            self._option_text.append(data)
+        if self._textarea is not None:
+            self._textarea_text.append(data)
+        if any(is_error for _, is_error in self._stack):
+            self._error_text.append(data)
+
+    def close(self) -> None:
+        super().close()
+        self._flush_error()
+        self.page.title = " ".join(self.page.title.split())
+
+    # -- forms -------------------------------------------------------------
+
+    def _form_control(self, tag: str, attrs: dict[str, str]) -> None:
+        form = self._form
+        name = attrs.get("name", "")
+        disabled = "disabled" in attrs
+        if tag == "input":
+            kind = attrs.get("type", "").lower()
+            if kind in ("submit", "image"):
+                form.has_submit = True
+                if name and form.submit is None and not disabled:
+                    form.submit = (name, attrs.get("value", ""))
+            elif not name or disabled:
+                return
+            elif kind in ("checkbox", "radio"):
+                if "checked" in attrs:
+                    form.fields.append((name, attrs.get("value") or "on"))
+            elif kind in _TEXT_INPUT_TYPES:
+                form.fields.append((name, attrs.get("value", "")))
+        elif tag == "button":
+            if attrs.get("type", "submit").lower() == "submit":
+                form.has_submit = True
+                if name and form.submit is None and not disabled:
+                    form.submit = (name, attrs.get("value", ""))
+        elif tag == "select" and name and not disabled:
+            self._select = HtmlSelect(name=name)
+            form.selects[name] = self._select
+        elif tag == "option" and self._select is not None:
+            self._close_option()
+            self._option = (attrs.get("value", ""), "selected" in attrs)
+            self._option_has_value = "value" in attrs
+            self._option_text = []
+        elif tag == "textarea" and name and not disabled:
+            self._textarea = name
+            self._textarea_text = []
+
+    def _close_option(self) -> None:
+        if self._option is None or self._select is None:
+            self._option = None
+            return
+        value, selected = self._option
+        label = " ".join("".join(self._option_text).split())
+        if not self._option_has_value:
+            value = label
+        self._select.options.append((value, label))
+        if selected:
+            self._select.selected = value
+        self._option = None
+
+    def _flush_error(self) -> None:
+        text = " ".join("".join(self._error_text).split())
+        if text and text not in self.page.errors:
+            self.page.errors.append(text)
+        self._error_text = []
+
+
+def parse_page(html: str, url: str) -> HtmlPage:
+    """Forms, links, title and error messages of an HTML page."""
+    parser = _PageParser(url)
+    parser.feed(html)
+    parser.close()
+    return parser.page
@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import sys
+import urllib.parse
+
+from .base import Installer
+from .forms import HtmlForm, HtmlPage, parse_page
+from .web import (
+    DEFAULT_ECOMMERCE,
+    DEFAULT_SITE_NAME,
+    DEFAULT_SITE_URL,
+    DEFAULT_TIMEZONE,
+    INSTALLER_TABLES_CREATION_TIMEOUT_S,
+    NEXT_BUTTON_CANDIDATES,
+    wait_http,
+)
+from ..config import Config
+from ..deadline import Deadline
+from ..errors import BootstrapError
+from ..http import HttpClient
+from ..probe import INSTALLER, UNREACHABLE, ProbeResult, classify, probe_url
+from ..retry import RetryPolicy
+
+# Steps of Matomo's Installation controller, in order.
+INSTALLER_STEPS = (
+    "welcome",
+    "systemCheck",
+    "databaseSetup",
+    "tablesCreation",
+    "reuseTables",
+    "setupSuperUser",
+    "firstWebsiteSetup",
+    "trackingCode",
+    "finished",
+)
+# Upper bound of pages one installation may take (each step plus retries).
+MAX_INSTALLER_PAGES = 30
+
+_NEXT_LABELS = tuple(
+    dict.fromkeys(name.rstrip(" »").lower() for _, name in NEXT_BUTTON_CANDIDATES)
+)
+
+
+def _log(msg: str) -> None:
+    print(msg, file=sys.stderr)
+
+
+class UnknownInstallerPage(BootstrapError):
+    """The HTTP installer met a page it does not know how to advance."""
+
+
+class InstallerFormError(BootstrapError):
+    """Matomo rejected a submitted installer form (validation errors)."""
+
+
+def _url_step(url: str) -> str:
+    query = urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)
+    return (query.get("action") or ["welcome"])[0]
+
+
+def _step(page: HtmlPage) -> str:
+    return _url_step(page.url)
+
+
+def _creates_tables(method: str, url: str) -> bool:
+    """tablesCreation creates all tables within a single request; posting
+    databaseSetup redirects straight into it."""
+    step = _url_step(url)
+    return step == "tablesCreation" or (method == "POST" and step == "databaseSetup")
+
+
+def _next_link(page: HtmlPage) -> str | None:
+    for link in page.links:
+        href = link.href.strip()
+        if not href or href.startswith(("#", "javascript:")):
+            continue
+        if link.text.rstrip(" »").lower().startswith(_NEXT_LABELS):
+            return page.absolute(href)
+    return None
+
+
+def _erase_tables_link(page: HtmlPage) -> str | None:
+    for link in page.links:
+        if link.id == "eraseAllTables" or "deleteTables=1" in link.href:
+            return page.absolute(link.href)
+    return None
+
+
+def _describe(page: HtmlPage) -> str:
+    return f"url={page.url}, step={_step(page)}, title={page.title!r}"
+
+
+class HttpInstaller(Installer):
+    """
+    Drives Matomo's web installer (systemCheck, databaseSetup, tablesCreation,
+    setupSuperUser, firstWebsiteSetup, trackingCode, finished) with plain
+    form GETs and POSTs instead of a browser.
+
+    Forms are submitted with every default value they render (hidden nonces
+    included) plus the values we fill in; redirects and the session cookie
+    are handled by `HttpClient`. A page it cannot advance raises
+    `UnknownInstallerPage`, and the installation is handed to `fallback`
+    (usually the `WebInstaller`) if one is given. Forms Matomo rejects raise
+    `InstallerFormError` with the messages shown on the page.
+    """
+
+    def __init__(self, *, fallback: Installer | None = None):
+        self.fallback = fallback
+
+    def ensure_installed(
+        self,
+        config: Config,
+        state: ProbeResult | None = None,
+        deadline: Deadline | None = None,
+    ) -> ProbeResult:
+        base_url = config.base_url
+        deadline = deadline or Deadline()
+
+        if state is None or state.state == UNREACHABLE:
+            with deadline.phase("install:wait-http"):
+                wait_http(base_url, deadline=deadline)
+            with deadline.phase("install:probe"):
+                state = probe_url(base_url, timeout=deadline.clamp(5))
+        _log(f"[install] Instance state: {state.label}")
+
+        if state.installed:
+            _log("[install] Matomo already looks installed. Skipping installer.")
+            return state
+
+        try:
+            with deadline.phase("install:http-installer"):
+                state = self._drive_installer(config, deadline)
+        except UnknownInstallerPage as exc:
+            if self.fallback is None:
+                raise
+            _log(f"[install] {exc}; falling back to {type(self.fallback).__name__}.")
+            state = probe_url(base_url, timeout=deadline.clamp(5))
+            return self.fallback.ensure_installed(
+                config, state=state, deadline=deadline
+            )
+
+        _log("[install] Installation finished.")
+        return state
+
+    def _drive_installer(self, config: Config, deadline: Deadline) -> ProbeResult:
+        _log("[install] Running Matomo web installer over plain HTTP...")
+        with HttpClient(
+            config.base_url,
+            timeout=config.timeout,
+            debug=config.debug,
+            retry_policy=RetryPolicy(max_attempts=config.retries + 1),
+            deadline=deadline,
+        ) as client:
+            page, result = _fetch(client, "GET", client.base_url + "/")
+            for _ in range(MAX_INSTALLER_PAGES):
+                if result.installed:
+                    return probe_url(config.base_url, timeout=deadline.clamp(5))
+                if result.state != INSTALLER:
+                    detail = "; ".join(page.errors) or result.error or result.label
+                    raise UnknownInstallerPage(
+                        f"Unexpected page during installation: {detail} "
+                        f"({_describe(page)})"
+                    )
+                before = _step(page)
+                page, result = self._advance(client, page, config)
+                _log(f"[install] step {before} -> {_step(page)}")
+        raise UnknownInstallerPage(
+            f"Installer did not finish within {MAX_INSTALLER_PAGES} pages "
+            f"({_describe(page)})"
+        )
+
+    def _advance(
+        self, client: HttpClient, page: HtmlPage, config: Config
+    ) -> tuple[HtmlPage, ProbeResult]:
+        """Take the one action the installer page asks for."""
+        form = page.form("generalsetupform", action="setupSuperUser")
+        if form is not None:
+            values = {
+                "login": config.admin_user,
+                "password": config.admin_password,
+                "email": config.admin_email,
+            }
+            if form.has_field("password_bis"):
+                values["password_bis"] = config.admin_password
+            return _submit(client, form, values, label="superuser")
+
+        form = page.form("websitesetupform", action="firstWebsiteSetup")
+        if form is not None:
+            values = {"siteName": DEFAULT_SITE_NAME, "url": DEFAULT_SITE_URL}
+            for name, label in (
+                ("timezone", DEFAULT_TIMEZONE),
+                ("ecommerce", DEFAULT_ECOMMERCE),
+            ):
+                select = form.selects.get(name)
+                value = select.value_for_label(label) if select else None
+                if value is not None:
+                    values[name] = value
+                else:
+                    _log(f"[install] No {name} option {label!r}; keeping the default.")
+            return _submit(client, form, values, label="first website")
+
+        erase = _erase_tables_link(page) if _step(page) == "tablesCreation" else None
+        if erase is not None:
+            _log("[install] Detected existing tables during tablesCreation; erasing.")
+            page, result = _fetch(client, "GET", erase)
+            if _erase_tables_link(page) is not None:
+                raise BootstrapError(
+                    "Detected existing Matomo tables but cleanup did not complete "
+                    f"({_describe(page)})."
+                )
+            return page, result
+
+        link = _next_link(page)
+        if link is not None:
+            return _fetch(client, "GET", link)
+
+        if _step(page) in INSTALLER_STEPS:
+            # databaseSetup, finished: submit what the installer pre-filled.
+            for form in page.forms:
+                if form.has_submit and "module=Login" not in form.action:
+                    return _submit(client, form, {}, label=form.id or _step(page))
+
+        raise UnknownInstallerPage(
+            f"Don't know how to advance the installer page ({_describe(page)})"
+        )
+
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _origin(parts: urllib.parse.SplitResult) -> tuple[str, str, int | None]:
+    scheme = parts.scheme.lower()
+    return scheme, (parts.hostname or ""), parts.port or _DEFAULT_PORTS.get(scheme)
+
+
+def _instance_path(base_url: str, url: str) -> str | None:
+    """Path (and query) of `url` below `base_url`; None if it points elsewhere."""
+    base, target = urllib.parse.urlsplit(base_url), urllib.parse.urlsplit(url)
+    if _origin(base) != _origin(target):
+        return None
+    prefix = base.path.rstrip("/")
+    path = target.path or "/"
+    if prefix and path != prefix and not path.startswith(prefix + "/"):
+        return None
+    path = path[len(prefix) :] or "/"
+    return f"{path}?{target.query}" if target.query else path
+
+
+def _fetch(
+    client: HttpClient, method: str, url: str, data: dict[str, str] | None = None
+) -> tuple[HtmlPage, ProbeResult]:
+    path = _instance_path(client.base_url, url)
+    if path is None:
+        raise UnknownInstallerPage(f"Installer links outside the instance: {url}")
+    timeout = None
+    if _creates_tables(method, url):
+        timeout = max(client.timeout, INSTALLER_TABLES_CREATION_TIMEOUT_S)
+    with client.stream(method, path, data=data, timeout=timeout) as resp:
+        html = resp.text()
+        status, final_url = resp.status, resp.url
+    return parse_page(html, final_url), classify(status, html.lower(), final_url)
+
+
+def _submit(
+    client: HttpClient, form: HtmlForm, values: dict[str, str], *, label: str
+) -> tuple[HtmlPage, ProbeResult]:
+    """Submit `form` with `values`; a form that comes back was rejected."""
+    data = form.values(values)
+    if form.method == "POST":
+        page, result = _fetch(client, "POST", form.action, data)
+    else:
+        action = form.action.split("#", 1)[0]
+        query = urllib.parse.urlsplit(action).query
+        merged = urllib.parse.urlencode(
+            urllib.parse.parse_qsl(query, keep_blank_values=True) + list(data.items())
+        )
+        page, result = _fetch(client, "GET", action.split("?", 1)[0] + "?" + merged)
+    if any((other.id, other.action) == (form.id, form.action) for other in page.forms):
+        raise InstallerFormError(
+            f"Matomo rejected the {label} form: "
+            f"{'; '.join(page.errors) or 'no error message shown'} "
+            f"({_describe(page)})"
+        )
+    return page, result
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import os
+import sys
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable
+
+from .base import Installer
+from ..config import Config
+from ..deadline import Deadline
+from ..paths import temp_dir, url_key
+from ..polling import Backoff
+from ..probe import ProbeResult, probe_url
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None
+
+INSTALL_LOCK_FILE = "file"
+
+
+def _log(msg: str) -> None:
+    print(msg, file=sys.stderr)
+
+
+class InstallLock(ABC):
+    """Keeps concurrent bootstrap runs from driving one installer at once."""
+
+    @abstractmethod
+    def acquire(self, deadline: Deadline) -> bool:
+        """
+        Block until this run may install, at most until `deadline` runs out
+        (DeadlineExceededError). Returns True if another run had to be
+        waited for, i.e. the instance may have changed meanwhile.
+        """
+        raise NotImplementedError
+
+    def release(self) -> None:
+        return None
+
+
+class FileInstallLock(InstallLock):
+    """
+    Exclusive flock on `<lock dir>/<base URL key>.install.lock`: serialises
+    runs on the same host (or sharing the lock directory).
+    """
+
+    def __init__(self, base_url: str, directory: str | os.PathLike | None = None):
+        self.directory = (
+            Path(directory).expanduser() if directory else temp_dir("locks")
+        )
+        self.path = self.directory / f"{url_key(base_url)}.install.lock"
+        self._fd: int | None = None
+
+    def acquire(self, deadline: Deadline) -> bool:
+        if fcntl is None:
+            return False
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o600)
+        backoff = Backoff(initial_s=0.1, max_s=2.0)
+        waiting = False
+        try:
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if not waiting:
+                        _log(
+                            "[install] Another bootstrap run holds the install lock "
+                            f"({self.path}); waiting..."
+                        )
+                        waiting = True
+                    time.sleep(deadline.clamp(backoff.next()))
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+        return waiting
+
+    def release(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)  # releases the flock
+            self._fd = None
+
+
+class NoInstallLock(InstallLock):
+    """`--install-lock none`: runs never wait for each other."""
+
+    def acquire(self, deadline: Deadline) -> bool:
+        return False
+
+
+def build_install_lock(config: Config) -> InstallLock:
+    if INSTALL_LOCK_FILE in config.install_lock:
+        return FileInstallLock(config.base_url, config.lock_dir)
+    return NoInstallLock()
+
+
+class LockedInstaller(Installer):
+    """
+    Runs another installer under an `InstallLock`. An instance that is
+    already installed is passed through without locking; after waiting for
+    the lock the instance is probed again, so a run that waited for another
+    one reuses its result instead of installing a second time.
+    """
+
+    def __init__(
+        self,
+        inner: Installer,
+        lock: InstallLock,
+        *,
+        probe: Callable[..., ProbeResult] = probe_url,
+    ):
+        self.inner = inner
+        self.lock = lock
+        self._probe = probe
+
+    def ensure_installed(
+        self,
+        config: Config,
+        state: ProbeResult | None = None,
+        deadline: Deadline | None = None,
+    ) -> ProbeResult:
+        deadline = deadline or Deadline()
+        if state is not None and state.installed:
+            return self.inner.ensure_installed(config, state=state, deadline=deadline)
+
+        with deadline.phase("install:lock"):
+            waited = self.lock.acquire(deadline)
+        try:
+            if waited:
+                # Whoever held the lock may have installed it meanwhile.
+                state = self._probe(config.base_url, timeout=deadline.clamp(5))
+            return self.inner.ensure_installed(config, state=state, deadline=deadline)
+        finally:
+            self.lock.release()
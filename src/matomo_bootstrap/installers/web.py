@@ -3,12 +3,21 @@ from __future__ import annotations
 import os
 import sys
 import time
-import urllib.error
 import urllib.parse
-import urllib.request
+import weakref
+from dataclasses import dataclass
+from typing import Callable
 
 from .base import Installer
+from .browser import BrowserLauncher, BrowserWorker, launch_chromium
 from ..config import Config
+from ..deadline import Deadline
+from ..errors import BootstrapError
+from ..http import HttpClient
+from ..polling import wait_reachable
+from ..probe import UNREACHABLE, ProbeResult, probe_url
+from ..retry import NO_RETRY
+from ..uds import is_unix_base_url
 
 
 # Optional knobs (mostly for debugging / CI stability)
@@ -18,6 +27,12 @@ PLAYWRIGHT_HEADLESS = os.environ.get("MATOMO_PLAYWRIGHT_HEADLESS", "1").strip()
     "False",
 )
 PLAYWRIGHT_SLOWMO_MS = int(os.environ.get("MATOMO_PLAYWRIGHT_SLOWMO_MS", "0"))
+# Launch Chromium while still waiting for Matomo to become reachable.
+PLAYWRIGHT_PREWARM = os.environ.get("MATOMO_PLAYWRIGHT_PREWARM", "1").strip() not in (
+    "0",
+    "false",
+    "False",
+)
 PLAYWRIGHT_NAV_TIMEOUT_MS = int(
     os.environ.get("MATOMO_PLAYWRIGHT_NAV_TIMEOUT_MS", "60000")
 )
@@ -37,6 +52,10 @@ INSTALLER_TABLES_ERASE_TIMEOUT_S = int(
 INSTALLER_SUPERUSER_RELOAD_INTERVAL_S = int(
     os.environ.get("MATOMO_INSTALLER_SUPERUSER_RELOAD_INTERVAL_S", "30")
 )
+# Re-check a page that showed no warnings at most this often (same URL).
+INSTALLER_WARNINGS_INTERVAL_S = float(
+    os.environ.get("MATOMO_INSTALLER_WARNINGS_INTERVAL_S", "2")
+)
 INSTALLER_DEBUG_DIR = os.environ.get(
     "MATOMO_INSTALLER_DEBUG_DIR", "/tmp/matomo-bootstrap"
 ).rstrip("/")
@@ -152,15 +171,124 @@ def _count_locator(
             raise
 
 
-def _page_warnings(page, *, prefix: str = "[install]") -> list[str]:
+WARNING_SELECTORS = (
+    # your originals
+    ".warning",
+    ".alert.alert-danger",
+    ".alert.alert-warning",
+    ".notification",
+    ".message_container",
+    # common Matomo / UI patterns seen across versions
+    "#notificationContainer",
+    ".system-check-error",
+    ".system-check-warning",
+    ".form-errors",
+    ".error",
+    ".errorMessage",
+    ".invalid-feedback",
+    ".help-block.error",
+    ".ui-state-error",
+    ".alert-danger",
+    ".alert-warning",
+    "[role='alert']",
+)
+_WARNINGS_PER_SELECTOR = 50  # avoid insane spam if page is weird
+
+# One round trip for all of `_page_warnings`: a single querySelector decides
+# whether anything looks wrong; only then are the texts collected.
+_WARNINGS_SCRIPT = """
+([selectors, perSelector]) => {
+    const usable = selectors.filter((selector) => {
+        try {
+            document.querySelector(selector);
+            return true;
+        } catch (e) {
+            return false;
+        }
+    });
+    const result = {
+        url: window.location.href,
+        title: document.title,
+        texts: [],
+        invalid: document.querySelectorAll("[aria-invalid='true']").length,
+    };
+    if (!usable.length || !document.querySelector(usable.join(", "))) {
+        return result;
+    }
+    const seen = new Set();
+    for (const selector of usable) {
+        const matches = document.querySelectorAll(selector);
+        for (let i = 0; i < Math.min(matches.length, perSelector); i++) {
+            const text = (matches[i].innerText || "").trim();
+            if (text && !seen.has(text)) {
+                seen.add(text);
+                result.texts.push(text);
+            }
+        }
+    }
+    return result;
+}
+"""
+
+
+class WarningSampler:
     """
-    Detect Matomo installer warnings/errors on the current page.
-
-    - Does NOT change any click logic.
-    - Prints found warnings/errors to stderr (stdout stays clean).
-    - Returns a de-duplicated list of warning/error texts (empty if none found).
+    Rate limit for `_page_warnings`: a page that showed no warnings at its
+    current URL is only checked again after `interval_s`. A new URL, and a
+    page that showed warnings last time, are always checked.
     """
 
+    def __init__(
+        self,
+        interval_s: float = INSTALLER_WARNINGS_INTERVAL_S,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.interval_s = interval_s
+        self._clock = clock
+        # page -> (url, checked at, clean)
+        self._last: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def due(self, page, url: str) -> bool:
+        try:
+            last = self._last.get(page)
+        except TypeError:  # not weak-referenceable: always check
+            return True
+        if last is None:
+            return True
+        last_url, checked_at, clean = last
+        return (
+            not clean
+            or url != last_url
+            or self._clock() - checked_at >= self.interval_s
+        )
+
+    def record(self, page, url: str, clean: bool) -> None:
+        try:
+            self._last[page] = (url, self._clock(), clean)
+        except TypeError:
+            pass
+
+
+_WARNING_SAMPLER = WarningSampler()
+
+
+def _collect_warnings_in_page(page) -> tuple[str, str, list[str]] | None:
+    try:
+        data = page.evaluate(
+            _WARNINGS_SCRIPT, [list(WARNING_SELECTORS), _WARNINGS_PER_SELECTOR]
+        )
+    except Exception:
+        return None
+    if not isinstance(data, dict):
+        return None
+    texts = [str(text).strip() for text in data.get("texts") or []]
+    invalid = int(data.get("invalid") or 0)
+    if invalid > 0:
+        texts.append(f"{invalid} field(s) marked aria-invalid=true.")
+    return str(data.get("url") or ""), str(data.get("title") or ""), texts
+
+
+def _collect_warnings_via_locators(page) -> tuple[str, str, list[str]]:
     def _safe(s: str | None) -> str:
         return (s or "").strip()
 
@@ -174,31 +302,9 @@ def _page_warnings(page, *, prefix: str = "[install]") -> list[str]:
     except Exception:
         title = "<unknown-title>"
 
-    selectors = [
-        # your originals
-        ".warning",
-        ".alert.alert-danger",
-        ".alert.alert-warning",
-        ".notification",
-        ".message_container",
-        # common Matomo / UI patterns seen across versions
-        "#notificationContainer",
-        ".system-check-error",
-        ".system-check-warning",
-        ".form-errors",
-        ".error",
-        ".errorMessage",
-        ".invalid-feedback",
-        ".help-block.error",
-        ".ui-state-error",
-        ".alert-danger",
-        ".alert-warning",
-        "[role='alert']",
-    ]
-
     texts: list[str] = []
 
-    for sel in selectors:
+    for sel in WARNING_SELECTORS:
         loc = page.locator(sel)
         try:
             n = loc.count()
@@ -208,7 +314,7 @@ def _page_warnings(page, *, prefix: str = "[install]") -> list[str]:
             continue
 
         # collect all matches (not only .first)
-        for i in range(min(n, 50)):  # avoid insane spam if page is weird
+        for i in range(min(n, _WARNINGS_PER_SELECTOR)):
             try:
                 t = _safe(loc.nth(i).inner_text())
             except Exception:
@@ -227,13 +333,43 @@ def _page_warnings(page, *, prefix: str = "[install]") -> list[str]:
     if n_invalid > 0:
         texts.append(f"{n_invalid} field(s) marked aria-invalid=true.")
 
+    return url, title, texts
+
+
+def _page_warnings(
+    page, *, prefix: str = "[install]", force: bool = False
+) -> list[str]:
+    """
+    Detect Matomo installer warnings/errors on the current page.
+
+    - Does NOT change any click logic.
+    - Prints found warnings/errors to stderr (stdout stays clean).
+    - Returns a de-duplicated list of warning/error texts (empty if none found).
+    - Everything is collected with one in-page evaluation (per-selector
+      locators only if that fails). Unless `force`d, a page that looked
+      clean at the same URL a moment ago is not checked again (see
+      `WarningSampler`); that also returns an empty list.
+    """
+    try:
+        current_url = page.url
+    except Exception:
+        current_url = "<unknown-url>"
+    if not force and not _WARNING_SAMPLER.due(page, current_url):
+        return []
+
+    collected = _collect_warnings_in_page(page)
+    if collected is None:
+        collected = _collect_warnings_via_locators(page)
+    url, title, texts = collected
+
     # De-duplicate while preserving order
     seen: set[str] = set()
     out: list[str] = []
     for t in texts:
-        if t not in seen:
+        if t and t not in seen:
             seen.add(t)
             out.append(t)
+    _WARNING_SAMPLER.record(page, current_url, clean=not out)
 
     if out:
         print(
@@ -325,56 +461,151 @@ def _dump_failure_artifacts(page, reason: str) -> None:
     _log(f"[install]   meta: {meta_path}")
 
 
-def _first_next_locator(page):
-    for role, name in NEXT_BUTTON_CANDIDATES:
-        loc = page.get_by_role(role, name=name)
-        try:
-            if _count_locator(loc) > 0 and loc.first.is_visible():
-                return loc.first, f"{role}:{name}"
-        except Exception:
-            continue
+# Candidate tables as labels: "css:<selector>", "<role>:<name>" (like
+# `get_by_role(role, name=name)`) or "text:<text>*" (`get_by_text`, inexact).
+NEXT_LOCATOR_CANDIDATES = tuple(
+    f"{role}:{name}" for role, name in NEXT_BUTTON_CANDIDATES
+) + ("text:Next*",)
+CONTINUE_TO_MATOMO_LOCATOR_CANDIDATES = tuple(
+    f"{role}:{name}" for role, name in CONTINUE_TO_MATOMO_CANDIDATES
+) + ("text:Continue to Matomo*",)
+ERASE_TABLES_LOCATOR_CANDIDATES = (
+    "css:#eraseAllTables",
+    "link:Delete the detected tables »",
+    "button:Delete the detected tables »",
+    "link:Delete the detected tables",
+    "button:Delete the detected tables",
+    "text:Delete the detected tables*",
+)
 
-    text_loc = page.get_by_text("Next", exact=False)
+# In-page helpers shared by the scripts below: `matchesLabel(el, label)` applies
+# the matching rules of the locators built by `_candidate_locator`.
+_CANDIDATE_JS = """
+    const norm = (text) => (text || "").replace(/\\s+/g, " ").trim().toLowerCase();
+    const roleSelectors = {
+        link: "a[href], [role='link']",
+        button: "button, input[type='submit'], input[type='button'], "
+            + "input[type='reset'], [role='button']",
+    };
+    const accessibleName = (el) =>
+        el.getAttribute("aria-label") || el.innerText || el.value || "";
+    const splitLabel = (label) => {
+        const split = label.indexOf(":");
+        return [label.slice(0, split), label.slice(split + 1)];
+    };
+    const matchesLabel = (el, label) => {
+        const [kind, value] = splitLabel(label);
+        try {
+            if (kind === "css") return el.matches(value);
+            const name = norm(accessibleName(el));
+            if (kind === "text") return name.includes(norm(value.replace(/\\*$/, "")));
+            return el.matches(roleSelectors[kind] || kind) && name.includes(norm(value));
+        } catch (e) {
+            return false;
+        }
+    };
+"""
+
+# For each element: index of the first candidate label describing it (-1 if
+# none).
+_CANDIDATE_INDEX_SCRIPT = (
+    "(elements, labels) => {"
+    + _CANDIDATE_JS
+    + """
+    return elements.map((el) => labels.findIndex((label) => matchesLabel(el, label)));
+}
+"""
+)
+
+
+def _candidate_locator(page, label: str):
+    kind, _, value = label.partition(":")
+    if kind == "css":
+        return page.locator(value)
+    if kind == "text":
+        return page.get_by_text(value.rstrip("*"), exact=False)
+    return page.get_by_role(kind, name=value)
+
+
+def _locator_for_label(page, label: str, *, visible: bool = False):
+    """
+    Locator of a candidate reported by a snapshot or `_first_candidate`;
+    with `visible`, the first visible match (a hidden duplicate of the
+    control may come earlier in the page).
+    """
+    loc = _candidate_locator(page, label)
+    if visible:
+        loc = loc.locator("visible=true")
+    return loc.first
+
+
+def _compile_candidates(page, labels, *, visible: bool = False):
+    """One locator matching any of the candidate `labels` (Locator.or_)."""
+    combined = None
+    for label in labels:
+        loc = _candidate_locator(page, label)
+        combined = loc if combined is None else combined.or_(loc)
+    if visible:
+        combined = combined.locator("visible=true")
+    return combined
+
+
+def _first_candidate(
+    page, labels, *, visible: bool = False, timeout_s: float = 2.0
+) -> tuple[object | None, str]:
+    """
+    Element matching the highest-priority candidate (earliest in `labels`,
+    then earliest in the document), with the label of that candidate: one
+    count on the compiled locator plus one evaluation over its matches,
+    however many candidates miss.
+
+    If the combined lookup fails (e.g. one selector of the table is not
+    supported, which invalidates the whole selector), the candidates are
+    tried one by one in table order.
+    """
     try:
-        if _count_locator(text_loc) > 0 and text_loc.first.is_visible():
-            return text_loc.first, "text:Next*"
+        combined = _compile_candidates(page, labels, visible=visible)
+        if _count_locator(combined, timeout_s=timeout_s) == 0:
+            return None, ""
+        indexes = combined.evaluate_all(_CANDIDATE_INDEX_SCRIPT, list(labels))
+        ranked = [
+            (index, position)
+            for position, index in enumerate(indexes or [])
+            if isinstance(index, int) and 0 <= index < len(labels)
+        ]
+        if not ranked:
+            return combined.first, f"any of {len(labels)} candidates"
+        index, position = min(ranked)
+        return combined.nth(position), labels[index]
     except Exception:
         pass
 
-    return None, ""
-
-
-def _first_present_css_locator(page, selectors, *, timeout_s: float = 0.2):
-    for selector in selectors:
-        loc = page.locator(selector)
+    for label in labels:
+        loc = _candidate_locator(page, label)
         try:
-            if _count_locator(loc, timeout_s=timeout_s) > 0:
-                return loc.first, f"css:{selector}"
+            if _count_locator(loc, timeout_s=timeout_s) > 0 and (
+                not visible or loc.first.is_visible()
+            ):
+                return loc.first, label
         except Exception:
             continue
     return None, ""
 
 
-def _first_continue_to_matomo_locator(page, *, timeout_s: float = 0.2):
-    for role, name in CONTINUE_TO_MATOMO_CANDIDATES:
-        loc = page.get_by_role(role, name=name)
-        try:
-            if _count_locator(loc, timeout_s=timeout_s) > 0 and loc.first.is_visible():
-                return loc.first, f"{role}:{name}"
-        except Exception:
-            continue
+def _first_next_locator(page):
+    return _first_candidate(page, NEXT_LOCATOR_CANDIDATES, visible=True)
 
-    text_loc = page.get_by_text("Continue to Matomo", exact=False)
-    try:
-        if (
-            _count_locator(text_loc, timeout_s=timeout_s) > 0
-            and text_loc.first.is_visible()
-        ):
-            return text_loc.first, "text:Continue to Matomo*"
-    except Exception:
-        pass
 
-    return None, ""
+def _first_present_css_locator(page, selectors, *, timeout_s: float = 0.2):
+    return _first_candidate(
+        page, tuple(f"css:{selector}" for selector in selectors), timeout_s=timeout_s
+    )
+
+
+def _first_continue_to_matomo_locator(page, *, timeout_s: float = 0.2):
+    return _first_candidate(
+        page, CONTINUE_TO_MATOMO_LOCATOR_CANDIDATES, visible=True, timeout_s=timeout_s
+    )
 
 
 def _has_superuser_login_field(page, *, timeout_s: float = 0.2) -> bool:
@@ -391,12 +622,6 @@ def _has_superuser_form_container(page, *, timeout_s: float = 0.2) -> bool:
     return loc is not None
 
 
-def _superuser_form_ready(page, *, timeout_s: float = 0.2) -> bool:
-    return _has_superuser_login_field(
-        page, timeout_s=timeout_s
-    ) or _has_superuser_form_container(page, timeout_s=timeout_s)
-
-
 def _has_first_website_name_field(page, *, timeout_s: float = 0.2) -> bool:
     loc, _ = _first_present_css_locator(
         page, FIRST_WEBSITE_NAME_SELECTORS, timeout_s=timeout_s
@@ -404,16 +629,150 @@ def _has_first_website_name_field(page, *, timeout_s: float = 0.2) -> bool:
     return loc is not None
 
 
-def _has_continue_to_matomo_action(page, *, timeout_s: float = 0.2) -> bool:
-    loc, _ = _first_continue_to_matomo_locator(page, timeout_s=timeout_s)
-    return loc is not None
+@dataclass(frozen=True)
+class PageSnapshot:
+    """
+    What the installer polling loops look at, gathered in one go (see
+    `_page_snapshot`). `next_control` / `continue_to_matomo` name the first
+    matching candidate (e.g. "link:Next »"), empty if none is visible.
+    """
+
+    url: str
+    step: str
+    superuser_login_field: bool = False
+    superuser_form: bool = False
+    first_website_name_field: bool = False
+    continue_to_matomo: str = ""
+    next_control: str = ""
+
+    @property
+    def superuser_form_ready(self) -> bool:
+        return self.superuser_login_field or self.superuser_form
+
+    @property
+    def interactive(self) -> bool:
+        return bool(
+            self.superuser_form_ready
+            or self.first_website_name_field
+            or self.continue_to_matomo
+            or self.next_control
+        )
+
+
+# Mirrors the locator helpers above: CSS candidates only need to be present,
+# next / continue candidates must be visible, the first visible one in table
+# order wins (like `_first_candidate`).
+_SNAPSHOT_SCRIPT = (
+    "([loginSelectors, formSelectors, siteNameSelectors, nextLabels,"
+    " continueLabels]) => {"
+    + _CANDIDATE_JS
+    + """
+    const present = (selectors) => selectors.some((selector) => {
+        try {
+            return document.querySelector(selector) !== null;
+        } catch (e) {
+            return false;
+        }
+    });
+    const visible = (el) => {
+        const style = window.getComputedStyle(el);
+        if (style.visibility === "hidden" || style.display === "none") return false;
+        const rect = el.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0;
+    };
+    const hasText = (text) => {
+        const wanted = norm(text);
+        const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+        while (walker.nextNode()) {
+            const parent = walker.currentNode.parentElement;
+            if (parent && norm(walker.currentNode.nodeValue).includes(wanted)
+                && visible(parent)) {
+                return true;
+            }
+        }
+        return false;
+    };
+    const firstControl = (labels) => labels.find((label) => {
+        const [kind, value] = splitLabel(label);
+        if (kind === "text") {
+            return document.body !== null && hasText(value.replace(/\\*$/, ""));
+        }
+        let elements = [];
+        try {
+            elements = document.querySelectorAll(
+                kind === "css" ? value : roleSelectors[kind] || kind);
+        } catch (e) {
+            return false;
+        }
+        return Array.from(elements).some((el) => matchesLabel(el, label) && visible(el));
+    }) || "";
+    return {
+        url: window.location.href,
+        superuser_login_field: present(loginSelectors),
+        superuser_form: present(formSelectors),
+        first_website_name_field: present(siteNameSelectors),
+        continue_to_matomo: firstControl(continueLabels),
+        next_control: firstControl(nextLabels),
+    };
+}
+"""
+)
+
+
+def _locator_snapshot(page) -> PageSnapshot:
+    """`PageSnapshot` from the locator helpers (one round trip per candidate)."""
+    _, next_label = _first_next_locator(page)
+    _, continue_label = _first_continue_to_matomo_locator(page)
+    url = page.url
+    return PageSnapshot(
+        url=url,
+        step=_get_step_hint(url),
+        superuser_login_field=_has_superuser_login_field(page),
+        superuser_form=_has_superuser_form_container(page),
+        first_website_name_field=_has_first_website_name_field(page),
+        continue_to_matomo=continue_label,
+        next_control=next_label,
+    )
+
+
+def _page_snapshot(page) -> PageSnapshot:
+    """
+    Everything the polling loops check, from a single `page.evaluate`.
+    Falls back to the locator helpers when the evaluation fails (e.g. the
+    page navigated away mid-call).
+    """
+    try:
+        data = page.evaluate(
+            _SNAPSHOT_SCRIPT,
+            [
+                list(SUPERUSER_LOGIN_SELECTORS),
+                list(SUPERUSER_FORM_SELECTORS),
+                list(FIRST_WEBSITE_NAME_SELECTORS),
+                list(NEXT_LOCATOR_CANDIDATES),
+                list(CONTINUE_TO_MATOMO_LOCATOR_CANDIDATES),
+            ],
+        )
+    except Exception:
+        data = None
+    if not isinstance(data, dict):
+        return _locator_snapshot(page)
+    url = str(data.get("url") or page.url)
+    return PageSnapshot(
+        url=url,
+        step=_get_step_hint(url),
+        superuser_login_field=bool(data.get("superuser_login_field")),
+        superuser_form=bool(data.get("superuser_form")),
+        first_website_name_field=bool(data.get("first_website_name_field")),
+        continue_to_matomo=str(data.get("continue_to_matomo") or ""),
+        next_control=str(data.get("next_control") or ""),
+    )
 
 
 def _wait_for_superuser_login_field(
     page, *, timeout_s: float, poll_interval_ms: int = 300
 ) -> bool:
     if timeout_s <= 0:
-        return _superuser_form_ready(page, timeout_s=0.2)
+        return _page_snapshot(page).superuser_form_ready
 
     deadline = time.time() + timeout_s
     last_wait_log_at = 0.0
@@ -421,7 +780,7 @@ def _wait_for_superuser_login_field(
 
     while time.time() < deadline:
         _wait_dom_settled(page)
-        if _superuser_form_ready(page, timeout_s=0.2):
+        if _page_snapshot(page).superuser_form_ready:
             return True
 
         now = time.time()
@@ -439,7 +798,7 @@ def _wait_for_superuser_login_field(
             except Exception as exc:
                 _log(f"[install] setupSuperUser reload attempt failed: {exc}")
             last_reload_at = now
-            if _superuser_form_ready(page, timeout_s=0.2):
+            if _page_snapshot(page).superuser_form_ready:
                 return True
 
         if now - last_wait_log_at >= 5:
@@ -452,7 +811,7 @@ def _wait_for_superuser_login_field(
 
         page.wait_for_timeout(poll_interval_ms)
 
-    return _superuser_form_ready(page, timeout_s=0.2)
+    return _page_snapshot(page).superuser_form_ready
 
 
 def _fill_required_input(page, selectors, value: str, *, label: str) -> None:
@@ -482,14 +841,7 @@ def _fill_optional_input(page, selectors, value: str) -> bool:
 
 
 def _installer_interactive(page) -> bool:
-    checks = [
-        _has_superuser_login_field(page),
-        _has_superuser_form_container(page),
-        _has_first_website_name_field(page),
-        _has_continue_to_matomo_action(page),
-    ]
-    loc, _ = _first_next_locator(page)
-    return any(checks) or loc is not None
+    return _page_snapshot(page).interactive
 
 
 def _submit_superuser_form_via_dom(
@@ -592,7 +944,7 @@ def _wait_for_installer_interactive(page, *, timeout_s: int) -> None:
         page.wait_for_timeout(300)
 
     raise RuntimeError(
-        f"Installer UI did not become interactive within {timeout_s}s "
+        f"Installer UI did not become interactive within {timeout_s:.1f}s "
         f"(url={page.url}, step={_get_step_hint(page.url)})."
     )
 
@@ -603,10 +955,11 @@ def _click_next_with_wait(page, *, timeout_s: int) -> str:
     last_warning_log_at = 0.0
     deadline = time.time() + timeout_s
     while time.time() < deadline:
-        loc, label = _first_next_locator(page)
-        if loc is not None:
+        snapshot = _page_snapshot(page)
+        if snapshot.next_control:
+            label = snapshot.next_control
             try:
-                loc.click(timeout=2_000)
+                _locator_for_label(page, label, visible=True).click(timeout=2_000)
             except Exception:
                 page.wait_for_timeout(250)
                 continue
@@ -620,8 +973,9 @@ def _click_next_with_wait(page, *, timeout_s: int) -> str:
             return after_step
 
         _wait_dom_settled(page)
-        current_url = page.url
-        current_step = _get_step_hint(current_url)
+        snapshot = _page_snapshot(page)
+        current_url = snapshot.url
+        current_step = snapshot.step
         if current_url != before_url or current_step != before_step:
             _log(
                 "[install] Installer progressed without explicit click; "
@@ -632,25 +986,25 @@ def _click_next_with_wait(page, *, timeout_s: int) -> str:
 
         # Some installer transitions render the next form asynchronously without
         # exposing another "Next" control yet. Treat this as progress.
-        if _has_superuser_login_field(page, timeout_s=0.2):
+        if snapshot.superuser_login_field:
             _log(
                 "[install] Superuser form became available without explicit click; "
                 f"staying on step {current_step} (url {current_url})"
             )
             return current_step
-        if _has_superuser_form_container(page, timeout_s=0.2):
+        if snapshot.superuser_form:
             _log(
                 "[install] Superuser form container became available without explicit click; "
                 f"staying on step {current_step} (url {current_url})"
             )
             return current_step
-        if _has_first_website_name_field(page, timeout_s=0.2):
+        if snapshot.first_website_name_field:
             _log(
                 "[install] First website form became available without explicit click; "
                 f"staying on step {current_step} (url {current_url})"
             )
             return current_step
-        if _has_continue_to_matomo_action(page, timeout_s=0.2):
+        if snapshot.continue_to_matomo:
             _log(
                 "[install] Continue-to-Matomo action is available without explicit click; "
                 f"staying on step {current_step} (url {current_url})"
@@ -666,39 +1020,12 @@ def _click_next_with_wait(page, *, timeout_s: int) -> str:
 
     raise RuntimeError(
         "Could not find a Next/Continue control in the installer UI "
-        f"within {timeout_s}s (url={page.url}, step={_get_step_hint(page.url)})."
+        f"within {timeout_s:.1f}s (url={page.url}, step={_get_step_hint(page.url)})."
     )
 
 
 def _first_erase_tables_locator(page):
-    css_loc = page.locator("#eraseAllTables")
-    try:
-        if _count_locator(css_loc) > 0:
-            return css_loc.first, "css:#eraseAllTables"
-    except Exception:
-        pass
-
-    for role, name in [
-        ("link", "Delete the detected tables »"),
-        ("button", "Delete the detected tables »"),
-        ("link", "Delete the detected tables"),
-        ("button", "Delete the detected tables"),
-    ]:
-        loc = page.get_by_role(role, name=name)
-        try:
-            if _count_locator(loc) > 0:
-                return loc.first, f"{role}:{name}"
-        except Exception:
-            continue
-
-    text_loc = page.get_by_text("Delete the detected tables", exact=False)
-    try:
-        if _count_locator(text_loc) > 0:
-            return text_loc.first, "text:Delete the detected tables*"
-    except Exception:
-        pass
-
-    return None, ""
+    return _first_candidate(page, ERASE_TABLES_LOCATOR_CANDIDATES)
 
 
 def _resolve_tables_creation_conflict(page, *, timeout_s: int) -> bool:
@@ -799,329 +1126,391 @@ def _resolve_tables_creation_conflict(page, *, timeout_s: int) -> bool:
 
     raise RuntimeError(
         "Detected existing Matomo tables but cleanup did not complete "
-        f"within {timeout_s}s (url={page.url}, step={_get_step_hint(page.url)})."
+        f"within {timeout_s:.1f}s (url={page.url}, step={_get_step_hint(page.url)})."
     )
 
 
-def wait_http(url: str, timeout: int = 180) -> None:
+def wait_http(url: str, timeout: int = 180, deadline: Deadline | None = None) -> float:
     """
     Consider Matomo 'reachable' as soon as the HTTP server answers - even with 500.
-    urllib raises HTTPError for 4xx/5xx, so we must treat that as reachability too.
+    Polls adaptively (see `polling.wait_reachable`) and returns the measured
+    time-to-reachable in seconds. The wait is clamped to `deadline`.
     """
     _log(f"[install] Waiting for Matomo HTTP at {url} ...")
-    last_err: Exception | None = None
+    next_log = 5.0
+
+    def on_wait(elapsed: float, exc: BaseException) -> None:
+        nonlocal next_log
+        if elapsed >= next_log:
+            next_log += 5.0
+            _log(
+                f"[install] still waiting ({elapsed:.0f}/{timeout}s) … "
+                f"({type(exc).__name__})"
+            )
 
-    for i in range(timeout):
+    with HttpClient(url, timeout=2, retry_policy=NO_RETRY, deadline=deadline) as client:
         try:
-            with urllib.request.urlopen(url, timeout=2) as resp:
-                _ = resp.read(128)
-            _log("[install] Matomo HTTP reachable (2xx/3xx).")
-            return
-        except urllib.error.HTTPError as exc:
-            _log(f"[install] Matomo HTTP reachable (HTTP {exc.code}).")
-            return
-        except Exception as exc:
-            last_err = exc
-            if i % 5 == 0:
-                _log(
-                    f"[install] still waiting ({i}/{timeout}) … ({type(exc).__name__})"
-                )
-            time.sleep(1)
+            reachable = wait_reachable(
+                client, timeout, on_wait=on_wait, deadline=deadline
+            )
+        except TimeoutError as exc:
+            raise RuntimeError(
+                f"Matomo did not become reachable after {timeout}s: {url} "
+                f"({exc.__cause__})"
+            ) from exc
 
-    raise RuntimeError(
-        f"Matomo did not become reachable after {timeout}s: {url} ({last_err})"
+    _log(
+        f"[install] Matomo HTTP reachable (HTTP {reachable.status}) after "
+        f"{reachable.elapsed_s:.2f}s ({reachable.probes} probes)."
     )
+    return reachable.elapsed_s
 
 
 def is_installed(url: str) -> bool:
     """
-    Heuristic:
+    Asks the API first (see `probe.probe_api`); only non-JSON answers fall
+    back to the heuristics of `probe.classify`:
     - installed instances typically render login module links
     - installer renders 'installation' wizard content
     """
-    try:
-        with urllib.request.urlopen(url, timeout=5) as resp:
-            html = resp.read().decode(errors="ignore").lower()
-        return (
-            ("module=login" in html)
-            or ("matomo › login" in html)
-            or ("matomo/login" in html)
-        )
-    except urllib.error.HTTPError as exc:
-        try:
-            html = exc.read().decode(errors="ignore").lower()
-            return (
-                ("module=login" in html)
-                or ("matomo › login" in html)
-                or ("matomo/login" in html)
-            )
-        except Exception:
-            return False
-    except Exception:
-        return False
+    return probe_url(url).installed
+
+
+def _launch_configured_chromium():
+    return launch_chromium(
+        headless=PLAYWRIGHT_HEADLESS,
+        slow_mo=PLAYWRIGHT_SLOWMO_MS if PLAYWRIGHT_SLOWMO_MS > 0 else None,
+    )
 
 
 class WebInstaller(Installer):
-    def ensure_installed(self, config: Config) -> None:
+    def __init__(
+        self,
+        *,
+        prewarm: bool | None = None,
+        launch_browser: BrowserLauncher = _launch_configured_chromium,
+    ):
+        self.prewarm = PLAYWRIGHT_PREWARM if prewarm is None else prewarm
+        self.launch_browser = launch_browser
+
+    def ensure_installed(
+        self,
+        config: Config,
+        state: ProbeResult | None = None,
+        deadline: Deadline | None = None,
+    ) -> ProbeResult:
         """
         Ensure Matomo is installed. NO-OP if already installed.
         Uses Playwright to drive the web installer (recorded flow).
+
+        `state` is an earlier probe of the instance; it is only re-probed when
+        missing or unreachable at that time. Every installer wait is clamped
+        to the remaining `deadline` budget.
+
+        While waiting for an unreachable instance, Chromium is launched in the
+        background (unless `prewarm` is off), so its startup overlaps with the
+        wait; it is shut down again if the instance turns out to be installed.
         """
         base_url = config.base_url
+        deadline = deadline or Deadline()
+        worker: BrowserWorker | None = None
+
+        try:
+            if state is None or state.state == UNREACHABLE:
+                if self.prewarm and not is_unix_base_url(base_url):
+                    worker = BrowserWorker(self.launch_browser)
+                with deadline.phase("install:wait-http"):
+                    wait_http(base_url, deadline=deadline)
+                with deadline.phase("install:probe"):
+                    state = probe_url(base_url, timeout=deadline.clamp(5))
+            _log(f"[install] Instance state: {state.label}")
+
+            if state.installed:
+                _log("[install] Matomo already looks installed. Skipping installer.")
+                if worker is not None:
+                    _log("[install] Shutting down pre-warmed browser.")
+                return state
+
+            if is_unix_base_url(base_url):
+                raise BootstrapError(
+                    f"Matomo at {base_url} is not installed yet and the browser-based "
+                    "installer cannot connect to a Unix socket. Run the installation "
+                    "once over TCP (http(s):// base URL), then use the socket."
+                )
 
-        wait_http(base_url)
+            if worker is None:
+                worker = BrowserWorker(self.launch_browser)
+            elif worker.ready:
+                _log("[install] Using pre-warmed browser.")
 
-        if is_installed(base_url):
-            _log("[install] Matomo already looks installed. Skipping installer.")
-            return
+            with deadline.phase("install:web-installer"):
+                try:
+                    state = worker.run(
+                        lambda browser: self._drive_installer(browser, config, deadline)
+                    )
+                except Exception as exc:
+                    # A wait that was cut short by the budget reports the budget.
+                    if deadline.expired and not isinstance(exc, BootstrapError):
+                        raise deadline.exceeded() from exc
+                    raise
+        finally:
+            if worker is not None:
+                # Tear a launched browser down before returning; only a launch
+                # still in progress (never used) is left to finish on its own.
+                worker.close(wait=worker.ready)
+
+        _log("[install] Installation finished.")
+        return state
 
-        from playwright.sync_api import sync_playwright
+    def _drive_installer(
+        self, browser, config: Config, deadline: Deadline
+    ) -> ProbeResult:
+        base_url = config.base_url
 
         _log("[install] Running Matomo web installer via Playwright (recorded flow)...")
 
-        with sync_playwright() as p:
-            browser = p.chromium.launch(
-                headless=PLAYWRIGHT_HEADLESS,
-                slow_mo=PLAYWRIGHT_SLOWMO_MS if PLAYWRIGHT_SLOWMO_MS > 0 else None,
+        context = browser.new_context()
+        page = context.new_page()
+        nav_timeout_ms = deadline.clamp(PLAYWRIGHT_NAV_TIMEOUT_MS / 1000) * 1000
+        page.set_default_navigation_timeout(nav_timeout_ms)
+        page.set_default_timeout(nav_timeout_ms)
+
+        try:
+            page.goto(base_url, wait_until="domcontentloaded")
+            _wait_for_installer_interactive(
+                page, timeout_s=deadline.clamp(INSTALLER_READY_TIMEOUT_S)
             )
-            context = browser.new_context()
-            page = context.new_page()
-            page.set_default_navigation_timeout(PLAYWRIGHT_NAV_TIMEOUT_MS)
-            page.set_default_timeout(PLAYWRIGHT_NAV_TIMEOUT_MS)
+            _page_warnings(page)
 
-            try:
-                page.goto(base_url, wait_until="domcontentloaded")
-                _wait_for_installer_interactive(
-                    page, timeout_s=INSTALLER_READY_TIMEOUT_S
-                )
-                _page_warnings(page)
+            progress_wait_s = deadline.clamp(INSTALLER_STEP_DEADLINE_S)
+            progress_deadline = time.time() + progress_wait_s
 
-                progress_deadline = time.time() + INSTALLER_STEP_DEADLINE_S
+            while not _page_snapshot(page).superuser_form_ready:
+                now = time.time()
+                if now >= progress_deadline:
+                    raise RuntimeError(
+                        "Installer did not reach superuser form "
+                        f"within {progress_wait_s:.1f}s "
+                        f"(url={page.url}, step={_get_step_hint(page.url)})."
+                    )
 
-                while not _superuser_form_ready(page):
-                    now = time.time()
-                    if now >= progress_deadline:
-                        raise RuntimeError(
-                            "Installer did not reach superuser form "
-                            f"within {INSTALLER_STEP_DEADLINE_S}s "
-                            f"(url={page.url}, step={_get_step_hint(page.url)})."
-                        )
+                current_step = _get_step_hint(page.url)
+                if "setupSuperUser" in current_step:
+                    remaining_s = max(0.0, progress_deadline - now)
+                    if _wait_for_superuser_login_field(page, timeout_s=remaining_s):
+                        break
+                    continue
 
-                    current_step = _get_step_hint(page.url)
-                    if "setupSuperUser" in current_step:
-                        remaining_s = max(0.0, progress_deadline - now)
-                        if _wait_for_superuser_login_field(page, timeout_s=remaining_s):
-                            break
-                        continue
-
-                    if _resolve_tables_creation_conflict(
-                        page, timeout_s=INSTALLER_TABLES_ERASE_TIMEOUT_S
-                    ):
-                        _page_warnings(page)
-                        continue
-                    step_timeout = INSTALLER_STEP_TIMEOUT_S
-                    if "tablesCreation" in _get_step_hint(page.url):
-                        step_timeout = max(
-                            step_timeout, INSTALLER_TABLES_CREATION_TIMEOUT_S
-                        )
-                    _click_next_with_wait(page, timeout_s=step_timeout)
+                erase_timeout_s = deadline.clamp(INSTALLER_TABLES_ERASE_TIMEOUT_S)
+                if _resolve_tables_creation_conflict(page, timeout_s=erase_timeout_s):
                     _page_warnings(page)
+                    continue
+                step_timeout = INSTALLER_STEP_TIMEOUT_S
+                if "tablesCreation" in _get_step_hint(page.url):
+                    step_timeout = max(
+                        step_timeout, INSTALLER_TABLES_CREATION_TIMEOUT_S
+                    )
+                _click_next_with_wait(page, timeout_s=deadline.clamp(step_timeout))
+                _page_warnings(page)
+
+            submitted_superuser = _submit_superuser_form_via_dom(
+                page,
+                user=config.admin_user,
+                password=config.admin_password,
+                email=config.admin_email,
+            )
 
-                submitted_superuser = _submit_superuser_form_via_dom(
+            if submitted_superuser:
+                _wait_dom_settled(page)
+                _log("[install] Submitted superuser form via form.requestSubmit().")
+            else:
+                _fill_required_input(
+                    page,
+                    SUPERUSER_LOGIN_SELECTORS,
+                    config.admin_user,
+                    label="superuser login",
+                )
+                _fill_required_input(
+                    page,
+                    SUPERUSER_PASSWORD_SELECTORS,
+                    config.admin_password,
+                    label="superuser password",
+                )
+                _fill_optional_input(
+                    page, SUPERUSER_PASSWORD_REPEAT_SELECTORS, config.admin_password
+                )
+                _fill_required_input(
                     page,
-                    user=config.admin_user,
-                    password=config.admin_password,
-                    email=config.admin_email,
+                    SUPERUSER_EMAIL_SELECTORS,
+                    config.admin_email,
+                    label="superuser email",
                 )
+                _page_warnings(page)
 
-                if submitted_superuser:
+                submit_loc, submit_label = _first_present_css_locator(
+                    page, SUPERUSER_SUBMIT_SELECTORS, timeout_s=0.5
+                )
+                if submit_loc is not None:
+                    submit_loc.click(timeout=2_000)
                     _wait_dom_settled(page)
-                    _log("[install] Submitted superuser form via form.requestSubmit().")
-                else:
-                    _fill_required_input(
-                        page,
-                        SUPERUSER_LOGIN_SELECTORS,
-                        config.admin_user,
-                        label="superuser login",
-                    )
-                    _fill_required_input(
-                        page,
-                        SUPERUSER_PASSWORD_SELECTORS,
-                        config.admin_password,
-                        label="superuser password",
-                    )
-                    _fill_optional_input(
-                        page, SUPERUSER_PASSWORD_REPEAT_SELECTORS, config.admin_password
-                    )
-                    _fill_required_input(
-                        page,
-                        SUPERUSER_EMAIL_SELECTORS,
-                        config.admin_email,
-                        label="superuser email",
-                    )
-                    _page_warnings(page)
-
-                    submit_loc, submit_label = _first_present_css_locator(
-                        page, SUPERUSER_SUBMIT_SELECTORS, timeout_s=0.5
+                    _log(
+                        "[install] Submitted superuser form via "
+                        f"{submit_label} fallback."
                     )
-                    if submit_loc is not None:
-                        submit_loc.click(timeout=2_000)
-                        _wait_dom_settled(page)
-                        _log(
-                            "[install] Submitted superuser form via "
-                            f"{submit_label} fallback."
-                        )
-                    else:
-                        _click_next_with_wait(page, timeout_s=INSTALLER_STEP_TIMEOUT_S)
-
-                superuser_progress_deadline = time.time() + INSTALLER_STEP_TIMEOUT_S
-                while time.time() < superuser_progress_deadline:
-                    _wait_dom_settled(page)
-                    if not _superuser_form_ready(page):
-                        break
-                    page.wait_for_timeout(300)
-                if _superuser_form_ready(page):
-                    _page_warnings(page)
-                    raise RuntimeError(
-                        "Superuser form submit did not progress to first website setup "
-                        f"within {INSTALLER_STEP_TIMEOUT_S}s "
-                        f"(url={page.url}, step={_get_step_hint(page.url)})."
+                else:
+                    _click_next_with_wait(
+                        page, timeout_s=deadline.clamp(INSTALLER_STEP_TIMEOUT_S)
                     )
 
-                _page_warnings(page)
+            superuser_wait_s = deadline.clamp(INSTALLER_STEP_TIMEOUT_S)
+            superuser_progress_deadline = time.time() + superuser_wait_s
+            while time.time() < superuser_progress_deadline:
+                _wait_dom_settled(page)
+                if not _page_snapshot(page).superuser_form_ready:
+                    break
+                page.wait_for_timeout(300)
+            if _page_snapshot(page).superuser_form_ready:
+                _page_warnings(page, force=True)
+                raise RuntimeError(
+                    "Superuser form submit did not progress to first website setup "
+                    f"within {superuser_wait_s:.1f}s "
+                    f"(url={page.url}, step={_get_step_hint(page.url)})."
+                )
+            _page_warnings(page)
 
-                submitted_first_website = False
-                try:
-                    submitted_first_website = bool(
-                        page.evaluate(
-                            """
-                            ([siteName, siteUrl, timezoneLabel, ecommerceLabel]) => {
-                                const form = document.querySelector("form#websitesetupform");
-                                if (!form) return false;
-
-                                const siteNameInput = form.querySelector("input[name='siteName']");
-                                const siteUrlInput = form.querySelector("input[name='url']");
-                                if (!siteNameInput || !siteUrlInput) return false;
-
-                                siteNameInput.value = siteName;
-                                siteUrlInput.value = siteUrl;
-
-                                const timezoneSelect = form.querySelector("select[name='timezone']");
-                                if (timezoneSelect) {
-                                    const timezoneOption = Array.from(timezoneSelect.options).find(
-                                        (opt) => (opt.textContent || "").trim() === timezoneLabel
-                                    );
-                                    if (timezoneOption) {
-                                        timezoneSelect.value = timezoneOption.value;
-                                    }
+            submitted_first_website = False
+            try:
+                submitted_first_website = bool(
+                    page.evaluate(
+                        """
+                        ([siteName, siteUrl, timezoneLabel, ecommerceLabel]) => {
+                            const form = document.querySelector("form#websitesetupform");
+                            if (!form) return false;
+
+                            const siteNameInput = form.querySelector("input[name='siteName']");
+                            const siteUrlInput = form.querySelector("input[name='url']");
+                            if (!siteNameInput || !siteUrlInput) return false;
+
+                            siteNameInput.value = siteName;
+                            siteUrlInput.value = siteUrl;
+
+                            const timezoneSelect = form.querySelector("select[name='timezone']");
+                            if (timezoneSelect) {
+                                const timezoneOption = Array.from(timezoneSelect.options).find(
+                                    (opt) => (opt.textContent || "").trim() === timezoneLabel
+                                );
+                                if (timezoneOption) {
+                                    timezoneSelect.value = timezoneOption.value;
                                 }
+                            }
 
-                                const ecommerceSelect = form.querySelector("select[name='ecommerce']");
-                                if (ecommerceSelect) {
-                                    const ecommerceOption = Array.from(ecommerceSelect.options).find(
-                                        (opt) => (opt.textContent || "").trim() === ecommerceLabel
-                                    );
-                                    if (ecommerceOption) {
-                                        ecommerceSelect.value = ecommerceOption.value;
-                                    }
+                            const ecommerceSelect = form.querySelector("select[name='ecommerce']");
+                            if (ecommerceSelect) {
+                                const ecommerceOption = Array.from(ecommerceSelect.options).find(
+                                    (opt) => (opt.textContent || "").trim() === ecommerceLabel
+                                );
+                                if (ecommerceOption) {
+                                    ecommerceSelect.value = ecommerceOption.value;
                                 }
+                            }
 
-                                if (typeof form.requestSubmit === "function") {
-                                    form.requestSubmit();
-                                } else {
-                                    form.submit();
-                                }
-                                return true;
+                            if (typeof form.requestSubmit === "function") {
+                                form.requestSubmit();
+                            } else {
+                                form.submit();
                             }
-                            """,
-                            [
-                                DEFAULT_SITE_NAME,
-                                DEFAULT_SITE_URL,
-                                DEFAULT_TIMEZONE,
-                                DEFAULT_ECOMMERCE,
-                            ],
-                        )
+                            return true;
+                        }
+                        """,
+                        [
+                            DEFAULT_SITE_NAME,
+                            DEFAULT_SITE_URL,
+                            DEFAULT_TIMEZONE,
+                            DEFAULT_ECOMMERCE,
+                        ],
                     )
-                except Exception:
-                    submitted_first_website = False
+                )
+            except Exception:
+                submitted_first_website = False
 
-                if submitted_first_website:
-                    _wait_dom_settled(page)
-                    _log(
-                        "[install] Submitted first website form via form.requestSubmit()."
-                    )
-                else:
-                    _fill_optional_input(
-                        page, FIRST_WEBSITE_NAME_SELECTORS, DEFAULT_SITE_NAME
-                    )
-                    _fill_optional_input(
-                        page, FIRST_WEBSITE_URL_SELECTORS, DEFAULT_SITE_URL
-                    )
+            if submitted_first_website:
+                _wait_dom_settled(page)
+                _log("[install] Submitted first website form via form.requestSubmit().")
+            else:
+                _fill_optional_input(
+                    page, FIRST_WEBSITE_NAME_SELECTORS, DEFAULT_SITE_NAME
+                )
+                _fill_optional_input(
+                    page, FIRST_WEBSITE_URL_SELECTORS, DEFAULT_SITE_URL
+                )
 
-                    _page_warnings(page)
+                _page_warnings(page)
 
-                    try:
-                        comboboxes = page.get_by_role("combobox")
-                        if _count_locator(comboboxes) > 0:
-                            comboboxes.first.click(timeout=2_000)
-                            page.get_by_role("listbox").get_by_text(
-                                DEFAULT_TIMEZONE
-                            ).click(timeout=2_000)
-                    except Exception:
-                        _log("Timezone selection skipped (not found / changed UI).")
-
-                    try:
-                        comboboxes = page.get_by_role("combobox")
-                        if _count_locator(comboboxes) > 2:
-                            comboboxes.nth(2).click(timeout=2_000)
-                            page.get_by_role("listbox").get_by_text(
-                                DEFAULT_ECOMMERCE
-                            ).click(timeout=2_000)
-                    except Exception:
-                        _log("Ecommerce selection skipped (not found / changed UI).")
+                try:
+                    comboboxes = page.get_by_role("combobox")
+                    if _count_locator(comboboxes) > 0:
+                        comboboxes.first.click(timeout=2_000)
+                        page.get_by_role("listbox").get_by_text(DEFAULT_TIMEZONE).click(
+                            timeout=2_000
+                        )
+                except Exception:
+                    _log("Timezone selection skipped (not found / changed UI).")
 
-                    _page_warnings(page)
+                try:
+                    comboboxes = page.get_by_role("combobox")
+                    if _count_locator(comboboxes) > 2:
+                        comboboxes.nth(2).click(timeout=2_000)
+                        page.get_by_role("listbox").get_by_text(
+                            DEFAULT_ECOMMERCE
+                        ).click(timeout=2_000)
+                except Exception:
+                    _log("Ecommerce selection skipped (not found / changed UI).")
 
-                    _click_next_with_wait(page, timeout_s=INSTALLER_STEP_TIMEOUT_S)
+                _page_warnings(page)
 
-                first_website_progress_deadline = time.time() + INSTALLER_STEP_TIMEOUT_S
-                while time.time() < first_website_progress_deadline:
-                    _wait_dom_settled(page)
-                    if not _has_first_website_name_field(page):
-                        break
-                    page.wait_for_timeout(300)
-                if _has_first_website_name_field(page):
-                    _page_warnings(page)
-                    raise RuntimeError(
-                        "First website form submit did not progress to tracking code "
-                        f"within {INSTALLER_STEP_TIMEOUT_S}s "
-                        f"(url={page.url}, step={_get_step_hint(page.url)})."
-                    )
+                _click_next_with_wait(
+                    page, timeout_s=deadline.clamp(INSTALLER_STEP_TIMEOUT_S)
+                )
 
-                _page_warnings(page)
+            first_website_wait_s = deadline.clamp(INSTALLER_STEP_TIMEOUT_S)
+            first_website_progress_deadline = time.time() + first_website_wait_s
+            while time.time() < first_website_progress_deadline:
+                _wait_dom_settled(page)
+                if not _page_snapshot(page).first_website_name_field:
+                    break
+                page.wait_for_timeout(300)
+            if _page_snapshot(page).first_website_name_field:
+                _page_warnings(page, force=True)
+                raise RuntimeError(
+                    "First website form submit did not progress to tracking code "
+                    f"within {first_website_wait_s:.1f}s "
+                    f"(url={page.url}, step={_get_step_hint(page.url)})."
+                )
+            _page_warnings(page)
 
-                if _count_locator(page.get_by_role("link", name="Next »")) > 0:
-                    page.get_by_role("link", name="Next »").click()
-                    _wait_dom_settled(page)
-                    _page_warnings(page)
+            if _count_locator(page.get_by_role("link", name="Next »")) > 0:
+                page.get_by_role("link", name="Next »").click()
+                _wait_dom_settled(page)
+                _page_warnings(page)
 
-                continue_loc, _ = _first_continue_to_matomo_locator(page)
-                if continue_loc is not None:
-                    continue_loc.click()
-                    _wait_dom_settled(page)
-                    _page_warnings(page)
+            continue_loc, _ = _first_continue_to_matomo_locator(page)
+            if continue_loc is not None:
+                continue_loc.click()
+                _wait_dom_settled(page)
+                _page_warnings(page)
 
-                page.wait_for_timeout(1_000)
-                if not is_installed(base_url):
-                    _page_warnings(page)
-                    raise RuntimeError(
-                        "[install] Installer did not reach installed state."
-                    )
-            except Exception as exc:
-                _dump_failure_artifacts(page, reason=str(exc))
-                raise
-            finally:
-                context.close()
-                browser.close()
+            page.wait_for_timeout(1_000)
+            state = probe_url(base_url, timeout=deadline.clamp(5))
+            if not state.installed:
+                _page_warnings(page, force=True)
+                raise RuntimeError(
+                    "[install] Installer did not reach installed state "
+                    f"({state.label})."
+                )
+        except Exception as exc:
+            _dump_failure_artifacts(page, reason=str(exc))
+            raise
+        finally:
+            context.close()
 
-        _log("[install] Installation finished.")
+        return state
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import re
+from typing import Mapping
+
+
+class MarkerScanner:
+    """
+    Incremental multi-pattern matcher for text that arrives in chunks.
+
+    `patterns` maps a marker name (a Python identifier) to a regex; all of
+    them are compiled into one alternation so every chunk is scanned once.
+    The last `overlap` characters of the previous chunk are rescanned with the
+    next one, so a marker split across a chunk boundary is still found as
+    long as it is at most `overlap` characters long.
+
+    Only the first occurrence of each marker is kept in `found`. Where
+    markers overlap at the same position, the one listed first wins.
+    """
+
+    def __init__(self, patterns: Mapping[str, str], *, overlap: int = 256):
+        self._regex = re.compile(
+            "|".join(f"(?P<{name}>{regex})" for name, regex in patterns.items())
+        )
+        self.overlap = overlap
+        self.found: dict[str, re.Match] = {}
+        self._tail = ""
+
+    def feed(self, text: str) -> None:
+        window = self._tail + text
+        seen = len(self._tail)
+        for match in self._regex.finditer(window):
+            if match.end() <= seen:
+                continue  # reported with the previous chunk
+            name = match.lastgroup
+            if name not in self.found:
+                self.found[name] = match
+        self._tail = window[-self.overlap :]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.found
@@ -5,9 +5,23 @@ import json
 import os
 import sys
 import urllib.error
+import urllib.parse
+from typing import TYPE_CHECKING, Any, Mapping
 
-from .errors import MatomoNotReadyError, TokenCreationError
+from .errors import MatomoApiError, TokenCreationError
 from .http import HttpClient
+from .probe import (
+    INSTALLED_AUTHENTICATED,
+    ProbeResult,
+    probe_instance,
+    require_ready,
+)
+
+if TYPE_CHECKING:
+    from .async_http import AsyncHttpClient
+
+# Calls per API.getBulkRequest round trip before a queued batch auto-flushes.
+BULK_MAX_CALLS = 50
 
 
 def _md5(text: str) -> str:
@@ -27,41 +41,235 @@ def _dbg(msg: str, enabled: bool) -> None:
         print(msg, file=sys.stderr)
 
 
+def _logme_params(admin_user: str, admin_password: str) -> dict[str, str]:
+    # Matomo accepts md5 hashed password in `password` parameter for action=logme.
+    return {
+        "module": "Login",
+        "action": "logme",
+        "login": admin_user,
+        "password": _md5(admin_password),
+    }
+
+
+def _token_request_data(
+    admin_user: str, admin_password: str, description: str
+) -> dict[str, str]:
+    return {
+        "module": "API",
+        "method": "UsersManager.createAppSpecificTokenAuth",
+        "userLogin": admin_user,
+        "passwordConfirmation": admin_password,
+        "description": description,
+        "format": "json",
+    }
+
+
+def _session_probe_data(admin_user: str) -> dict[str, str]:
+    return {
+        "module": "API",
+        "method": "UsersManager.getUser",
+        "userLogin": admin_user,
+        "format": "json",
+    }
+
+
+def _session_probe_ok(status: int, body: str, admin_user: str) -> bool:
+    if status != 200:
+        return False
+    try:
+        data = json.loads(body)
+    except json.JSONDecodeError:
+        return False
+    # Anonymous sessions get {"result": "error", ...} instead of the user.
+    return (
+        isinstance(data, dict)
+        and str(data.get("login", "")).lower() == admin_user.lower()
+    )
+
+
+def _parse_token_response(status: int, body: str) -> str:
+    if status != 200:
+        raise TokenCreationError(f"HTTP {status} during token creation: {body[:400]}")
+
+    data = _try_json(body)
+    token = data.get("value") if isinstance(data, dict) else None
+    if not token:
+        raise TokenCreationError(f"Unexpected response from token creation: {data}")
+
+    return str(token)
+
+
+class BulkCall:
+    """
+    Handle for one API method queued in an `ApiBatch`; `result()` returns its
+    value or raises its `MatomoApiError` once the batch has been flushed.
+    """
+
+    def __init__(self, method: str, params: Mapping[str, Any]):
+        self.method = method
+        self.params = dict(params)
+        self.done = False
+        self._value: object = None
+        self._error: MatomoApiError | None = None
+
+    def _resolve(self, value: object = None, error: MatomoApiError | None = None):
+        self._value = value
+        self._error = error
+        self.done = True
+
+    @property
+    def error(self) -> MatomoApiError | None:
+        return self._error
+
+    def result(self) -> object:
+        if not self.done:
+            raise RuntimeError(f"{self.method} has not been flushed yet")
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+    def query(self) -> str:
+        return urllib.parse.urlencode(
+            {"method": self.method, **self.params}, doseq=True
+        )
+
+
+class ApiBatch:
+    """
+    Queue of Matomo API calls sent together through `API.getBulkRequest`.
+
+    Calls are flushed automatically once `max_calls` are queued, explicitly
+    via `flush()`, and on leaving a `with` block without an exception. Each
+    queued call is resolved individually: one failing method does not fail
+    the others.
+    """
+
+    def __init__(
+        self,
+        api: MatomoApi,
+        *,
+        max_calls: int = BULK_MAX_CALLS,
+        token_auth: str | None = None,
+    ):
+        if max_calls < 1:
+            raise ValueError("max_calls must be >= 1")
+        self.api = api
+        self.max_calls = max_calls
+        self.token_auth = token_auth
+        self._pending: list[BulkCall] = []
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, method: str, **params: Any) -> BulkCall:
+        call = BulkCall(method, params)
+        self._pending.append(call)
+        if len(self._pending) >= self.max_calls:
+            self.flush()
+        return call
+
+    def flush(self) -> list[BulkCall]:
+        calls, self._pending = self._pending, []
+        if not calls:
+            return calls
+
+        data = {
+            "module": "API",
+            "method": "API.getBulkRequest",
+            "format": "json",
+        }
+        for i, call in enumerate(calls):
+            data[f"urls[{i}]"] = call.query()
+        if self.token_auth:
+            data["token_auth"] = self.token_auth
+
+        try:
+            status, body = self.api.client.post("/index.php", data)
+        except Exception as exc:
+            err = MatomoApiError(f"API.getBulkRequest failed: {exc}")
+            for call in calls:
+                call._resolve(error=err)
+            raise err from exc
+
+        _dbg(
+            f"[api] getBulkRequest calls={len(calls)} HTTP {status} "
+            f"body[:200]={body[:200]!r}",
+            self.api.debug,
+        )
+        _demux_bulk_response(calls, status, body)
+        return calls
+
+    def __enter__(self) -> ApiBatch:
+        return self
+
+    def __exit__(self, exc_type, *_exc) -> None:
+        if exc_type is None:
+            self.flush()
+
+
+def _api_error(method: str, result: object) -> MatomoApiError | None:
+    if isinstance(result, dict) and result.get("result") == "error":
+        return MatomoApiError(f"{method}: {result.get('message') or result}")
+    return None
+
+
+def _demux_bulk_response(calls: list[BulkCall], status: int, body: str) -> None:
+    try:
+        data = json.loads(body)
+    except json.JSONDecodeError:
+        data = None
+
+    if status != 200 or not isinstance(data, list):
+        # The whole request failed (auth, maintenance, ...): every call shares it.
+        detail = _api_error("API.getBulkRequest", data) or MatomoApiError(
+            f"API.getBulkRequest HTTP {status}: {body[:400]}"
+        )
+        for call in calls:
+            call._resolve(error=detail)
+        return
+
+    for i, call in enumerate(calls):
+        if i >= len(data):
+            call._resolve(error=MatomoApiError(f"{call.method}: no result returned"))
+            continue
+        call._resolve(data[i], _api_error(call.method, data[i]))
+
+
 class MatomoApi:
     def __init__(self, *, client: HttpClient, debug: bool = False):
         self.client = client
         self.debug = debug
 
-    def assert_ready(self, timeout: int = 10) -> None:
+    def batch(
+        self, *, max_calls: int = BULK_MAX_CALLS, token_auth: str | None = None
+    ) -> ApiBatch:
         """
-        Minimal readiness check: Matomo UI should be reachable and look like Matomo.
+        Start a batch of API calls sent via `API.getBulkRequest`. Without
+        `token_auth` the batch is authenticated by the client's session.
         """
-        try:
-            status, body = self.client.get("/", {})
-        except Exception as exc:  # pragma: no cover
-            raise MatomoNotReadyError(f"Matomo not reachable: {exc}") from exc
-
-        _dbg(f"[ready] GET / -> HTTP {status}", self.debug)
+        return ApiBatch(self, max_calls=max_calls, token_auth=token_auth)
 
-        html = (body or "").lower()
-        if "matomo" not in html and "piwik" not in html:
-            raise MatomoNotReadyError("Matomo UI not detected at base URL")
+    def assert_ready(
+        self, timeout: int = 10, *, state: ProbeResult | None = None
+    ) -> ProbeResult:
+        """
+        Minimal readiness check: Matomo UI should be reachable and look like Matomo.
+        Pass the `state` of an earlier probe to check it without fetching again.
+        """
+        if state is None:
+            state = probe_instance(self.client, retry_policy=self.client.retry_policy)
+            _dbg(f"[ready] GET / -> {state.label} (HTTP {state.status})", self.debug)
+        require_ready(state)
+        return state
 
     def login_via_logme(self, admin_user: str, admin_password: str) -> None:
         """
         Create an authenticated Matomo session (cookie jar) using Login controller.
         Matomo accepts md5 hashed password in `password` parameter for action=logme.
         """
-        md5_password = _md5(admin_password)
         try:
             status, body = self.client.get(
-                "/index.php",
-                {
-                    "module": "Login",
-                    "action": "logme",
-                    "login": admin_user,
-                    "password": md5_password,
-                },
+                "/index.php", _logme_params(admin_user, admin_password)
             )
             _dbg(f"[auth] logme HTTP {status} body[:120]={body[:120]!r}", self.debug)
         except urllib.error.HTTPError as exc:
@@ -75,12 +283,56 @@ class MatomoApi:
                 self.debug,
             )
 
+    def has_valid_session(self, admin_user: str) -> bool:
+        """
+        Cheap authenticated probe: does the cookie jar already carry a logged-in
+        session for `admin_user`? Always False for an empty jar (no request).
+        """
+        if len(self.client.cookies) == 0:
+            return False
+        try:
+            status, body = self.client.post(
+                "/index.php", _session_probe_data(admin_user)
+            )
+        except Exception as exc:
+            _dbg(f"[auth] session probe failed: {exc}", self.debug)
+            return False
+        ok = _session_probe_ok(status, body, admin_user)
+        _dbg(f"[auth] stored session probe HTTP {status} valid={ok}", self.debug)
+        return ok
+
+    def ensure_session(
+        self,
+        admin_user: str,
+        admin_password: str,
+        *,
+        state: ProbeResult | None = None,
+    ) -> None:
+        """
+        Reuse the session already in the cookie jar (e.g. from a session store)
+        when it is still valid, otherwise log in again. A `state` probed with
+        this client that shows `admin_user` logged in makes the check free.
+        """
+        if (
+            state is not None
+            and state.state == INSTALLED_AUTHENTICATED
+            and (state.user or "").lower() == admin_user.lower()
+        ):
+            _dbg("[auth] Probed page is already logged in; skipping logme.", self.debug)
+            return
+        if self.has_valid_session(admin_user):
+            _dbg("[auth] Reusing stored Matomo session; skipping logme.", self.debug)
+            return
+        self.client.cookies.clear()
+        self.login_via_logme(admin_user, admin_password)
+
     def create_app_specific_token(
         self,
         *,
         admin_user: str,
         admin_password: str,
         description: str,
+        state: ProbeResult | None = None,
     ) -> str:
         """
         Create an app-specific token using an authenticated session (cookies),
@@ -93,18 +345,11 @@ class MatomoApi:
             )
             return env_token
 
-        self.login_via_logme(admin_user, admin_password)
+        self.ensure_session(admin_user, admin_password, state=state)
 
         status, body = self.client.post(
             "/index.php",
-            {
-                "module": "API",
-                "method": "UsersManager.createAppSpecificTokenAuth",
-                "userLogin": admin_user,
-                "passwordConfirmation": admin_password,
-                "description": description,
-                "format": "json",
-            },
+            _token_request_data(admin_user, admin_password, description),
         )
 
         _dbg(
@@ -112,14 +357,59 @@ class MatomoApi:
             self.debug,
         )
 
-        if status != 200:
-            raise TokenCreationError(
-                f"HTTP {status} during token creation: {body[:400]}"
+        return _parse_token_response(status, body)
+
+
+class AsyncMatomoApi:
+    """
+    asyncio counterpart of `MatomoApi` on top of `AsyncHttpClient`.
+
+    Several instances may share one cookie jar / concurrency limiter through
+    their clients, so many token provisioning calls can run concurrently from
+    a single event loop.
+    """
+
+    def __init__(self, *, client: AsyncHttpClient, debug: bool = False):
+        self.client = client
+        self.debug = debug
+
+    async def login_via_logme(self, admin_user: str, admin_password: str) -> None:
+        """
+        Create an authenticated Matomo session (cookie jar) using Login controller.
+        """
+        status, body = await self.client.get(
+            "/index.php", _logme_params(admin_user, admin_password)
+        )
+        _dbg(f"[auth] logme HTTP {status} body[:120]={body[:120]!r}", self.debug)
+
+    async def create_app_specific_token(
+        self,
+        *,
+        admin_user: str,
+        admin_password: str,
+        description: str,
+    ) -> str:
+        """
+        Create an app-specific token using an authenticated session (cookies).
+        Honours MATOMO_BOOTSTRAP_TOKEN_AUTH like `MatomoApi`.
+        """
+        env_token = os.environ.get("MATOMO_BOOTSTRAP_TOKEN_AUTH")
+        if env_token:
+            _dbg(
+                "[auth] Using MATOMO_BOOTSTRAP_TOKEN_AUTH from environment.", self.debug
             )
+            return env_token
+
+        await self.login_via_logme(admin_user, admin_password)
+
+        status, body = await self.client.post(
+            "/index.php",
+            _token_request_data(admin_user, admin_password, description),
+        )
 
-        data = _try_json(body)
-        token = data.get("value") if isinstance(data, dict) else None
-        if not token:
-            raise TokenCreationError(f"Unexpected response from token creation: {data}")
+        _dbg(
+            f"[auth] createAppSpecificTokenAuth HTTP {status} body[:200]={body[:200]!r}",
+            self.debug,
+        )
 
-        return str(token)
+        return _parse_token_response(status, body)
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+
+def cache_dir(name: str) -> Path:
+    """Per-user directory for state kept across runs (sessions, checkpoints)."""
+    cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return Path(cache) / "matomo-bootstrap" / name
+
+
+def temp_dir(name: str) -> Path:
+    """Host-wide directory for state shared by concurrent runs (locks)."""
+    return Path(tempfile.gettempdir()) / f"matomo-bootstrap-{name}"
+
+
+def url_key(base_url: str, *parts: str) -> str:
+    """File name stem for state of one base URL (plus e.g. a user name)."""
+    raw = "\0".join((base_url.rstrip("/"),) + parts).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:32]
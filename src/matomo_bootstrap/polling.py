@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import http.client
+import socket
+import time
+import urllib.parse
+from dataclasses import dataclass
+from typing import Callable
+
+from .deadline import Deadline
+from .http import HttpClient
+
+
+class Backoff:
+    """Capped exponential backoff: initial_s, initial_s * factor, ... <= max_s."""
+
+    def __init__(
+        self, *, initial_s: float = 0.05, factor: float = 2.0, max_s: float = 1.0
+    ):
+        self.initial_s = initial_s
+        self.factor = factor
+        self.max_s = max_s
+        self._next = initial_s
+
+    def next(self) -> float:
+        delay = self._next
+        self._next = min(self.max_s, self._next * self.factor)
+        return delay
+
+    def reset(self) -> None:
+        self._next = self.initial_s
+
+
+@dataclass(frozen=True)
+class Reachable:
+    status: int
+    elapsed_s: float
+    probes: int
+
+
+def connect_probe(client: HttpClient, timeout: float = 1.0) -> None:
+    """
+    Open and close a bare connection to the client's server (TCP or Unix
+    socket). Raises OSError (e.g. ConnectionRefusedError) while it is closed.
+    """
+    if client.unix_socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(client.unix_socket)
+        finally:
+            sock.close()
+        return
+
+    parts = urllib.parse.urlsplit(client.base_url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    socket.create_connection((parts.hostname, port), timeout=timeout).close()
+
+
+def _refused(exc: BaseException) -> bool:
+    reason = getattr(exc, "reason", exc)
+    return isinstance(reason, (ConnectionRefusedError, FileNotFoundError))
+
+
+def wait_reachable(
+    client: HttpClient,
+    timeout_s: float,
+    *,
+    backoff: Backoff | None = None,
+    on_wait: Callable[[float, BaseException], None] | None = None,
+    deadline: Deadline | None = None,
+) -> Reachable:
+    """
+    Poll until the server answers `HEAD /` with any HTTP status.
+
+    While the port is closed only a cheap connect probe is made; once it
+    accepts connections, HTTP probes run on the client's keep-alive pool.
+    Probes start sub-100ms apart and back off exponentially. Raises
+    TimeoutError (chained to the last probe error) after `timeout_s`, or
+    DeadlineExceededError if the run's `deadline` runs out first.
+    """
+    backoff = backoff or Backoff()
+    started = time.monotonic()
+    if deadline is not None:
+        timeout_s = deadline.clamp(timeout_s)
+    until = started + timeout_s
+    port_open = False
+    probes = 0
+
+    while True:
+        probes += 1
+        try:
+            if not port_open:
+                connect_probe(client)
+                port_open = True
+            with client.stream("HEAD", "/") as resp:
+                return Reachable(resp.status, time.monotonic() - started, probes)
+        except (OSError, http.client.HTTPException) as exc:
+            if _refused(exc):
+                port_open = False
+            if on_wait is not None:
+                on_wait(time.monotonic() - started, exc)
+            remaining = until - time.monotonic()
+            if remaining <= 0:
+                if deadline is not None and deadline.expired:
+                    raise deadline.exceeded() from exc
+                raise TimeoutError(
+                    f"not reachable after {timeout_s}s ({type(exc).__name__}: {exc})"
+                ) from exc
+            time.sleep(min(backoff.next(), remaining))
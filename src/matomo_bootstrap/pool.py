@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+import http.client
+import selectors
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from dataclasses import dataclass
+
+from .retry import IDEMPOTENT_METHODS
+from .timing import ConnectTiming, WireTiming
+
+# A reused connection that fails with one of these before any response arrived
+# was most likely closed by the server while idle; it is retried once on a
+# fresh socket.
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+
+@dataclass
+class PoolStats:
+    connections_opened: int = 0
+    connections_reused: int = 0
+    connections_discarded: int = 0
+
+
+def _is_stale(conn: http.client.HTTPConnection) -> bool:
+    """
+    An idle keep-alive socket must not be readable: readable means the server
+    sent EOF (idle close) or unexpected bytes, so the connection is unusable.
+    """
+    sock = conn.sock
+    if sock is None:
+        return True
+    try:
+        with selectors.DefaultSelector() as sel:
+            sel.register(sock, selectors.EVENT_READ)
+            return bool(sel.select(timeout=0))
+    except (OSError, ValueError):
+        return True
+
+
+def _is_timeout(timeout) -> bool:
+    # False for urllib's "global default" sentinel object.
+    return timeout is None or isinstance(timeout, (int, float))
+
+
+def _min_timeout(timeout, bound: float | None):
+    if bound is None:
+        return timeout
+    if _is_timeout(timeout) and timeout is not None and timeout <= bound:
+        return timeout
+    return bound
+
+
+def _apply_timeout(conn: http.client.HTTPConnection, timeout) -> None:
+    if not _is_timeout(timeout):
+        # urllib's "global default" sentinel: keep whatever the socket has.
+        return
+    conn.timeout = timeout
+    if conn.sock is not None:
+        conn.sock.settimeout(timeout)
+
+
+class _TimedConnectionMixin:
+    """
+    Records DNS / TCP connect / TLS handshake durations of `connect()` in
+    `connect_timing`. Costs a few perf_counter() calls per new connection.
+    """
+
+    connect_timing: ConnectTiming | None = None
+    # Optional tighter bound for connection setup than the request timeout.
+    connect_timeout: float | None = None
+
+    def _install_timed_connect(self) -> None:
+        self._create_connection = self._timed_create_connection
+
+    def _timed_create_connection(self, address, timeout, source_address=None):
+        host, port = address
+        started = time.perf_counter()
+        infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        resolved = time.perf_counter()
+        setup_timeout = _min_timeout(timeout, self.connect_timeout)
+        last_err: OSError | None = None
+        for *_, sockaddr in infos:
+            try:
+                sock = socket.create_connection(
+                    sockaddr[:2], setup_timeout, source_address
+                )
+            except OSError as exc:
+                last_err = exc
+                continue
+            if setup_timeout is not timeout:
+                sock.settimeout(
+                    timeout if _is_timeout(timeout) else socket.getdefaulttimeout()
+                )
+            self.connect_timing = ConnectTiming(
+                dns_s=resolved - started,
+                connect_s=time.perf_counter() - resolved,
+            )
+            return sock
+        raise last_err or OSError(f"getaddrinfo returned no addresses for {host}")
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, http.client.HTTPConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._install_timed_connect()
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, http.client.HTTPSConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._install_timed_connect()
+
+    def connect(self) -> None:
+        started = time.perf_counter()
+        super().connect()
+        timing = self.connect_timing
+        if timing is not None:
+            # Whatever connect() spent beyond DNS + TCP is the TLS handshake.
+            elapsed = time.perf_counter() - started
+            timing.tls_s = max(0.0, elapsed - timing.dns_s - timing.connect_s)
+
+
+class ConnectionPool:
+    """
+    Per-host pool of idle HTTP/1.1 keep-alive connections.
+
+    Connections are keyed by (scheme, host) and handed out LIFO, so the most
+    recently used socket (the one least likely to have been closed by the
+    server) is reused first. At most `max_idle_per_host` idle sockets are kept
+    per key; sockets idle for longer than `idle_timeout_s` are dropped.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_idle_per_host: int = 4,
+        idle_timeout_s: float = 30.0,
+        connect_timeout_s: float | None = None,
+    ):
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout_s = idle_timeout_s
+        # Applied to connections opened through this pool (None: request timeout).
+        self.connect_timeout_s = connect_timeout_s
+        self.stats = PoolStats()
+        self._idle: dict[tuple[str, str], deque] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: tuple[str, str]) -> http.client.HTTPConnection | None:
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                if not idle:
+                    return None
+                conn, released_at = idle.pop()
+            if now - released_at > self.idle_timeout_s or _is_stale(conn):
+                self.discard(conn)
+                continue
+            with self._lock:
+                self.stats.connections_reused += 1
+            return conn
+
+    def release(self, key: tuple[str, str], conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, deque())
+            if len(idle) < self.max_idle_per_host:
+                idle.append((conn, time.monotonic()))
+                return
+        self.discard(conn)
+
+    def discard(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            self.stats.connections_discarded += 1
+        conn.close()
+
+    def record_opened(self) -> None:
+        with self._lock:
+            self.stats.connections_opened += 1
+
+    def close(self) -> None:
+        with self._lock:
+            idle_lists = list(self._idle.values())
+            self._idle.clear()
+        for idle in idle_lists:
+            for conn, _ in idle:
+                conn.close()
+
+
+class _PooledResponse(http.client.HTTPResponse):
+    """
+    Hands its connection back to the pool once the body has been fully read
+    and the response is closed. Responses closed early (unread body) or marked
+    `Connection: close` take their socket down with them.
+    """
+
+    _pool_release = None
+    wire_timing: WireTiming | None = None
+
+    def close(self) -> None:
+        fully_read = self.fp is None
+        super().close()
+        release, self._pool_release = self._pool_release, None
+        if release is not None:
+            release(fully_read and not self.will_close)
+
+
+class _KeepAliveHandlerMixin:
+    """
+    Replacement for `AbstractHTTPHandler.do_open` that borrows connections
+    from a `ConnectionPool` instead of opening (and closing) one per request.
+    Request preprocessing (cookies, Host, Content-Length, redirects) stays with
+    the regular urllib handler chain.
+    """
+
+    pool: ConnectionPool
+
+    def _new_connection(self, host: str, timeout) -> http.client.HTTPConnection:
+        raise NotImplementedError
+
+    def _open_connection(self, host: str, timeout) -> http.client.HTTPConnection:
+        conn = self._new_connection(host, timeout)
+        if self.pool.connect_timeout_s is not None:
+            conn.connect_timeout = self.pool.connect_timeout_s
+        self.pool.record_opened()
+        return conn
+
+    def _keepalive_open(self, req: urllib.request.Request):
+        host = req.host
+        if not host:
+            raise urllib.error.URLError("no host given")
+
+        headers = dict(req.unredirected_hdrs)
+        headers.update({k: v for k, v in req.headers.items() if k not in headers})
+        headers["Connection"] = "keep-alive"
+        headers = {name.title(): val for name, val in headers.items()}
+
+        if req._tunnel_host:
+            # CONNECT tunnels are bound to one proxy target; never pool them.
+            tunnel_headers = {}
+            if "Proxy-Authorization" in headers:
+                tunnel_headers["Proxy-Authorization"] = headers.pop(
+                    "Proxy-Authorization"
+                )
+            conn = self._open_connection(host, req.timeout)
+            conn.set_tunnel(req._tunnel_host, headers=tunnel_headers)
+            r = self._send_wrapped(conn, req, headers)
+            r._pool_release = lambda _reusable: conn.close()
+            return r
+
+        key = (req.type, host)
+        conn = self.pool.acquire(key)
+        reused = conn is not None
+        if conn is None:
+            conn = self._open_connection(host, req.timeout)
+        else:
+            _apply_timeout(conn, req.timeout)
+
+        try:
+            r = self._send(conn, req, headers)
+        except _STALE_CONNECTION_ERRORS as err:
+            # Replay only what is safe to send twice (idempotent, or never
+            # written): a written non-idempotent request may have been processed.
+            replayable = req.get_method() in IDEMPOTENT_METHODS or not conn.request_sent
+            if not (reused and replayable):
+                raise urllib.error.URLError(err) from err
+            conn = self._open_connection(host, req.timeout)
+            r = self._send_wrapped(conn, req, headers)
+        except urllib.error.URLError:
+            raise
+        except OSError as err:
+            raise urllib.error.URLError(err) from err
+
+        def _release(reusable: bool, conn=conn) -> None:
+            if reusable:
+                self.pool.release(key, conn)
+            else:
+                self.pool.discard(conn)
+
+        r._pool_release = _release
+        return r
+
+    def _send_wrapped(self, conn, req, headers):
+        try:
+            return self._send(conn, req, headers)
+        except urllib.error.URLError:
+            raise
+        except OSError as err:
+            raise urllib.error.URLError(err) from err
+
+    def _send(self, conn, req, headers):
+        conn.response_class = _PooledResponse
+        conn.request_sent = False
+        fresh = conn.sock is None
+        try:
+            started = time.perf_counter()
+            conn.request(
+                req.get_method(),
+                req.selector,
+                req.data,
+                headers,
+                encode_chunked=req.has_header("Transfer-encoding"),
+            )
+            conn.request_sent = True
+            sent = time.perf_counter()
+            r = conn.getresponse()
+            headers_at = time.perf_counter()
+        except BaseException:
+            conn.close()
+            raise
+
+        r.url = req.get_full_url()
+        r.msg = r.reason
+        r.wire_timing = WireTiming(
+            reused=not fresh,
+            started_at=started,
+            request_sent_at=sent,
+            headers_at=headers_at,
+            connect=getattr(conn, "connect_timing", None) if fresh else None,
+        )
+        return r
+
+
+class KeepAliveHTTPHandler(_KeepAliveHandlerMixin, urllib.request.HTTPHandler):
+    def __init__(self, pool: ConnectionPool, debuglevel: int = 0):
+        super().__init__(debuglevel=debuglevel)
+        self.pool = pool
+
+    def _new_connection(self, host: str, timeout) -> http.client.HTTPConnection:
+        conn = TimedHTTPConnection(host)
+        _apply_timeout(conn, timeout)
+        return conn
+
+    def http_open(self, req):
+        return self._keepalive_open(req)
+
+
+class KeepAliveHTTPSHandler(_KeepAliveHandlerMixin, urllib.request.HTTPSHandler):
+    def __init__(self, pool: ConnectionPool, debuglevel: int = 0, context=None):
+        super().__init__(debuglevel=debuglevel, context=context)
+        self.pool = pool
+
+    def _new_connection(self, host: str, timeout) -> http.client.HTTPConnection:
+        conn = TimedHTTPSConnection(host, context=self._context)
+        _apply_timeout(conn, timeout)
+        return conn
+
+    def https_open(self, req):
+        return self._keepalive_open(req)
+
+
+def build_keepalive_opener(
+    pool: ConnectionPool, *handlers: urllib.request.BaseHandler
+) -> urllib.request.OpenerDirector:
+    """
+    Like `urllib.request.build_opener`, but HTTP(S) goes through `pool`.
+    """
+    return urllib.request.build_opener(
+        *handlers,
+        KeepAliveHTTPHandler(pool),
+        KeepAliveHTTPSHandler(pool),
+    )
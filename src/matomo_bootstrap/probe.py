@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import codecs
+import http.client
+import json
+import re
+import time
+import urllib.parse
+from dataclasses import dataclass
+
+from .errors import MatomoNotReadyError
+from .http import HttpClient
+from .markers import MarkerScanner
+from .retry import NO_RETRY, RetryPolicy
+
+UNREACHABLE = "unreachable"
+ERRORING = "erroring"
+INSTALLER = "installer"
+INSTALLED_LOGIN = "installed-login"
+INSTALLED_AUTHENTICATED = "installed-authenticated"
+
+# Upper bound for pages without a decisive marker; most probes stop earlier.
+PROBE_MAX_BYTES = 256 * 1024
+_PROBE_CHUNK_SIZE = 16 * 1024
+# API.getMatomoVersion answers with a few bytes of JSON.
+_API_MAX_BYTES = 16 * 1024
+
+PROBE_API = "api"
+PROBE_HTML = "html"
+PROBE_MODES = (PROBE_API, PROBE_HTML)
+
+
+def _literals(*markers: str) -> str:
+    return "|".join(re.escape(marker) for marker in markers)
+
+
+# Matched against lowercased HTML. Order matters where markers overlap (see
+# MarkerScanner): the more specific ones come first.
+_MARKERS = {
+    # Logged-in pages (CoreHome) expose the current user to the JS client.
+    "user": r"piwik\.userlogin\s{0,8}=\s{0,8}[\"'](?P<user_login>[^\"'\n]{1,100})[\"']",
+    "login": _literals("module=login", "matomo › login", "matomo/login"),
+    "installer": _literals("module=installation", "installation"),
+    "body": re.escape("<body"),
+    "brand": _literals("matomo", "piwik"),
+}
+
+
+def _scanner() -> MarkerScanner:
+    return MarkerScanner(_MARKERS)
+
+
+def _logged_in_user(scanner: MarkerScanner) -> str | None:
+    match = scanner.found.get("user")
+    if match is None or match.group("user_login") == "anonymous":
+        return None
+    return match.group("user_login")
+
+
+def _decisive(scanner: MarkerScanner) -> bool:
+    """
+    Can the rest of the page still change the classification? The current
+    user is set in <head>, so once <body> started a login/installer marker
+    settles it.
+    """
+    if _logged_in_user(scanner):
+        return True
+    if "body" not in scanner:
+        return False
+    if "login" in scanner:
+        return True
+    return "installer" in scanner and _looks_like_matomo(scanner)
+
+
+def _looks_like_matomo(scanner: MarkerScanner) -> bool:
+    if "brand" in scanner or "user" in scanner:
+        return True
+    # The branding may only have occurred inside a login marker.
+    login = scanner.found.get("login")
+    return login is not None and login.group().startswith("matomo")
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    """
+    State of a Matomo instance derived from a single request (see `probe`).
+
+    `state` is one of UNREACHABLE, ERRORING, INSTALLER, INSTALLED_LOGIN,
+    INSTALLED_AUTHENTICATED; `installer_step` is the wizard step (e.g.
+    "welcome", "systemCheck") for INSTALLER, `user` the logged-in user for
+    INSTALLED_AUTHENTICATED. `version` is the Matomo version when the API
+    probe could read it.
+    """
+
+    state: str
+    status: int | None = None
+    url: str | None = None
+    looks_like_matomo: bool = False
+    installer_step: str | None = None
+    user: str | None = None
+    error: str | None = None
+    elapsed_s: float = 0.0
+    bytes_read: int = 0
+    version: str | None = None
+
+    @property
+    def installed(self) -> bool:
+        return self.state in (INSTALLED_LOGIN, INSTALLED_AUTHENTICATED)
+
+    @property
+    def label(self) -> str:
+        if self.state == INSTALLER:
+            return f"installer-step-{self.installer_step}"
+        return self.state
+
+
+def _installer_step(url: str) -> str:
+    query = urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)
+    return (query.get("action") or ["welcome"])[0]
+
+
+def classify(status: int, html: str, url: str, elapsed_s: float = 0.0) -> ProbeResult:
+    """Classify a fetched page; `html` must already be lowercased."""
+    scanner = _scanner()
+    scanner.feed(html)
+    return _classify_scanned(scanner, status, url, elapsed_s)
+
+
+def _classify_scanned(
+    scanner: MarkerScanner,
+    status: int,
+    url: str,
+    elapsed_s: float,
+    bytes_read: int = 0,
+) -> ProbeResult:
+    looks_like_matomo = _looks_like_matomo(scanner)
+    common = dict(
+        status=status,
+        url=url,
+        looks_like_matomo=looks_like_matomo,
+        elapsed_s=elapsed_s,
+        bytes_read=bytes_read,
+    )
+
+    user = _logged_in_user(scanner)
+    if user:
+        return ProbeResult(INSTALLED_AUTHENTICATED, user=user, **common)
+    if "login" in scanner:
+        return ProbeResult(INSTALLED_LOGIN, **common)
+    if looks_like_matomo and "installer" in scanner:
+        return ProbeResult(INSTALLER, installer_step=_installer_step(url), **common)
+    return ProbeResult(ERRORING, error=f"HTTP {status}", **common)
+
+
+def _scan_page(resp) -> MarkerScanner:
+    """Feed `resp` through a marker scanner until a decisive marker shows up."""
+    scanner = _scanner()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for chunk in resp.iter_chunks(_PROBE_CHUNK_SIZE):
+        scanner.feed(decoder.decode(chunk).lower())
+        if _decisive(scanner):
+            break
+    return scanner
+
+
+def _unreachable(exc: BaseException, started: float) -> ProbeResult:
+    return ProbeResult(
+        UNREACHABLE,
+        error=f"{type(exc).__name__}: {exc}",
+        elapsed_s=time.monotonic() - started,
+    )
+
+
+def probe_instance(
+    client: HttpClient, *, retry_policy: RetryPolicy = NO_RETRY
+) -> ProbeResult:
+    """
+    Fetch `/` once (at most PROBE_MAX_BYTES, no retries by default) and
+    classify it. Connection failures yield UNREACHABLE instead of raising.
+
+    The body is scanned chunk by chunk; the response is closed as soon as a
+    decisive marker shows up, so the rest of the page is never transferred.
+    """
+    started = time.monotonic()
+    try:
+        with client.stream(
+            "GET", "/", max_bytes=PROBE_MAX_BYTES, retry_policy=retry_policy
+        ) as resp:
+            scanner = _scan_page(resp)
+            status, url, bytes_read = resp.status, resp.url, resp.bytes_read
+    except (OSError, http.client.HTTPException, MatomoNotReadyError) as exc:
+        return _unreachable(exc, started)
+    return _classify_scanned(
+        scanner, status, url, time.monotonic() - started, bytes_read
+    )
+
+
+def _classify_api(status: int, url: str, body: bytes, elapsed_s: float) -> ProbeResult:
+    common = dict(status=status, url=url, elapsed_s=elapsed_s, bytes_read=len(body))
+    try:
+        data = json.loads(body.decode("utf-8", errors="replace"))
+    except json.JSONDecodeError:
+        return ProbeResult(ERRORING, error=f"HTTP {status}: invalid JSON", **common)
+
+    # Any API answer means Matomo is installed (the installer would have
+    # rendered HTML). Without view access the version stays unknown.
+    version = data.get("value") if isinstance(data, dict) else None
+    error = None
+    if isinstance(data, dict) and data.get("result") == "error":
+        error = str(data.get("message") or "API error")
+    return ProbeResult(
+        INSTALLED_LOGIN,
+        looks_like_matomo=True,
+        version=str(version) if version else None,
+        error=error,
+        **common,
+    )
+
+
+def probe_api(
+    client: HttpClient,
+    *,
+    token_auth: str | None = None,
+    retry_policy: RetryPolicy = NO_RETRY,
+) -> ProbeResult:
+    """
+    Cheaper variant of `probe_instance`: ask `API.getMatomoVersion` instead
+    of rendering the UI. A JSON answer means "installed" (with the version if
+    the caller has view access). Anything else (installer wizard, error page)
+    is classified with the HTML heuristics, from the same response.
+    """
+    params = {"module": "API", "method": "API.getMatomoVersion", "format": "json"}
+    if token_auth:
+        params["token_auth"] = token_auth
+
+    started = time.monotonic()
+    try:
+        with client.stream(
+            "GET",
+            "/index.php",
+            params,
+            max_bytes=PROBE_MAX_BYTES,
+            retry_policy=retry_policy,
+        ) as resp:
+            status, url = resp.status, resp.url
+            if "json" in (resp.headers.get("Content-Type") or "").lower():
+                body = resp.read(_API_MAX_BYTES)
+                return _classify_api(status, url, body, time.monotonic() - started)
+            scanner = _scan_page(resp)
+            bytes_read = resp.bytes_read
+    except (OSError, http.client.HTTPException, MatomoNotReadyError) as exc:
+        return _unreachable(exc, started)
+    return _classify_scanned(
+        scanner, status, url, time.monotonic() - started, bytes_read
+    )
+
+
+def probe(client: HttpClient, mode: str = PROBE_API, **kwargs) -> ProbeResult:
+    """Probe with `probe_api` (PROBE_API) or `probe_instance` (PROBE_HTML)."""
+    if mode == PROBE_API:
+        return probe_api(client, **kwargs)
+    if mode == PROBE_HTML:
+        return probe_instance(client, **kwargs)
+    raise ValueError(f"unknown probe mode: {mode!r}")
+
+
+def probe_url(base_url: str, timeout: int = 5, mode: str = PROBE_API) -> ProbeResult:
+    with HttpClient(base_url, timeout=timeout, retry_policy=NO_RETRY) as client:
+        return probe(client, mode)
+
+
+def require_ready(result: ProbeResult) -> None:
+    """
+    Minimal readiness check: Matomo UI should be reachable and look like Matomo.
+    """
+    if result.state == UNREACHABLE:
+        raise MatomoNotReadyError(f"Matomo not reachable: {result.error}")
+    if not result.looks_like_matomo:
+        raise MatomoNotReadyError("Matomo UI not detected at base URL")
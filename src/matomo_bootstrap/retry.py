@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import email.utils
+import random
+import socket
+import threading
+import time
+import urllib.error
+from dataclasses import dataclass, field
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"})
+
+# Matomo answers 503 with this wording while `maintenance_mode = 1` is set
+# (UI and API alike); such a 503 waits at least `maintenance_delay_s`.
+_MAINTENANCE_MARKERS = ("maintenance",)
+
+
+def parse_retry_after(value: str | None, *, now: float | None = None) -> float | None:
+    """
+    Parse a Retry-After header (delta-seconds or HTTP-date) into seconds.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed is None:
+        return None
+    current = time.time() if now is None else now
+    return max(0.0, parsed.timestamp() - current)
+
+
+def is_maintenance_response(status: int | None, body: str) -> bool:
+    if status != 503:
+        return False
+    lower = (body or "")[:4096].lower()
+    return any(marker in lower for marker in _MAINTENANCE_MARKERS)
+
+
+def _connection_not_established(error: BaseException) -> bool:
+    """
+    True when the request provably never reached the server (safe to replay
+    even for non-idempotent methods).
+    """
+    reason = getattr(error, "reason", error)
+    return isinstance(reason, (ConnectionRefusedError, socket.gaierror))
+
+
+@dataclass
+class RetryBudget:
+    """
+    Client-wide retry budget: every first attempt deposits `ratio` tokens,
+    every retry withdraws one. Starts with `min_retries` tokens so short runs
+    can still ride out a warm-up, while a dead instance cannot multiply load.
+    """
+
+    ratio: float = 0.2
+    min_retries: int = 10
+    _balance: float = field(init=False, default=0.0)
+    _lock: threading.Lock = field(
+        init=False, repr=False, default_factory=threading.Lock
+    )
+
+    def __post_init__(self) -> None:
+        self._balance = float(self.min_retries)
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._balance += self.ratio
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._balance < 1.0:
+                return False
+            self._balance -= 1.0
+            return True
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Which failures `HttpClient` retries, and how long it waits in between.
+
+    - idempotent methods retry on any connection error, on `retry_statuses`
+      and on Matomo maintenance-mode 503s
+    - other methods (POST) retry only when the request was never sent:
+      connection refused / DNS failure. Any response, even a 502 from a
+      proxy, may come after the server acted on the request
+    - delays use exponential backoff with full jitter, unless the server sent
+      Retry-After (capped at `max_retry_after_s`)
+    """
+
+    max_attempts: int = 4
+    backoff_base_s: float = 0.5
+    backoff_max_s: float = 10.0
+    max_retry_after_s: float = 60.0
+    maintenance_delay_s: float = 5.0
+    retry_statuses: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+    idempotent_methods: frozenset[str] = IDEMPOTENT_METHODS
+
+    def should_retry(
+        self,
+        method: str,
+        attempt: int,
+        *,
+        status: int | None = None,
+        body: str = "",
+        error: BaseException | None = None,
+    ) -> bool:
+        if attempt >= self.max_attempts:
+            return False
+        idempotent = method.upper() in self.idempotent_methods
+        if error is not None:
+            if isinstance(error, urllib.error.HTTPError):
+                return False
+            return idempotent or _connection_not_established(error)
+        if status is None or not idempotent:
+            return False
+        return status in self.retry_statuses or is_maintenance_response(status, body)
+
+    def delay(
+        self,
+        attempt: int,
+        *,
+        retry_after: float | None = None,
+        maintenance: bool = False,
+    ) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after_s)
+        cap = min(self.backoff_max_s, self.backoff_base_s * (2 ** (attempt - 1)))
+        delay = random.uniform(0.0, cap)
+        if maintenance:
+            delay = max(delay, self.maintenance_delay_s)
+        return delay
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+
+@dataclass(frozen=True)
+class AttemptRecord:
+    method: str
+    url: str
+    attempt: int
+    status: int | None
+    error: str | None
+    elapsed_s: float
+    retry_delay_s: float | None
@@ -1,33 +1,175 @@
 from __future__ import annotations
 
+import os
+import sys
+from contextlib import nullcontext
+from dataclasses import replace
+
+from .adaptive import AdaptiveTimeouts, CircuitBreaker
+from .checkpoint import INSTALLED, TOKEN_ISSUED, Checkpoint, CheckpointStore
 from .config import Config
+from .deadline import Deadline
+from .endpoints import EndpointSelector
+from .errors import MatomoNotReadyError
 from .http import HttpClient
 from .matomo_api import MatomoApi
-from .installers.web import WebInstaller
+from .probe import PROBE_API, ProbeResult, probe, probe_api
+from .retry import RetryPolicy
+from .session_store import SessionStore
+
+
+def _dbg(msg: str, enabled: bool) -> None:
+    if enabled:
+        print(msg, file=sys.stderr)
 
 
 def run(config: Config) -> str:
     """
     Orchestrate:
+      0) Probe the instance once (API.getMatomoVersion, or GET / in "html"
+         probe mode); the result drives steps 1-3
       1) Ensure Matomo is installed (NO-OP if installed)
       2) Ensure Matomo is reachable/ready
       3) Create an app-specific token using an authenticated session
+         (reused from the session store when one is configured and still valid)
+
+    With a checkpoint directory, completed phases and the issued token are
+    recorded; a re-run whose single probe (authenticated with that token)
+    still matches the recorded instance returns the token right away.
+
+    With several base URLs (replicas) the replicas are probed concurrently
+    and the fastest healthy one is used; if it stops answering mid-run the
+    run fails over to the next one.
+
+    All steps share one `Deadline` (config.deadline seconds, unlimited if
+    unset); running out of it raises DeadlineExceededError naming the phase.
     """
-    installer = WebInstaller()
-    installer.ensure_installed(config)
+    deadline = Deadline(config.deadline)
+    if len(config.endpoints) == 1:
+        return _run_endpoint(config, deadline)
 
-    client = HttpClient(
-        base_url=config.base_url,
-        timeout=config.timeout,
+    selector = EndpointSelector(
+        config.endpoints,
+        timeout=deadline.clamp(config.timeout),
+        mode=config.probe_mode,
         debug=config.debug,
     )
-    api = MatomoApi(client=client, debug=config.debug)
+    while True:
+        with deadline.phase("select-endpoint"):
+            base_url, state = selector.select()
+        try:
+            # Only the API probe is independent of the stored session's cookies.
+            return _run_endpoint(
+                replace(config, base_url=base_url, base_urls=()),
+                deadline,
+                state=state if config.probe_mode == PROBE_API else None,
+            )
+        except (MatomoNotReadyError, OSError) as exc:
+            if not selector.fail(base_url, exc):
+                raise
+            _dbg(f"[endpoints] failing over from {base_url}", config.debug)
 
-    api.assert_ready(timeout=config.timeout)
 
-    token = api.create_app_specific_token(
-        admin_user=config.admin_user,
-        admin_password=config.admin_password,
-        description=config.token_description,
-    )
+def _stored_token(checkpoint: Checkpoint | None, config: Config) -> str | None:
+    if checkpoint is None or os.environ.get("MATOMO_BOOTSTRAP_TOKEN_AUTH"):
+        return None
+    return checkpoint.token_for(config.admin_user, config.token_description)
+
+
+def _run_endpoint(
+    config: Config, deadline: Deadline, state: ProbeResult | None = None
+) -> str:
+    checkpoint = None
+    if config.checkpoint_dir:
+        checkpoint = CheckpointStore(config.checkpoint_dir).open(config.base_url)
+        _dbg(f"[checkpoint] completed: {sorted(checkpoint.phases)}", config.debug)
+    stored_token = _stored_token(checkpoint, config)
+
+    if config.session_dir:
+        stored = SessionStore(config.session_dir).open(
+            config.base_url, config.admin_user
+        )
+    else:
+        stored = nullcontext()
+
+    with stored as session:
+        with HttpClient(
+            base_url=config.base_url,
+            timeout=config.timeout,
+            debug=config.debug,
+            cookies=session.jar if session is not None else None,
+            retry_policy=RetryPolicy(max_attempts=config.retries + 1),
+            adaptive_timeouts=AdaptiveTimeouts(
+                floor_s=config.timeout_floor, ceiling_s=config.timeout
+            ),
+            circuit_breaker=CircuitBreaker(),
+            deadline=deadline,
+        ) as client:
+            api = MatomoApi(client=client, debug=config.debug)
+
+            if stored_token is not None:
+                # The validation probe: only a still-valid token can read the version.
+                with deadline.phase("probe"):
+                    state = probe_api(client, token_auth=stored_token)
+            elif state is None:
+                with deadline.phase("probe"):
+                    state = probe(client, config.probe_mode)
+            if state.version:
+                _dbg(f"[probe] Matomo {state.version}", config.debug)
+
+            if checkpoint is not None:
+                if not checkpoint.matches(state):
+                    _dbg("[checkpoint] instance changed; starting over", config.debug)
+                    checkpoint.discard()
+                elif stored_token is not None:
+                    if state.installed and state.version and not state.error:
+                        _dbg("[checkpoint] stored token still valid", config.debug)
+                        if not checkpoint.fingerprint.get("version"):
+                            # First authenticated probe: remember the version.
+                            checkpoint.complete(state=state)
+                        return stored_token
+                    checkpoint.discard(TOKEN_ISSUED)
+
+            with deadline.phase("install"):
+                # Imported only when needed: the installer parses its knobs at
+                # import time and pulls in the browser machinery.
+                from .installers.console import ConsoleInstaller, build_runner
+                from .installers.http import HttpInstaller
+                from .installers.lock import LockedInstaller, build_install_lock
+                from .installers.web import WebInstaller
+
+                installer = WebInstaller()
+                if config.installer in ("http", "console"):
+                    installer = HttpInstaller(fallback=installer)
+                if config.installer == "console":
+                    installer = ConsoleInstaller(
+                        build_runner(config), fallback=installer
+                    )
+                installer = LockedInstaller(installer, build_install_lock(config))
+                state = installer.ensure_installed(
+                    config, state=state, deadline=deadline
+                )
+            if checkpoint is not None:
+                checkpoint.complete(INSTALLED, state=state)
+
+            with deadline.phase("ready"):
+                api.assert_ready(timeout=config.timeout, state=state)
+
+            with deadline.phase("token"):
+                token = api.create_app_specific_token(
+                    admin_user=config.admin_user,
+                    admin_password=config.admin_password,
+                    description=config.token_description,
+                    state=state,
+                )
+            if checkpoint is not None and not os.environ.get(
+                "MATOMO_BOOTSTRAP_TOKEN_AUTH"
+            ):
+                checkpoint.record_token(
+                    token,
+                    admin_user=config.admin_user,
+                    description=config.token_description,
+                )
+        if session is not None:
+            session.save()
     return token
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import http.cookiejar
+import os
+from pathlib import Path
+
+from .paths import cache_dir, url_key
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None
+
+
+def default_session_dir() -> Path:
+    return cache_dir("sessions")
+
+
+def session_key(base_url: str, user: str) -> str:
+    return url_key(base_url, user)
+
+
+class StoredSession:
+    """
+    Cookie jar of one (base URL, user) pair, loaded from disk.
+
+    Holds an exclusive lock on the session while open, so concurrent runs for
+    the same instance/user queue up instead of clobbering each other's cookies.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.jar = http.cookiejar.MozillaCookieJar(str(path))
+        self._lock_fd: int | None = None
+
+    def __enter__(self) -> StoredSession:
+        self._lock_fd = os.open(
+            str(self.path.with_suffix(".lock")), os.O_RDWR | os.O_CREAT, 0o600
+        )
+        if fcntl is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        if self.path.exists():
+            try:
+                # Matomo's session cookie has no expiry ("discard"): keep it.
+                self.jar.load(ignore_discard=True)
+            except (OSError, http.cookiejar.LoadError):
+                self.jar.clear()
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)  # releases the flock
+            self._lock_fd = None
+
+    @property
+    def has_cookies(self) -> bool:
+        return len(self.jar) > 0
+
+    def save(self) -> None:
+        # Create the file 0600 first; MozillaCookieJar.save keeps the mode.
+        fd = os.open(str(self.path), os.O_WRONLY | os.O_CREAT, 0o600)
+        os.close(fd)
+        os.chmod(self.path, 0o600)
+        self.jar.save(ignore_discard=True)
+
+    def clear(self) -> None:
+        self.jar.clear()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SessionStore:
+    """
+    Directory of persisted Matomo login sessions, one cookie file per
+    (base URL, user). The directory is created 0700 and files 0600: the
+    cookies are as good as the admin password for as long as they live.
+    """
+
+    def __init__(self, directory: str | os.PathLike | None = None):
+        self.directory = (
+            Path(directory).expanduser() if directory else default_session_dir()
+        )
+
+    def path_for(self, base_url: str, user: str) -> Path:
+        return self.directory / f"{session_key(base_url, user)}.cookies"
+
+    def open(self, base_url: str, user: str) -> StoredSession:
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        os.chmod(self.directory, 0o700)
+        return StoredSession(self.path_for(base_url, user))
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from .config import Config
+from .probe import UNREACHABLE, ProbeResult, probe_url
+
+# Keep this module (and everything it imports) free of the installer and
+# Playwright: `--status` is polled often and must start fast.
+
+
+def status_record(base_url: str, result: ProbeResult) -> dict[str, object]:
+    """Machine-readable view of one probe (one JSON object per base URL)."""
+    return {
+        "base_url": base_url,
+        "state": result.state,
+        "label": result.label,
+        "reachable": result.state != UNREACHABLE,
+        "installed": result.installed,
+        "installer_step": result.installer_step,
+        "version": result.version,
+        "http_status": result.status,
+        "error": result.error,
+        "elapsed_s": round(result.elapsed_s, 4),
+    }
+
+
+def check(config: Config) -> list[dict[str, object]]:
+    """
+    Probe every configured base URL once (concurrently, no retries) and
+    return their status records in configuration order.
+    """
+    urls = config.endpoints
+
+    def one(url: str) -> dict[str, object]:
+        return status_record(
+            url, probe_url(url, timeout=config.timeout, mode=config.probe_mode)
+        )
+
+    if len(urls) == 1:
+        return [one(urls[0])]
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=len(urls)) as pool:
+        return list(pool.map(one, urls))
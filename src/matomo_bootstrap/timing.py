@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass
+class ConnectTiming:
+    """Connection setup phases of a freshly opened socket (seconds)."""
+
+    dns_s: float
+    connect_s: float
+    tls_s: float | None = None
+
+
+@dataclass
+class WireTiming:
+    """
+    Timestamps (time.perf_counter) captured by the pooled HTTP handler for
+    the final hop of a request. `connect` is None for a reused connection.
+    """
+
+    reused: bool
+    started_at: float
+    request_sent_at: float
+    headers_at: float
+    connect: ConnectTiming | None = None
+
+
+@dataclass(frozen=True)
+class RequestTiming:
+    """
+    Per-request timing delivered to `HttpClient` timing hooks.
+
+    `ttfb_s` runs from "request written" to "response headers parsed", i.e.
+    it is mostly server (PHP) time plus one round trip. Connection phases are
+    None when an idle keep-alive connection was reused.
+    """
+
+    method: str
+    url: str
+    status: int | None
+    reused_connection: bool
+    dns_s: float | None
+    connect_s: float | None
+    tls_s: float | None
+    ttfb_s: float | None
+    transfer_s: float | None
+    total_s: float
+    request_bytes: int
+    response_bytes: int
+    body_bytes: int
+    error: str | None = None
+
+
+TimingHook = Callable[[RequestTiming], None]
+
+
+def build_request_timing(
+    *,
+    method: str,
+    url: str,
+    status: int | None,
+    wire: WireTiming | None,
+    started_at: float,
+    finished_at: float,
+    request_bytes: int,
+    response_bytes: int,
+    body_bytes: int,
+    error: str | None = None,
+) -> RequestTiming:
+    connect = wire.connect if wire is not None else None
+    return RequestTiming(
+        method=method,
+        url=url,
+        status=status,
+        reused_connection=bool(wire and wire.reused),
+        dns_s=connect.dns_s if connect else None,
+        connect_s=connect.connect_s if connect else None,
+        tls_s=connect.tls_s if connect else None,
+        ttfb_s=(wire.headers_at - wire.request_sent_at) if wire else None,
+        transfer_s=(finished_at - wire.headers_at) if wire else None,
+        total_s=finished_at - started_at,
+        request_bytes=request_bytes,
+        response_bytes=response_bytes,
+        body_bytes=body_bytes,
+        error=error,
+    )
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import http.client
+import socket
+import time
+import urllib.request
+
+from .pool import ConnectionPool, KeepAliveHTTPHandler, TimedHTTPConnection
+from .timing import ConnectTiming
+
+UNIX_URL_PREFIX = "unix://"
+
+# Host used in URLs (Host header, cookie domain) for requests over a socket.
+UDS_HOST = "localhost"
+
+
+def is_unix_base_url(url: str) -> bool:
+    return url.startswith(UNIX_URL_PREFIX)
+
+
+def split_unix_base_url(url: str) -> tuple[str, str]:
+    """
+    `unix:///run/nginx.sock:/matomo` -> ("/run/nginx.sock", "http://localhost/matomo")
+
+    The part after the socket path's `:` is the HTTP path prefix ("/" if
+    omitted). Requests are sent with `Host: localhost`.
+    """
+    if not is_unix_base_url(url):
+        raise ValueError(f"not a unix:// URL: {url}")
+    socket_path, _, prefix = url[len(UNIX_URL_PREFIX) :].partition(":")
+    if not socket_path.startswith("/"):
+        raise ValueError(
+            f"unix:// base URL needs an absolute socket path "
+            f"(e.g. unix:///run/nginx.sock:/): {url}"
+        )
+    if not prefix.startswith("/"):
+        prefix = "/" + prefix
+    return socket_path, f"http://{UDS_HOST}{prefix}"
+
+
+class UnixHTTPConnection(TimedHTTPConnection):
+    """HTTP/1.1 connection over an AF_UNIX stream socket."""
+
+    def __init__(self, socket_path: str, host: str = UDS_HOST, **kwargs):
+        super().__init__(host, **kwargs)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        started = time.perf_counter()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is None or isinstance(self.timeout, (int, float)):
+            sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+        self.connect_timing = ConnectTiming(
+            dns_s=0.0, connect_s=time.perf_counter() - started
+        )
+
+
+class KeepAliveUnixHandler(KeepAliveHTTPHandler):
+    """Pooled `http://` handler that sends every request to one Unix socket."""
+
+    def __init__(self, pool: ConnectionPool, socket_path: str, debuglevel: int = 0):
+        super().__init__(pool, debuglevel=debuglevel)
+        self.socket_path = socket_path
+
+    def _new_connection(self, host: str, timeout) -> http.client.HTTPConnection:
+        conn = UnixHTTPConnection(self.socket_path, host)
+        if timeout is None or isinstance(timeout, (int, float)):
+            conn.timeout = timeout
+        return conn
+
+
+def build_unix_opener(
+    pool: ConnectionPool, socket_path: str, *handlers: urllib.request.BaseHandler
+) -> urllib.request.OpenerDirector:
+    """
+    Opener whose `http://` requests all go to `socket_path`. Environment
+    proxies are ignored: they would otherwise capture `http://localhost`.
+    """
+    return urllib.request.build_opener(
+        *handlers,
+        urllib.request.ProxyHandler({}),
+        KeepAliveUnixHandler(pool, socket_path),
+    )
@@ -0,0 +1,192 @@
+import asyncio
+import http.cookiejar
+import json
+import subprocess
+import sys
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from matomo_bootstrap.async_http import AsyncHttpClient
+from matomo_bootstrap.matomo_api import AsyncMatomoApi
+
+_SRC = str(Path(__file__).resolve().parents[2] / "src")
+
+
+class _FakeMatomoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args) -> None:
+        return None
+
+    def _send(self, status: int, body: bytes, headers=()) -> None:
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        if query.get("action") == ["logme"]:
+            self._send(
+                302,
+                b"",
+                [("Set-Cookie", "MATOMO_SESSID=s1; Path=/"), ("Location", "/home")],
+            )
+            return
+        if self.path == "/home":
+            self._send(200, (self.headers.get("Cookie") or "").encode())
+            return
+        if self.path == "/chunked":
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for part in (b"hel", b"lo"):
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(part), part))
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        if self.path == "/slow":
+            with self.server.lock:
+                self.server.in_flight += 1
+                self.server.max_in_flight = max(
+                    self.server.max_in_flight, self.server.in_flight
+                )
+            time.sleep(0.05)
+            with self.server.lock:
+                self.server.in_flight -= 1
+            self._send(200, b"slow")
+            return
+        self._send(404, b"not found")
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or "0")
+        form = urllib.parse.parse_qs(self.rfile.read(length).decode())
+        if self.path == "/vanish":
+            # Processed, but the connection drops before the response.
+            self.server.vanished += 1
+            self.close_connection = True
+            return
+        has_session = "MATOMO_SESSID=s1" in (self.headers.get("Cookie") or "")
+        if form.get("method") == ["UsersManager.createAppSpecificTokenAuth"]:
+            if not has_session:
+                self._send(401, b'{"result":"error"}')
+                return
+            self._send(200, json.dumps({"value": "a" * 32}).encode())
+            return
+        self._send(400, b"bad request")
+
+
+class TestAsyncHttpClient(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeMatomoHandler)
+        self.server.lock = threading.Lock()
+        self.server.in_flight = 0
+        self.server.max_in_flight = 0
+        self.server.vanished = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host, port = self.server.server_address
+        self.base_url = f"http://{host}:{port}"
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_concurrent_requests_respect_limit(self) -> None:
+        async def scenario():
+            async with AsyncHttpClient(self.base_url, max_concurrency=3) as client:
+                results = await asyncio.gather(
+                    *(client.get("/slow", {}) for _ in range(12))
+                )
+                return results, client.stats
+
+        results, stats = asyncio.run(scenario())
+
+        self.assertEqual(results, [(200, "slow")] * 12)
+        self.assertLessEqual(self.server.max_in_flight, 3)
+        self.assertLessEqual(stats.connections_opened, 3)
+        self.assertGreater(stats.connections_reused, 0)
+
+    def test_follows_redirect_and_shares_cookie_jar(self) -> None:
+        jar = http.cookiejar.CookieJar()
+
+        async def scenario():
+            async with AsyncHttpClient(self.base_url, cookies=jar) as first:
+                await first.get("/index.php", {"module": "Login", "action": "logme"})
+            async with AsyncHttpClient(self.base_url, cookies=jar) as second:
+                return await second.get("/home", {})
+
+        self.assertEqual(asyncio.run(scenario()), (200, "MATOMO_SESSID=s1"))
+
+    def test_reads_chunked_body_and_non_2xx(self) -> None:
+        async def scenario():
+            async with AsyncHttpClient(self.base_url) as client:
+                return (
+                    await client.get("/chunked", {}),
+                    await client.get("/missing", {}),
+                )
+
+        chunked, missing = asyncio.run(scenario())
+
+        self.assertEqual(chunked, (200, "hello"))
+        self.assertEqual(missing, (404, "not found"))
+
+    def test_async_api_creates_tokens_concurrently(self) -> None:
+        async def scenario():
+            async with AsyncHttpClient(self.base_url) as client:
+                api = AsyncMatomoApi(client=client)
+                return await asyncio.gather(
+                    *(
+                        api.create_app_specific_token(
+                            admin_user="admin",
+                            admin_password="secret",
+                            description=f"token-{i}",
+                        )
+                        for i in range(5)
+                    )
+                )
+
+        self.assertEqual(asyncio.run(scenario()), ["a" * 32] * 5)
+
+    def test_post_is_not_replayed_after_reused_connection_drops(self) -> None:
+        async def scenario():
+            async with AsyncHttpClient(self.base_url) as client:
+                await client.get("/slow", {})
+                with self.assertRaises(urllib.error.URLError):
+                    await client.post("/vanish", {"a": "1"})
+                return client.stats
+
+        stats = asyncio.run(scenario())
+
+        self.assertEqual(self.server.vanished, 1)
+        self.assertEqual(stats.connections_opened, 1)
+        self.assertEqual(stats.connections_reused, 1)
+
+
+class TestAsyncStackIsOptIn(unittest.TestCase):
+    def test_sync_api_does_not_load_asyncio(self) -> None:
+        code = (
+            "import sys\n"
+            "import matomo_bootstrap.matomo_api\n"
+            "loaded = [m for m in ('asyncio', 'matomo_bootstrap.async_http')"
+            " if m in sys.modules]\n"
+            "raise SystemExit(str(loaded) if loaded else 0)\n"
+        )
+        proc = subprocess.run(
+            [sys.executable, "-c", code],
+            env={"PYTHONPATH": _SRC},
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import json
+import os
+import stat
+import tempfile
+import threading
+import unittest
+import urllib.parse
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from matomo_bootstrap.checkpoint import INSTALLED, TOKEN_ISSUED, CheckpointStore
+from matomo_bootstrap.config import Config
+from matomo_bootstrap.service import run
+
+
+class _MatomoHandler(BaseHTTPRequestHandler):
+    """Installed Matomo whose API version answer needs a valid token."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args) -> None:
+        return None
+
+    def _send(self, payload: object) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        self.server.requests.append(self.path)
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        if query.get("method") == ["API.getMatomoVersion"]:
+            if query.get("token_auth") == [self.server.valid_token]:
+                self._send({"value": self.server.version})
+            else:
+                self._send({"result": "error", "message": "requires 'view' access"})
+        else:
+            self._send("ok")  # Login.logme
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or "0")
+        self.rfile.read(length)
+        self.server.requests.append(self.path)
+        self.server.issued += 1
+        self.server.valid_token = f"tok-{self.server.issued}"
+        self._send({"value": self.server.valid_token})
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self) -> None:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _MatomoHandler)
+        server.requests = []
+        server.issued = 0
+        server.valid_token = None
+        server.version = "5.1.0"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.server = server
+        host, port = server.server_address
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = os.path.join(tmp.name, "checkpoints")
+        self.config = Config(
+            base_url=f"http://{host}:{port}",
+            admin_user="admin",
+            admin_password="pw",
+            admin_email="admin@example.org",
+            checkpoint_dir=self.directory,
+        )
+
+    def test_rerun_returns_recorded_token_after_one_probe(self) -> None:
+        self.assertEqual(run(self.config), "tok-1")
+
+        checkpoint = CheckpointStore(self.directory).open(self.config.base_url)
+        self.assertTrue(checkpoint.done(INSTALLED))
+        self.assertTrue(checkpoint.done(TOKEN_ISSUED))
+        self.assertEqual(stat.S_IMODE(os.stat(checkpoint.path).st_mode), 0o600)
+
+        self.server.requests.clear()
+        self.assertEqual(run(self.config), "tok-1")
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertIn("token_auth=tok-1", self.server.requests[0])
+
+    def test_revoked_token_is_issued_again(self) -> None:
+        self.assertEqual(run(self.config), "tok-1")
+        self.server.valid_token = None  # token deleted in the Matomo UI
+
+        self.assertEqual(run(self.config), "tok-2")
+        self.assertEqual(run(self.config), "tok-2")
+        self.assertEqual(self.server.issued, 2)
+
+    def test_changed_instance_discards_the_checkpoint(self) -> None:
+        run(self.config)
+        run(self.config)  # the token probe records the version
+        self.server.version = "5.2.0"
+
+        # Still a valid token, but the instance was upgraded: start over.
+        self.assertEqual(run(self.config), "tok-2")
+        checkpoint = CheckpointStore(self.directory).open(self.config.base_url)
+        self.assertEqual(checkpoint.fingerprint["version"], "5.2.0")
+
+    def test_token_description_must_match(self) -> None:
+        run(self.config)
+        self.assertEqual(run(replace(self.config, token_description="other")), "tok-2")
+
+
+if __name__ == "__main__":
+    unittest.main()
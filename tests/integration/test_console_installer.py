@@ -0,0 +1,176 @@
+import json
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from matomo_bootstrap.config import Config, config_from_env_and_args
+from matomo_bootstrap.installers.base import Installer
+from matomo_bootstrap.installers.console import (
+    CommandRunner,
+    ConsoleCommandError,
+    ConsoleInstaller,
+    PASSWORD_ENV,
+    DockerExecRunner,
+    KubectlExecRunner,
+)
+from matomo_bootstrap.probe import INSTALLED_LOGIN, INSTALLER, ProbeResult
+
+_INSTALLED = ProbeResult(INSTALLED_LOGIN, looks_like_matomo=True)
+_WELCOME = ProbeResult(INSTALLER, looks_like_matomo=True, installer_step="welcome")
+
+# Stands in for Matomo's console: `help <command>` and `matomo:install`.
+_FAKE_CONSOLE = textwrap.dedent(
+    """
+    import json, os, sys, time
+
+    args = sys.argv[1:]
+    record = os.environ["FAKE_CONSOLE_RECORD"]
+    password = os.environ.get("MATOMO_FIRST_USER_PASSWORD")
+    with open(record, "a") as f:
+        f.write(json.dumps({"args": args, "password": password}) + "\\n")
+    if args[0] == "help":
+        if os.environ.get("FAKE_CONSOLE_NO_INSTALL"):
+            print('Command "matomo:install" is not defined.')
+            sys.exit(1)
+        sys.exit(0)
+    print("Installing Matomo...", flush=True)
+    time.sleep(float(os.environ.get("FAKE_CONSOLE_SLEEP", "0")))
+    print("Matomo installed", flush=True)
+    """
+)
+
+
+class _StdinEnvRunner(CommandRunner):
+    """Local runner that hands `env` over stdin like the exec runners."""
+
+    env_via_stdin = True
+
+
+class _RecordingFallback(Installer):
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def ensure_installed(self, config, state=None, deadline=None):
+        self.calls += 1
+        return _INSTALLED
+
+
+class TestConsoleInstaller(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.console = os.path.join(tmp.name, "console")
+        with open(self.console, "w") as f:
+            f.write(_FAKE_CONSOLE)
+        self.record = os.path.join(tmp.name, "calls.jsonl")
+        for name in ("FAKE_CONSOLE_NO_INSTALL", "FAKE_CONSOLE_SLEEP"):
+            self.addCleanup(os.environ.pop, name, None)
+        os.environ["FAKE_CONSOLE_RECORD"] = self.record
+        self.addCleanup(os.environ.pop, "FAKE_CONSOLE_RECORD", None)
+
+        self.config = Config(
+            base_url="http://matomo.test",
+            admin_user="admin",
+            admin_password="secret",
+            admin_email="admin@example.org",
+        )
+        self.fallback = _RecordingFallback()
+
+    def _installer(self, runner=CommandRunner, **kwargs) -> ConsoleInstaller:
+        def probe(base_url, timeout=5):
+            installed = any(call[0] == "matomo:install" for call in self._calls())
+            return _INSTALLED if installed else _WELCOME
+
+        return ConsoleInstaller(
+            runner(self.console, php=sys.executable),
+            fallback=self.fallback,
+            probe=probe,
+            **kwargs,
+        )
+
+    def _records(self) -> list:
+        with open(self.record) as f:
+            return [json.loads(line) for line in f]
+
+    def _calls(self) -> list:
+        return [record["args"] for record in self._records()]
+
+    def test_installs_through_the_console(self) -> None:
+        state = self._installer().ensure_installed(self.config, state=_WELCOME)
+
+        self.assertTrue(state.installed)
+        self.assertEqual(self.fallback.calls, 0)
+        install = self._calls()[-1]
+        self.assertEqual(install[0], "matomo:install")
+        self.assertIn("--first-user=admin", install)
+        self.assertNotIn("secret", " ".join(install))
+        self.assertEqual(self._records()[-1]["password"], "secret")
+
+    def test_password_is_sent_over_stdin_to_exec_runners(self) -> None:
+        installer = self._installer(runner=_StdinEnvRunner)
+
+        state = installer.ensure_installed(self.config, state=_WELCOME)
+
+        self.assertTrue(state.installed)
+        self.assertEqual(self._records()[-1]["password"], "secret")
+        argv = installer.runner.command(
+            installer.install_args(self.config), [PASSWORD_ENV]
+        )
+        self.assertNotIn("secret", " ".join(argv))
+
+    def test_missing_install_command_falls_back(self) -> None:
+        os.environ["FAKE_CONSOLE_NO_INSTALL"] = "1"
+
+        state = self._installer().ensure_installed(self.config, state=_WELCOME)
+
+        self.assertTrue(state.installed)
+        self.assertEqual(self.fallback.calls, 1)
+        self.assertEqual([call[0] for call in self._calls()], ["help"])
+
+    def test_slow_command_times_out(self) -> None:
+        os.environ["FAKE_CONSOLE_SLEEP"] = "10"
+
+        with self.assertRaises(ConsoleCommandError) as ctx:
+            self._installer(timeout_s=0.5).ensure_installed(self.config, state=_WELCOME)
+
+        self.assertIn("timed out", str(ctx.exception))
+        self.assertNotIn("secret", str(ctx.exception))
+
+    def test_exec_runners_wrap_the_console_command(self) -> None:
+        self.assertEqual(
+            DockerExecRunner("matomo").command(["help"]),
+            ["docker", "exec", "--user", "www-data", "matomo", "php"]
+            + ["/var/www/html/console", "help"],
+        )
+        self.assertEqual(
+            KubectlExecRunner("deploy/matomo", namespace="web").command(["help"]),
+            ["kubectl", "exec", "--namespace", "web", "deploy/matomo", "--", "php"]
+            + ["/var/www/html/console", "help"],
+        )
+        self.assertEqual(
+            DockerExecRunner("matomo").command(["help"], [PASSWORD_ENV])[:6],
+            ["docker", "exec", "--interactive", "--user", "www-data", "matomo"],
+        )
+
+    def test_console_installer_is_opt_in(self) -> None:
+        args = SimpleNamespace(
+            base_url="http://matomo.test",
+            admin_user="admin",
+            admin_password="secret",
+            admin_email="admin@example.org",
+            matomo_container_name="matomo",
+        )
+        with mock.patch.dict(os.environ):
+            os.environ.pop("MATOMO_INSTALLER", None)
+            self.assertNotEqual(config_from_env_and_args(args).installer, "console")
+
+            args.installer = "console"
+            self.assertEqual(config_from_env_and_args(args).installer, "console")
+
+
+if __name__ == "__main__":
+    unittest.main()
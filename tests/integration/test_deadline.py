@@ -0,0 +1,74 @@
+import socket
+import time
+import unittest
+
+from matomo_bootstrap.config import Config
+from matomo_bootstrap.deadline import Deadline
+from matomo_bootstrap.errors import DeadlineExceededError
+from matomo_bootstrap.installers.web import WebInstaller, wait_http
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _closed_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+class TestDeadline(unittest.TestCase):
+    def test_clamps_waits_and_names_the_phase_that_ran_out(self) -> None:
+        clock = _FakeClock()
+        deadline = Deadline(10, clock=clock)
+
+        with deadline.phase("probe"):
+            clock.now += 4
+        self.assertEqual(deadline.clamp(30), 6)
+        self.assertEqual(deadline.clamp(2), 2)
+
+        with self.assertRaises(DeadlineExceededError) as ctx:
+            with deadline.phase("install"):
+                clock.now += 7
+                deadline.check()
+
+        message = str(ctx.exception)
+        self.assertIn("phase 'install'", message)
+        self.assertIn("probe=4.0s", message)
+        self.assertEqual(deadline.spent["install"], 7)
+
+    def test_unlimited_budget_never_expires(self) -> None:
+        deadline = Deadline()
+
+        self.assertFalse(deadline.expired)
+        self.assertEqual(deadline.clamp(180), 180)
+
+    def test_wait_http_stops_at_the_deadline(self) -> None:
+        deadline = Deadline(0.3)
+        started = time.monotonic()
+
+        with self.assertRaises(DeadlineExceededError):
+            with deadline.phase("wait-http"):
+                wait_http(_closed_url(), timeout=180, deadline=deadline)
+
+        self.assertLess(time.monotonic() - started, 1.5)
+
+    def test_installer_reports_the_exhausted_phase(self) -> None:
+        config = Config(
+            base_url=_closed_url(),
+            admin_user="admin",
+            admin_password="pw",
+            admin_email="admin@example.org",
+        )
+
+        with self.assertRaisesRegex(DeadlineExceededError, "install:wait-http"):
+            WebInstaller().ensure_installed(config, deadline=Deadline(0.2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+import json
+import socket
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+from matomo_bootstrap.config import Config, config_from_env_and_args
+from matomo_bootstrap.endpoints import EndpointSelector
+from matomo_bootstrap.probe import ERRORING, INSTALLED_LOGIN, UNREACHABLE, ProbeResult
+from matomo_bootstrap.service import run
+
+
+class _ReplicaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args) -> None:
+        return None
+
+    def _send(self, body: str) -> None:
+        time.sleep(self.server.delay_s)
+        payload = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except ConnectionError:
+            pass
+
+    def do_GET(self) -> None:
+        self.server.paths.append(self.path)
+        self._send(json.dumps({"value": "5.1.0"}))
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length") or "0"))
+        self.server.paths.append(self.path)
+        if self.server.drop_posts:
+            # Degraded mid-run: hang up without answering.
+            self.close_connection = True
+            return
+        self._send(json.dumps({"value": "tok"}))
+
+
+def _closed_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+class TestEndpointSelector(unittest.TestCase):
+    def _serve(self, delay_s: float = 0.0, drop_posts: bool = False):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _ReplicaHandler)
+        server.daemon_threads = True
+        server.paths = []
+        server.delay_s = delay_s
+        server.drop_posts = drop_posts
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        host, port = server.server_address
+        return server, f"http://{host}:{port}"
+
+    def test_picks_fastest_healthy_replica_without_waiting_for_slow_one(self) -> None:
+        _, slow_url = self._serve(delay_s=1.5)
+        _, fast_url = self._serve()
+
+        selector = EndpointSelector([slow_url, fast_url], timeout=5)
+        started = time.monotonic()
+        url, state = selector.select()
+
+        self.assertEqual(url, fast_url)
+        self.assertEqual(state.state, INSTALLED_LOGIN)
+        self.assertLess(time.monotonic() - started, 1.0)
+
+    def test_selection_is_sticky_until_failed(self) -> None:
+        probed: list[str] = []
+
+        def fake_probe(url: str) -> ProbeResult:
+            probed.append(url)
+            return ProbeResult(INSTALLED_LOGIN, looks_like_matomo=True)
+
+        selector = EndpointSelector(["http://a", "http://b"], probe=fake_probe)
+        first, _ = selector.select()
+        probes = len(probed)
+        self.assertEqual(selector.select(), (first, None))
+        self.assertEqual(len(probed), probes)
+
+        self.assertTrue(selector.fail(first, "down"))
+        second, state = selector.select()
+        self.assertNotEqual(second, first)
+        self.assertIsNotNone(state)
+        self.assertFalse(selector.fail(second, "down"))
+
+    def test_prefers_erroring_over_unreachable_and_order_on_ties(self) -> None:
+        states = {
+            "http://a": ProbeResult(UNREACHABLE),
+            "http://b": ProbeResult(ERRORING),
+            "http://c": ProbeResult(ERRORING),
+        }
+        selector = EndpointSelector(list(states), probe=states.__getitem__)
+
+        self.assertEqual(selector.select()[0], "http://b")
+
+    def test_run_skips_unreachable_replica(self) -> None:
+        server, url = self._serve()
+        down = _closed_url()
+        config = Config(
+            base_url=down,
+            admin_user="admin",
+            admin_password="pw",
+            admin_email="admin@example.org",
+            base_urls=(down, url),
+        )
+
+        self.assertEqual(run(config), "tok")
+        self.assertTrue(server.paths)
+
+    def test_run_fails_over_when_selected_replica_degrades(self) -> None:
+        broken, broken_url = self._serve(drop_posts=True)
+        healthy, healthy_url = self._serve(delay_s=0.3)
+        config = Config(
+            base_url=broken_url,
+            admin_user="admin",
+            admin_password="pw",
+            admin_email="admin@example.org",
+            retries=0,
+            base_urls=(broken_url, healthy_url),
+        )
+
+        self.assertEqual(run(config), "tok")
+        self.assertIn("/index.php", broken.paths)
+        self.assertIn("/index.php", healthy.paths)
+
+    def test_config_splits_comma_separated_base_urls(self) -> None:
+        args = SimpleNamespace(
+            base_url="http://a:8080, http://b:8080",
+            admin_user="admin",
+            admin_password="pw",
+            admin_email="admin@example.org",
+        )
+        config = config_from_env_and_args(args)
+
+        self.assertEqual(config.base_url, "http://a:8080")
+        self.assertEqual(config.endpoints, ("http://a:8080", "http://b:8080"))
+
+
+if __name__ == "__main__":
+    unittest.main()
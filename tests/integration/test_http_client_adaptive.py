@@ -0,0 +1,120 @@
+import threading
+import time
+import unittest
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from matomo_bootstrap.adaptive import AdaptiveTimeouts, CircuitBreaker, endpoint_class
+from matomo_bootstrap.errors import CircuitOpenError, MatomoNotReadyError
+from matomo_bootstrap.http import HttpClient
+from matomo_bootstrap.retry import NO_RETRY
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args) -> None:
+        return None
+
+    def do_GET(self) -> None:
+        time.sleep(self.server.delay_s)
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+
+class TestAdaptiveTimeouts(unittest.TestCase):
+    def test_timeout_derives_from_percentile_within_bounds(self) -> None:
+        timeouts = AdaptiveTimeouts(floor_s=1.0, ceiling_s=20.0, min_samples=3)
+        self.assertEqual(timeouts.timeout_for("GET /"), 20.0)
+
+        for elapsed in (0.5, 0.6, 1.0):
+            timeouts.record("GET /", elapsed)
+        self.assertEqual(timeouts.timeout_for("GET /"), 4.0)
+
+        for _ in range(3):
+            timeouts.record("GET /fast", 0.01)
+        self.assertEqual(timeouts.timeout_for("GET /fast"), 1.0)
+
+    def test_endpoint_class_uses_matomo_method_from_body(self) -> None:
+        self.assertEqual(
+            endpoint_class(
+                "POST",
+                "http://m/index.php",
+                b"module=API&method=UsersManager.getUser&userLogin=a",
+            ),
+            "POST /index.php API.UsersManager.getUser",
+        )
+        self.assertEqual(
+            endpoint_class("GET", "http://m/index.php?module=Login&action=logme"),
+            "GET /index.php Login.logme",
+        )
+
+    def test_slow_response_times_out_at_derived_timeout(self) -> None:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        server.daemon_threads = True
+        server.delay_s = 0.0
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        host, port = server.server_address
+        client = HttpClient(
+            f"http://{host}:{port}",
+            timeout=5,
+            retry_policy=NO_RETRY,
+            adaptive_timeouts=AdaptiveTimeouts(floor_s=0.2, ceiling_s=5.0),
+        )
+        self.addCleanup(client.close)
+
+        for _ in range(5):
+            client.get("/", {})
+        server.delay_s = 1.0
+
+        started = time.monotonic()
+        with self.assertRaises(OSError):
+            client.get("/", {})
+        self.assertLess(time.monotonic() - started, 0.9)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_consecutive_failures_and_fails_fast(self) -> None:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        host, port = server.server_address
+        server.server_close()  # nothing listens: connection refused
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=60)
+        client = HttpClient(
+            f"http://{host}:{port}",
+            timeout=5,
+            retry_policy=NO_RETRY,
+            circuit_breaker=breaker,
+        )
+        self.addCleanup(client.close)
+
+        for _ in range(2):
+            with self.assertRaises(urllib.error.URLError):
+                client.get("/", {})
+        with self.assertRaises(CircuitOpenError) as ctx:
+            client.get("/", {})
+
+        self.assertIsInstance(ctx.exception, MatomoNotReadyError)
+        self.assertEqual(len(client.attempts), 2)
+
+    def test_half_open_lets_one_trial_through(self) -> None:
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout_s=0.05)
+        breaker.record(None)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_request("m")
+
+        time.sleep(0.06)
+        breaker.before_request("m")  # trial request
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_request("m")
+
+        breaker.record(200)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        breaker.before_request("m")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import gzip
+import threading
+import unittest
+import urllib.parse
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from matomo_bootstrap.compression import DecodingReader
+from matomo_bootstrap.http import HttpClient
+
+_PAYLOAD = ('{"value":"' + "x" * 5000 + '"}').encode()
+
+
+def _raw_deflate(data: bytes) -> bytes:
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+class _CompressingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args) -> None:
+        return None
+
+    def _send(self, status: int, body: bytes, encoding: str | None) -> None:
+        self.send_response(status)
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        self.server.accept_encoding = self.headers.get("Accept-Encoding")
+        if self.path == "/gzip":
+            self._send(200, gzip.compress(_PAYLOAD), "gzip")
+        elif self.path == "/deflate":
+            self._send(200, zlib.compress(_PAYLOAD), "deflate")
+        elif self.path == "/raw-deflate":
+            self._send(200, _raw_deflate(_PAYLOAD), "deflate")
+        elif self.path == "/gzip-error":
+            self._send(500, gzip.compress(b"server error"), "gzip")
+        else:
+            self._send(200, _PAYLOAD, None)
+
+    def do_POST(self) -> None:
+        raw = self.rfile.read(int(self.headers.get("Content-Length") or "0"))
+        self.server.content_encoding = self.headers.get("Content-Encoding")
+        self.server.wire_length = len(raw)
+        if self.server.content_encoding == "gzip":
+            raw = gzip.decompress(raw)
+        form = urllib.parse.parse_qs(raw.decode())
+        self._send(200, str(len(form["blob"][0])).encode(), None)
+
+
+class TestHttpClientCompression(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _CompressingHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        host, port = self.server.server_address
+        self.base_url = f"http://{host}:{port}"
+
+    def test_negotiates_and_decodes_compressed_responses(self) -> None:
+        with HttpClient(self.base_url, timeout=5) as client:
+            for path in ("/gzip", "/deflate", "/raw-deflate", "/plain"):
+                status, body = client.get(path, {})
+                self.assertEqual(status, 200, path)
+                self.assertEqual(body.encode(), _PAYLOAD, path)
+            self.assertEqual(client.get("/gzip-error", {}), (500, "server error"))
+
+        self.assertEqual(self.server.accept_encoding, "gzip, deflate")
+
+    def test_compresses_large_post_bodies_when_enabled(self) -> None:
+        data = {"blob": "y" * 4000}
+        with HttpClient(
+            self.base_url, timeout=5, compress_requests=True, compress_min_bytes=1024
+        ) as client:
+            self.assertEqual(client.post("/api", data), (200, "4000"))
+            self.assertEqual(self.server.content_encoding, "gzip")
+            self.assertLess(self.server.wire_length, 1024)
+
+            self.assertEqual(client.post("/api", {"blob": "small"}), (200, "5"))
+            self.assertIsNone(self.server.content_encoding)
+
+    def test_post_bodies_are_not_compressed_by_default(self) -> None:
+        with HttpClient(self.base_url, timeout=5) as client:
+            client.post("/api", {"blob": "y" * 4000})
+
+        self.assertIsNone(self.server.content_encoding)
+
+
+class TestDecodingReader(unittest.TestCase):
+    def test_streams_in_bounded_reads(self) -> None:
+        class _Raw:
+            def __init__(self, data: bytes):
+                self._data = data
+
+            def read(self, size: int) -> bytes:
+                chunk, self._data = self._data[:size], self._data[size:]
+                return chunk
+
+        compressed = gzip.compress(_PAYLOAD)
+        reader = DecodingReader(_Raw(compressed), "gzip")
+
+        self.assertEqual(reader.read(10), _PAYLOAD[:10])
+        self.assertEqual(reader.read(), _PAYLOAD[10:])
+        self.assertEqual(reader.raw_bytes, len(compressed))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from matomo_bootstrap.http import HttpClient
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args) -> None:
+        return None
+
+    def _send(self, body: bytes, *, extra_headers=()) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in extra_headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        self.server.connections.add(self.client_address)
+        if self.path.startswith("/login"):
+            self._send(b"ok", extra_headers=[("Set-Cookie", "MATOMO_SESSID=abc")])
+            return
+        if self.path.startswith("/whoami"):
+            self._send((self.headers.get("Cookie") or "").encode())
+            return
+        if self.path.startswith("/drop"):
+            # Server-side idle close without announcing it to the client.
+            self._send(b"dropped")
+            self.close_connection = True
+            return
+        if self.path.startswith("/close"):
+            self._send(b"bye", extra_headers=[("Connection", "close")])
+            self.close_connection = True
+            return
+        self._send(b"hello")
+
+    def do_POST(self) -> None:
+        self.server.connections.add(self.client_address)
+        length = int(self.headers.get("Content-Length") or "0")
+        body = self.rfile.read(length)
+        if self.path.startswith("/vanish"):
+            # Processed, but the connection drops before the response.
+            self.server.vanished += 1
+            self.close_connection = True
+            return
+        self._send(body)
+
+
+class TestHttpClientKeepAlive(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+        self.server.connections = set()
+        self.server.vanished = 0
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        host, port = self.server.server_address
+        self.client = HttpClient(f"http://{host}:{port}", timeout=5)
+
+    def tearDown(self) -> None:
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_reuses_connection_across_requests(self) -> None:
+        self.assertEqual(self.client.get("/", {}), (200, "hello"))
+        self.assertEqual(self.client.post("/echo", {"a": "1"}), (200, "a=1"))
+        self.assertEqual(self.client.get("/", {}), (200, "hello"))
+
+        self.assertEqual(self.client.stats.connections_opened, 1)
+        self.assertEqual(self.client.stats.connections_reused, 2)
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_keeps_cookie_semantics(self) -> None:
+        self.client.get("/login", {})
+        status, body = self.client.get("/whoami", {})
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body, "MATOMO_SESSID=abc")
+
+    def test_connection_close_response_is_not_reused(self) -> None:
+        self.assertEqual(self.client.get("/close", {}), (200, "bye"))
+        self.assertEqual(self.client.get("/", {}), (200, "hello"))
+
+        self.assertEqual(self.client.stats.connections_opened, 2)
+        self.assertEqual(self.client.stats.connections_reused, 0)
+
+    def test_detects_stale_idle_connection(self) -> None:
+        self.assertEqual(self.client.get("/drop", {}), (200, "dropped"))
+        time.sleep(0.05)
+        self.assertEqual(self.client.get("/", {}), (200, "hello"))
+
+        self.assertEqual(self.client.stats.connections_opened, 2)
+        self.assertEqual(self.client.stats.connections_reused, 0)
+        self.assertEqual(self.client.stats.connections_discarded, 1)
+
+    def test_post_is_not_replayed_after_reused_connection_drops(self) -> None:
+        self.assertEqual(self.client.get("/", {}), (200, "hello"))
+
+        with self.assertRaises(OSError):
+            self.client.post("/vanish", {"a": "1"})
+
+        self.assertEqual(self.server.vanished, 1)
+        self.assertEqual(self.client.stats.connections_opened, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from matomo_bootstrap.http import HttpClient
+from matomo_bootstrap.retry import RetryBudget, RetryPolicy, parse_retry_after
+
+_FAST_POLICY = RetryPolicy(max_attempts=4, backoff_base_s=0.001, backoff_max_s=0.01)
+
+
+class _ScriptedHandler(BaseHTTPRequestHandler):
+    """
+    Answers each path with the next (status, body, headers) from a script;
+    the last entry repeats once the script is exhausted.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args) -> None:
+        return None
+
+    def _respond(self) -> None:
+        length = int(self.headers.get("Content-Length") or "0")
+        if length:
+            self.rfile.read(length)
+        script = self.server.scripts[self.path.split("?")[0]]
+        hits = self.server.hits.get(self.path, 0)
+        self.server.hits[self.path] = hits + 1
+        status, body, headers = script[min(hits, len(script) - 1)]
+        payload = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = _respond
+    do_POST = _respond
+
+
+class TestHttpClientRetry(unittest.TestCase):
+    def _serve(self, scripts) -> HttpClient:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _ScriptedHandler)
+        server.scripts = scripts
+        server.hits = {}
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.server = server
+        host, port = server.server_address
+        client = HttpClient(
+            f"http://{host}:{port}", timeout=5, retry_policy=_FAST_POLICY
+        )
+        self.addCleanup(client.close)
+        return client
+
+    def test_get_retries_transient_gateway_errors(self) -> None:
+        client = self._serve(
+            {"/": [(502, "bad gateway", []), (503, "warming up", []), (200, "ok", [])]}
+        )
+
+        self.assertEqual(client.get("/", {}), (200, "ok"))
+        self.assertEqual([a.status for a in client.attempts], [502, 503, 200])
+        self.assertIsNotNone(client.attempts[0].retry_delay_s)
+        self.assertIsNone(client.attempts[-1].retry_delay_s)
+
+    def test_post_is_not_retried_on_500(self) -> None:
+        client = self._serve({"/index.php": [(500, "boom", []), (200, "ok", [])]})
+
+        self.assertEqual(client.post("/index.php", {"a": "1"}), (500, "boom"))
+        self.assertEqual(len(client.attempts), 1)
+
+    def test_post_is_not_retried_on_a_gateway_error(self) -> None:
+        # The backend may have created the token before the proxy gave up.
+        client = self._serve(
+            {"/index.php": [(502, "bad gateway", []), (200, "ok", [])]}
+        )
+
+        self.assertEqual(client.post("/index.php", {"a": "1"}), (502, "bad gateway"))
+        self.assertEqual(self.server.hits["/index.php"], 1)
+
+    def test_get_is_retried_during_maintenance_mode(self) -> None:
+        client = self._serve(
+            {
+                "/index.php": [
+                    (
+                        503,
+                        "Matomo is in scheduled maintenance. Please come back later.",
+                        [("Retry-After", "0")],
+                    ),
+                    (200, '{"value":"token"}', []),
+                ]
+            }
+        )
+
+        status, body = client.get("/index.php", {"a": "1"})
+
+        self.assertEqual((status, body), (200, '{"value":"token"}'))
+        # Retry-After overrides the maintenance default delay.
+        self.assertEqual(client.attempts[0].retry_delay_s, 0.0)
+
+    def test_gives_up_after_max_attempts(self) -> None:
+        client = self._serve({"/": [(503, "down", [])]})
+
+        self.assertEqual(client.get("/", {}), (503, "down"))
+        self.assertEqual(len(client.attempts), _FAST_POLICY.max_attempts)
+
+    def test_retry_budget_limits_retries(self) -> None:
+        client = self._serve({"/": [(503, "down", [])]})
+        client.retry_budget = RetryBudget(ratio=0.0, min_retries=1)
+
+        client.get("/", {})
+        client.get("/", {})
+
+        self.assertEqual(self.server.hits["/"], 3)
+
+    def test_connection_refused_is_retried_then_raised(self) -> None:
+        client = self._serve({"/": [(200, "ok", [])]})
+        self.server.shutdown()
+        self.server.server_close()
+
+        with self.assertRaises(OSError):
+            client.post("/", {})
+        self.assertEqual(len(client.attempts), _FAST_POLICY.max_attempts)
+        self.assertIn("Connection refused", client.attempts[0].error)
+
+
+class TestParseRetryAfter(unittest.TestCase):
+    def test_parses_seconds_and_http_date(self) -> None:
+        self.assertEqual(parse_retry_after("7"), 7.0)
+        self.assertEqual(
+            parse_retry_after("Thu, 01 Jan 1970 00:00:10 GMT", now=4.0), 6.0
+        )
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import gzip
+import threading
+import tracemalloc
+import unittest
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from matomo_bootstrap.http import HttpClient
+from matomo_bootstrap.retry import RetryPolicy
+
+_BIG_PAGE = b"<html><head><title>Matomo</title></head>" + b"x" * 500_000
+
+
+def _gzip_bomb(megabytes: int) -> bytes:
+    """A small gzip body that inflates to `megabytes` MiB of zeros."""
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    zeros = bytes(1 << 20)
+    return b"".join(compressor.compress(zeros) for _ in range(megabytes)) + (
+        compressor.flush()
+    )
+
+
+_GZIP_BOMB = _gzip_bomb(128)
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args) -> None:
+        return None
+
+    def _send(self, status: int, body: bytes, encoding: str | None = None) -> None:
+        self.send_response(status)
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_GET(self) -> None:
+        if self.path == "/big":
+            self._send(200, _BIG_PAGE)
+        elif self.path == "/big-gzip":
+            self._send(200, gzip.compress(_BIG_PAGE), "gzip")
+        elif self.path == "/gzip-bomb":
+            self._send(200, _GZIP_BOMB, "gzip")
+        elif self.path == "/error":
+            self._send(500, b"fatal error: " + b"y" * 1000)
+        else:
+            self._send(200, b"small")
+
+
+class TestHttpClientStream(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _PageHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        host, port = self.server.server_address
+        self.client = HttpClient(
+            f"http://{host}:{port}", timeout=5, retry_policy=RetryPolicy(max_attempts=1)
+        )
+        self.addCleanup(self.client.close)
+
+    def test_max_bytes_caps_body_and_reports_truncation(self) -> None:
+        with self.client.stream("GET", "/big", max_bytes=1024) as resp:
+            body = resp.read()
+
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(body, _BIG_PAGE[:1024])
+        self.assertTrue(resp.truncated)
+        self.assertLess(resp.raw_bytes, len(_BIG_PAGE))
+
+    def test_cap_applies_to_decoded_bytes(self) -> None:
+        with self.client.stream("GET", "/big-gzip", max_bytes=100) as resp:
+            chunks = list(resp.iter_chunks(chunk_size=32))
+
+        self.assertEqual(b"".join(chunks), _BIG_PAGE[:100])
+        self.assertTrue(all(len(c) <= 32 for c in chunks))
+
+    def test_capped_stream_inflates_in_bounded_steps(self) -> None:
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        with self.client.stream("GET", "/gzip-bomb", max_bytes=1 << 20) as resp:
+            size = sum(len(c) for c in resp.iter_chunks())
+        _, peak = tracemalloc.get_traced_memory()
+
+        self.assertEqual(size, 1 << 20)
+        self.assertTrue(resp.truncated)
+        self.assertLess(resp.raw_bytes, len(_GZIP_BOMB))
+        self.assertLess(peak, 8 << 20)
+
+    def test_http_error_body_is_streamed(self) -> None:
+        with self.client.stream("GET", "/error", max_bytes=11) as resp:
+            self.assertEqual(resp.status, 500)
+            self.assertEqual(resp.text(), "fatal error")
+
+    def test_early_close_drops_connection_but_full_read_reuses_it(self) -> None:
+        with self.client.stream("GET", "/big") as resp:
+            resp.read(10)
+        with self.client.stream("GET", "/small") as resp:
+            self.assertEqual(resp.read(), b"small")
+            self.assertFalse(resp.truncated)
+        self.assertEqual(self.client.get("/small", {}), (200, "small"))
+
+        stats = self.client.stats
+        self.assertEqual(stats.connections_opened, 2)
+        self.assertEqual(stats.connections_reused, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
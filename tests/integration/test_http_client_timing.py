@@ -0,0 +1,90 @@
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from matomo_bootstrap.http import HttpClient
+from matomo_bootstrap.retry import NO_RETRY
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args) -> None:
+        return None
+
+    def _respond(self) -> None:
+        length = int(self.headers.get("Content-Length") or "0")
+        if length:
+            self.rfile.read(length)
+        if self.path.startswith("/slow"):
+            time.sleep(0.2)
+        payload = b"x" * 1000
+        self.send_response(404 if self.path.startswith("/missing") else 200)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = _respond
+    do_POST = _respond
+
+
+class TestHttpClientTiming(unittest.TestCase):
+    def setUp(self) -> None:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.server = server
+        host, port = server.server_address
+        self.client = HttpClient(f"http://{host}:{port}", timeout=5)
+        self.addCleanup(self.client.close)
+        self.timings = []
+        self.client.add_timing_hook(self.timings.append)
+
+    def test_reports_connect_phases_then_reuse(self) -> None:
+        self.client.get("/slow", {})
+        self.client.post("/fast", {"a": "1"})
+
+        first, second = self.timings
+        self.assertEqual(first.status, 200)
+        self.assertFalse(first.reused_connection)
+        self.assertIsNotNone(first.dns_s)
+        self.assertIsNotNone(first.connect_s)
+        self.assertIsNone(first.tls_s)
+        self.assertGreaterEqual(first.ttfb_s, 0.2)
+        self.assertGreaterEqual(first.total_s, first.ttfb_s)
+        self.assertEqual((first.response_bytes, first.body_bytes), (1000, 1000))
+
+        self.assertTrue(second.reused_connection)
+        self.assertIsNone(second.connect_s)
+        self.assertEqual(second.method, "POST")
+        self.assertEqual(second.request_bytes, len(b"a=1"))
+        self.assertLess(second.ttfb_s, 0.2)
+
+    def test_error_statuses_and_streams_are_reported(self) -> None:
+        self.client.get("/missing", {})
+        with self.client.stream("GET", "/fast", max_bytes=10) as resp:
+            resp.read()
+        # The streamed record is only delivered once the response is closed.
+        self.assertEqual([t.status for t in self.timings], [404, 200])
+        self.assertEqual(self.timings[1].body_bytes, 10)
+
+    def test_connection_failure_is_reported_and_hook_errors_ignored(self) -> None:
+        def broken_hook(_timing) -> None:
+            raise RuntimeError("hook bug")
+
+        self.client.add_timing_hook(broken_hook)
+        self.client.retry_policy = NO_RETRY
+        self.server.shutdown()
+        self.server.server_close()
+
+        with self.assertRaises(OSError):
+            self.client.get("/", {})
+        (timing,) = self.timings
+        self.assertIsNone(timing.status)
+        self.assertIn("Connection refused", timing.error)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import asyncio
+import os
+import socketserver
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler
+
+from matomo_bootstrap.async_http import AsyncHttpClient
+from matomo_bootstrap.config import Config
+from matomo_bootstrap.errors import BootstrapError
+from matomo_bootstrap.health import assert_matomo_ready
+from matomo_bootstrap.http import HttpClient
+from matomo_bootstrap.installers.web import WebInstaller, is_installed, wait_http
+from matomo_bootstrap.uds import split_unix_base_url
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args) -> None:
+        return None
+
+    def _respond(self) -> None:
+        length = int(self.headers.get("Content-Length") or "0")
+        if length:
+            self.rfile.read(length)
+        self.server.seen.append((self.command, self.path, dict(self.headers)))
+        page = self.server.page.encode()
+        self.send_response(200)
+        self.send_header("Set-Cookie", "MATOMO_SESSID=abc; Path=/")
+        self.send_header("Content-Length", str(len(page)))
+        self.end_headers()
+        self.wfile.write(page)
+
+    do_GET = _respond
+    do_POST = _respond
+
+
+class TestHttpClientUnixSocket(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.socket_path = os.path.join(tmp.name, "nginx.sock")
+        server = socketserver.ThreadingUnixStreamServer(self.socket_path, _Handler)
+        server.daemon_threads = True
+        server.seen = []
+        server.page = '<a href="index.php?module=Login">Matomo</a>'
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.server = server
+        self.base_url = f"unix://{self.socket_path}:/matomo"
+
+    def test_split_unix_base_url(self) -> None:
+        self.assertEqual(
+            split_unix_base_url("unix:///run/nginx.sock:/"),
+            ("/run/nginx.sock", "http://localhost/"),
+        )
+        self.assertEqual(
+            split_unix_base_url("unix:///run/nginx.sock"),
+            ("/run/nginx.sock", "http://localhost/"),
+        )
+        with self.assertRaises(ValueError):
+            split_unix_base_url("unix://relative.sock:/")
+
+    def test_get_post_and_cookies_over_socket(self) -> None:
+        with HttpClient(self.base_url, timeout=5) as client:
+            status, body = client.get("/index.php", {"module": "Login"})
+            client.post("/index.php", {"a": "1"})
+
+            self.assertEqual(status, 200)
+            self.assertIn("Matomo", body)
+            self.assertEqual(client.stats.connections_opened, 1)
+
+        (_, first_path, first_headers), (method, _, second_headers) = self.server.seen
+        self.assertEqual(first_path, "/matomo/index.php?module=Login")
+        self.assertEqual(first_headers["Host"], "localhost")
+        self.assertEqual(method, "POST")
+        self.assertEqual(second_headers["Cookie"], "MATOMO_SESSID=abc")
+
+    def test_readiness_helpers_over_socket(self) -> None:
+        assert_matomo_ready(self.base_url, timeout=5)
+        wait_http(self.base_url, timeout=5)
+        self.assertTrue(is_installed(self.base_url))
+
+    def test_async_client_over_socket(self) -> None:
+        async def fetch():
+            async with AsyncHttpClient(self.base_url, timeout=5) as client:
+                return await client.get("/", {})
+
+        status, body = asyncio.run(fetch())
+        self.assertEqual(status, 200)
+        self.assertIn("Matomo", body)
+
+    def test_browser_installer_refuses_socket(self) -> None:
+        self.server.page = "<title>Matomo Installation</title>"
+        config = Config(
+            base_url=self.base_url,
+            admin_user="admin",
+            admin_password="pw",
+            admin_email="admin@example.org",
+        )
+
+        with self.assertRaisesRegex(BootstrapError, "Unix socket"):
+            WebInstaller().ensure_installed(config)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,300 @@
+import json
+import threading
+import unittest
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from matomo_bootstrap.config import Config
+from matomo_bootstrap.installers.base import Installer
+from matomo_bootstrap.http import HttpClient
+from matomo_bootstrap.installers.http import (
+    HttpInstaller,
+    InstallerFormError,
+    _instance_path,
+)
+from matomo_bootstrap.installers.web import INSTALLER_TABLES_CREATION_TIMEOUT_S
+from matomo_bootstrap.probe import INSTALLED_LOGIN, ProbeResult
+
+_NONCE = "n0nc3"
+
+
+def _installer_page(body: str) -> str:
+    return (
+        "<html><head><title>Matomo › Installation</title></head><body>"
+        f"<div id='installation'>{body}</div></body></html>"
+    )
+
+
+class _InstallerHandler(BaseHTTPRequestHandler):
+    """Matomo's Installation controller, reduced to what the installer posts."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args) -> None:
+        return None
+
+    def _send(self, body: str, content_type: str = "text/html", cookie=None) -> None:
+        payload = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        if cookie:
+            self.send_header("Set-Cookie", cookie)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _redirect(self, location: str) -> None:
+        self.send_response(302)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _action(self) -> tuple[str, dict]:
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        return (query.get("action") or ["welcome"])[0], query
+
+    def _has_session(self) -> bool:
+        return "MATOMO_SESSID=s1" in (self.headers.get("Cookie") or "")
+
+    def do_GET(self) -> None:
+        server = self.server
+        action, query = self._action()
+        server.requests.append(("GET", action))
+        if server.installed:
+            if query.get("method") == ["API.getMatomoVersion"]:
+                self._send(json.dumps({"value": "5.1.0"}), "application/json")
+            else:
+                self._send("<title>Matomo › Login</title><a href='?module=Login'>")
+            return
+        if action != "welcome" and not self._has_session():
+            self._send(_installer_page("<p class='error'>Session expired</p>"))
+            return
+
+        if action == "welcome":
+            self._send(
+                _installer_page("<a href='index.php?action=systemCheck'>Next »</a>"),
+                cookie="MATOMO_SESSID=s1; Path=/",
+            )
+        elif action == "systemCheck":
+            if server.unknown_system_check:
+                self._send(_installer_page("<button onclick='go()'>Go</button>"))
+            else:
+                self._send(
+                    _installer_page(
+                        "<a href='index.php?action=databaseSetup' class='btn'>"
+                        "Next »</a>"
+                    )
+                )
+        elif action == "databaseSetup":
+            self._send(
+                _installer_page(
+                    "<form id='databasesetupform' method='post' "
+                    "action='index.php?action=databaseSetup'>"
+                    "<input name='host' value='db'>"
+                    "<input type='hidden' name='_qf__databasesetupform' value=''>"
+                    "<input type='submit' value='Next »'></form>"
+                )
+            )
+        elif action == "tablesCreation":
+            if query.get("deleteTables") == ["1"]:
+                server.tables_exist = False
+            if server.tables_exist:
+                body = (
+                    "<p>Existing tables detected.</p><a id='eraseAllTables' "
+                    "href='index.php?action=tablesCreation&amp;deleteTables=1'>"
+                    "Delete the detected tables »</a>"
+                )
+            else:
+                body = (
+                    "<p>Tables created</p>"
+                    "<a href='index.php?action=setupSuperUser'>Next »</a>"
+                )
+            self._send(_installer_page(body))
+        elif action == "setupSuperUser":
+            self._send(_installer_page(self._superuser_form()))
+        elif action == "firstWebsiteSetup":
+            self._send(
+                _installer_page(
+                    "<form id='websitesetupform' method='post' "
+                    "action='index.php?action=firstWebsiteSetup'>"
+                    "<input name='siteName'><input name='url'>"
+                    "<select name='timezone'><option value='UTC'>UTC</option>"
+                    "<option value='Europe/Berlin'>Germany - Berlin</option></select>"
+                    "<select name='ecommerce'><option value='0'>Not an Ecommerce "
+                    "site</option><option value='1'>Ecommerce enabled</option>"
+                    "</select><input type='submit' value='Next »'></form>"
+                )
+            )
+        elif action == "trackingCode":
+            self._send(
+                _installer_page("<a href='index.php?action=finished'>Next »</a>")
+            )
+        elif action == "finished":
+            self._send(
+                _installer_page(
+                    "<form id='defaultsettingsform' method='post' "
+                    "action='index.php?action=finished'>"
+                    "<input type='checkbox' name='do_not_track' value='1' checked>"
+                    "<input type='submit' value='Continue to Matomo »'></form>"
+                )
+            )
+        else:
+            self.send_error(404)
+
+    def _superuser_form(self, error: str = "") -> str:
+        alert = f"<div class='alert alert-danger'>{error}</div>" if error else ""
+        return (
+            f"{alert}<form id='generalsetupform' method='post' "
+            "action='index.php?action=setupSuperUser'>"
+            f"<input type='hidden' name='nonce' value='{_NONCE}'>"
+            "<input name='login'><input type='password' name='password'>"
+            "<input type='password' name='password_bis'><input name='email'>"
+            "<input type='submit' name='submit' value='Next »'></form>"
+        )
+
+    def do_POST(self) -> None:
+        server = self.server
+        action, _ = self._action()
+        length = int(self.headers.get("Content-Length") or "0")
+        body = self.rfile.read(length).decode()
+        form = dict(urllib.parse.parse_qsl(body, keep_blank_values=True))
+        server.requests.append(("POST", action))
+        server.posted[action] = form
+        if not self._has_session():
+            self._send(_installer_page("<p class='error'>Session expired</p>"))
+            return
+
+        if action == "databaseSetup":
+            self._redirect("index.php?action=tablesCreation")
+        elif action == "setupSuperUser":
+            if form.get("nonce") != _NONCE:
+                self._send(_installer_page(self._superuser_form("Invalid nonce")))
+            elif "@" not in form.get("email", ""):
+                self._send(
+                    _installer_page(
+                        self._superuser_form("The email doesn't have a valid format.")
+                    )
+                )
+            else:
+                self._redirect("index.php?action=firstWebsiteSetup")
+        elif action == "firstWebsiteSetup":
+            self._redirect("index.php?action=trackingCode")
+        elif action == "finished":
+            server.installed = True
+            self._redirect("index.php")
+        else:
+            self.send_error(404)
+
+
+class _RecordingFallback(Installer):
+    def __init__(self) -> None:
+        self.calls = []
+
+    def ensure_installed(self, config, state=None, deadline=None):
+        self.calls.append(state)
+        return ProbeResult(INSTALLED_LOGIN, looks_like_matomo=True)
+
+
+class TestHttpInstaller(unittest.TestCase):
+    def setUp(self) -> None:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _InstallerHandler)
+        server.requests = []
+        server.posted = {}
+        server.installed = False
+        server.tables_exist = False
+        server.unknown_system_check = False
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.server = server
+        host, port = server.server_address
+        self.config = Config(
+            base_url=f"http://{host}:{port}",
+            admin_user="admin",
+            admin_password="secret",
+            admin_email="admin@example.org",
+        )
+        self.fallback = _RecordingFallback()
+        self.installer = HttpInstaller(fallback=self.fallback)
+
+    def test_installs_with_form_posts(self) -> None:
+        self.server.tables_exist = True
+
+        state = self.installer.ensure_installed(self.config)
+
+        self.assertTrue(state.installed)
+        self.assertEqual(state.version, "5.1.0")
+        self.assertEqual(self.fallback.calls, [])
+        self.assertIn(("GET", "tablesCreation"), self.server.requests)
+        self.assertFalse(self.server.tables_exist)
+
+        superuser = self.server.posted["setupSuperUser"]
+        self.assertEqual(superuser["login"], "admin")
+        self.assertEqual(superuser["password_bis"], "secret")
+        self.assertEqual(superuser["submit"], "Next »")
+        self.assertIn("_qf__databasesetupform", self.server.posted["databaseSetup"])
+        website = self.server.posted["firstWebsiteSetup"]
+        self.assertEqual(website["timezone"], "Europe/Berlin")
+        self.assertEqual(website["ecommerce"], "1")
+        self.assertEqual(self.server.posted["finished"], {"do_not_track": "1"})
+
+    def test_only_table_creation_gets_the_long_timeout(self) -> None:
+        timeouts = {}
+        stream = HttpClient.stream
+
+        def recording_stream(client, method, path, *args, **kwargs):
+            action = urllib.parse.parse_qs(urllib.parse.urlsplit(path).query).get(
+                "action", ["welcome"]
+            )[0]
+            timeouts[(method, action)] = kwargs.get("timeout")
+            return stream(client, method, path, *args, **kwargs)
+
+        with mock.patch.object(HttpClient, "stream", recording_stream):
+            self.installer.ensure_installed(self.config)
+
+        slow = {key for key, timeout in timeouts.items() if timeout is not None}
+        self.assertEqual(slow, {("POST", "databaseSetup")})
+        self.assertEqual(
+            timeouts[("POST", "databaseSetup")], INSTALLER_TABLES_CREATION_TIMEOUT_S
+        )
+        self.assertIsNone(timeouts[("POST", "setupSuperUser")])
+
+    def test_validation_errors_are_reported(self) -> None:
+        config = Config(
+            base_url=self.config.base_url,
+            admin_user="admin",
+            admin_password="secret",
+            admin_email="not-an-email",
+        )
+
+        with self.assertRaises(InstallerFormError) as ctx:
+            self.installer.ensure_installed(config)
+
+        self.assertIn("doesn't have a valid format", str(ctx.exception))
+        self.assertEqual(self.fallback.calls, [])
+
+    def test_unknown_page_falls_back(self) -> None:
+        self.server.unknown_system_check = True
+
+        state = self.installer.ensure_installed(self.config)
+
+        self.assertTrue(state.installed)
+        self.assertEqual(len(self.fallback.calls), 1)
+        self.assertEqual(self.fallback.calls[0].installer_step, "welcome")
+
+    def test_links_are_matched_by_origin_and_base_path(self) -> None:
+        base = "http://matomo.test/analytics"
+
+        self.assertEqual(
+            _instance_path(base, "HTTP://Matomo.test:80/analytics/index.php?a=1"),
+            "/index.php?a=1",
+        )
+        self.assertEqual(_instance_path(base, "http://matomo.test/analytics"), "/")
+        self.assertIsNone(_instance_path(base, "http://matomo.test/analytics2/"))
+        self.assertIsNone(_instance_path(base, "http://matomo.test:8080/analytics/"))
+        self.assertIsNone(_instance_path(base, "http://matomo.test.evil/analytics/"))
+
+
+if __name__ == "__main__":
+    unittest.main()
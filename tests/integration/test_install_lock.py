@@ -0,0 +1,114 @@
+import tempfile
+import threading
+import time
+import unittest
+from dataclasses import replace
+
+from matomo_bootstrap.config import Config
+from matomo_bootstrap.deadline import Deadline
+from matomo_bootstrap.installers.base import Installer
+from matomo_bootstrap.installers.lock import (
+    FileInstallLock,
+    LockedInstaller,
+    build_install_lock,
+)
+from matomo_bootstrap.probe import INSTALLED_LOGIN, INSTALLER, ProbeResult
+
+_INSTALLED = ProbeResult(INSTALLED_LOGIN, looks_like_matomo=True)
+
+
+def _step(name: str) -> ProbeResult:
+    return ProbeResult(INSTALLER, looks_like_matomo=True, installer_step=name)
+
+
+class _SlowInstaller(Installer):
+    def __init__(self) -> None:
+        self.installs = 0
+        self.installed = False
+
+    def ensure_installed(self, config, state=None, deadline=None):
+        if state is not None and state.installed:
+            return state
+        self.installs += 1
+        time.sleep(0.3)
+        self.installed = True
+        return _INSTALLED
+
+
+class TestInstallLock(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.lock_dir = tmp.name
+        self.config = Config(
+            base_url="http://matomo.test",
+            admin_user="admin",
+            admin_password="pw",
+            admin_email="admin@example.org",
+        )
+
+    def test_file_lock_makes_second_run_wait(self) -> None:
+        first = FileInstallLock(self.config.base_url, self.lock_dir)
+        second = FileInstallLock(self.config.base_url, self.lock_dir)
+        self.assertFalse(first.acquire(Deadline()))
+
+        result = {}
+        waiter = threading.Thread(
+            target=lambda: result.setdefault("waited", second.acquire(Deadline(5)))
+        )
+        waiter.start()
+        time.sleep(0.3)
+        self.assertNotIn("waited", result)
+
+        first.release()
+        waiter.join()
+        second.release()
+        self.assertTrue(result["waited"])
+
+    def test_concurrent_runs_install_once_and_share_the_result(self) -> None:
+        inner = _SlowInstaller()
+        results = []
+
+        def probe(base_url, timeout=5):
+            return _INSTALLED if inner.installed else _step("welcome")
+
+        def bootstrap() -> None:
+            installer = LockedInstaller(
+                inner, FileInstallLock(self.config.base_url, self.lock_dir), probe=probe
+            )
+            results.append(
+                installer.ensure_installed(self.config, state=_step("welcome"))
+            )
+
+        runs = [threading.Thread(target=bootstrap) for _ in range(3)]
+        for run in runs:
+            run.start()
+        for run in runs:
+            run.join()
+
+        self.assertEqual(inner.installs, 1)
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(state.installed for state in results))
+
+    def test_installed_instance_is_not_locked(self) -> None:
+        class _NeverLock(FileInstallLock):
+            def acquire(self, deadline):
+                raise AssertionError("must not lock")
+
+        installer = LockedInstaller(
+            _SlowInstaller(), _NeverLock(self.config.base_url, self.lock_dir)
+        )
+
+        self.assertIs(installer.ensure_installed(self.config, _INSTALLED), _INSTALLED)
+
+    def test_file_lock_is_the_default_and_none_disables_it(self) -> None:
+        self.assertIsInstance(build_install_lock(self.config), FileInstallLock)
+        self.assertFalse(
+            build_install_lock(replace(self.config, install_lock=())).acquire(
+                Deadline()
+            )
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
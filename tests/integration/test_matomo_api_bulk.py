@@ -0,0 +1,101 @@
+import json
+import threading
+import unittest
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from matomo_bootstrap.errors import MatomoApiError
+from matomo_bootstrap.http import HttpClient
+from matomo_bootstrap.matomo_api import MatomoApi
+
+
+class _BulkHandler(BaseHTTPRequestHandler):
+    """Fake API.getBulkRequest: echoes each sub-call, fails `Broken.*`."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args) -> None:
+        return None
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or "0")
+        form = urllib.parse.parse_qs(self.rfile.read(length).decode())
+        self.server.requests.append(form)
+
+        if form.get("token_auth") == ["bad"]:
+            result = {"result": "error", "message": "token_auth is invalid"}
+        else:
+            result = []
+            i = 0
+            while f"urls[{i}]" in form:
+                call = urllib.parse.parse_qs(form[f"urls[{i}]"][0])
+                method = call.pop("method")[0]
+                if method.startswith("Broken."):
+                    result.append({"result": "error", "message": f"no {method}"})
+                else:
+                    result.append({"method": method, "params": call})
+                i += 1
+
+        payload = json.dumps(result).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class TestMatomoApiBulk(unittest.TestCase):
+    def setUp(self) -> None:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _BulkHandler)
+        server.requests = []
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.server = server
+        host, port = server.server_address
+        client = HttpClient(f"http://{host}:{port}", timeout=5)
+        self.addCleanup(client.close)
+        self.api = MatomoApi(client=client)
+
+    def test_calls_are_sent_in_one_request_and_demultiplexed(self) -> None:
+        with self.api.batch() as batch:
+            sites = batch.add("SitesManager.getSiteFromId", idSite=1)
+            broken = batch.add("Broken.method")
+            users = batch.add("UsersManager.getUsers", userLogins=["a", "b"])
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.server.requests[0]["method"], ["API.getBulkRequest"])
+        self.assertEqual(
+            sites.result(),
+            {"method": "SitesManager.getSiteFromId", "params": {"idSite": ["1"]}},
+        )
+        self.assertEqual(users.result()["params"], {"userLogins": ["a", "b"]})
+        with self.assertRaisesRegex(MatomoApiError, "no Broken.method"):
+            broken.result()
+
+    def test_flushes_when_full(self) -> None:
+        batch = self.api.batch(max_calls=2)
+        calls = [batch.add("API.getMatomoVersion") for _ in range(5)]
+
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(len(batch), 1)
+        self.assertFalse(calls[-1].done)
+        with self.assertRaises(RuntimeError):
+            calls[-1].result()
+
+        batch.flush()
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertTrue(all(call.done for call in calls))
+
+    def test_request_level_error_resolves_every_call(self) -> None:
+        batch = self.api.batch(token_auth="bad")
+        calls = [batch.add("API.getMatomoVersion"), batch.add("API.getPhpVersion")]
+        batch.flush()
+
+        self.assertEqual(self.server.requests[0]["token_auth"], ["bad"])
+        for call in calls:
+            with self.assertRaisesRegex(MatomoApiError, "token_auth is invalid"):
+                call.result()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,222 @@
+import json
+import socket
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from matomo_bootstrap.config import Config
+from matomo_bootstrap.http import HttpClient
+from matomo_bootstrap.installers.web import WebInstaller
+from matomo_bootstrap.markers import MarkerScanner
+from matomo_bootstrap.probe import (
+    ERRORING,
+    INSTALLED_AUTHENTICATED,
+    INSTALLED_LOGIN,
+    INSTALLER,
+    UNREACHABLE,
+    ProbeResult,
+    classify,
+    probe_api,
+    probe_instance,
+)
+from matomo_bootstrap.service import run
+
+_LOGIN_PAGE = '<title>Matomo › Login</title><form action="index.php?module=Login">'
+
+
+class _MatomoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args) -> None:
+        return None
+
+    def _send(self, body: str, content_type: str = "text/html") -> None:
+        payload = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except ConnectionError:
+            pass  # client stopped reading early
+
+    def do_GET(self) -> None:
+        self.server.paths.append(self.path)
+        if self.path == "/":
+            self._send(self.server.front_page)
+        elif "API.getMatomoVersion" in self.path:
+            body, content_type = self.server.api_answer
+            self._send(body, content_type)
+        else:
+            self._send("ok")  # Login.logme
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length") or "0"))
+        self.server.paths.append(self.path)
+        self._send(json.dumps({"value": "tok"}))
+
+
+class TestClassify(unittest.TestCase):
+    def test_states(self) -> None:
+        self.assertEqual(
+            classify(200, _LOGIN_PAGE.lower(), "http://m/").state, INSTALLED_LOGIN
+        )
+
+        dashboard = classify(
+            200,
+            '<title>matomo</title><script>piwik.userlogin = "admin";</script>'
+            '<a href="index.php?module=login&action=logout">',
+            "http://m/",
+        )
+        self.assertEqual(
+            (dashboard.state, dashboard.user), (INSTALLED_AUTHENTICATED, "admin")
+        )
+
+        anonymous = classify(
+            200, 'matomo piwik.userlogin = "anonymous"; module=login', "http://m/"
+        )
+        self.assertEqual(anonymous.state, INSTALLED_LOGIN)
+
+        installer = classify(
+            200,
+            "<title>matomo › installation</title>",
+            "http://m/index.php?action=systemCheck",
+        )
+        self.assertEqual(installer.state, INSTALLER)
+        self.assertEqual(installer.label, "installer-step-systemCheck")
+        self.assertEqual(
+            classify(200, "matomo installation", "http://m/").label,
+            "installer-step-welcome",
+        )
+
+        broken = classify(500, "<h1>internal server error</h1>", "http://m/")
+        self.assertEqual(broken.state, ERRORING)
+        self.assertFalse(broken.looks_like_matomo)
+
+
+class TestMarkerScanner(unittest.TestCase):
+    def test_finds_markers_split_across_chunks(self) -> None:
+        scanner = MarkerScanner({"login": "module=login", "body": "<body"}, overlap=16)
+        for chunk in ("<head><a href=index.php?mod", "ule=log", "in></head><bo", "dy>"):
+            scanner.feed(chunk)
+
+        self.assertIn("login", scanner)
+        self.assertIn("body", scanner)
+        self.assertEqual(scanner.found["login"].group(), "module=login")
+
+
+class TestProbe(unittest.TestCase):
+    def _serve(self) -> str:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _MatomoHandler)
+        server.paths = []
+        server.front_page = _LOGIN_PAGE
+        server.api_answer = (json.dumps({"value": "5.1.0"}), "application/json")
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.server = server
+        host, port = server.server_address
+        return f"http://{host}:{port}"
+
+    def test_unreachable_instead_of_raising(self) -> None:
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+        with HttpClient(f"http://127.0.0.1:{port}", timeout=2) as client:
+            result = probe_instance(client)
+
+        self.assertEqual(result.state, UNREACHABLE)
+        self.assertIn("Connection refused", result.error)
+
+    def test_stops_reading_after_decisive_marker(self) -> None:
+        base_url = self._serve()
+        self.server.front_page = (
+            "<html><head><title>Matomo › Login</title></head><body>"
+            + "x" * (2 * 1024 * 1024)
+        )
+
+        with HttpClient(base_url, timeout=5) as client:
+            result = probe_instance(client)
+
+        self.assertEqual(result.state, INSTALLED_LOGIN)
+        self.assertLess(result.bytes_read, 64 * 1024)
+
+    def test_api_probe_reports_version(self) -> None:
+        base_url = self._serve()
+
+        with HttpClient(base_url, timeout=5) as client:
+            result = probe_api(client)
+
+        self.assertEqual(result.state, INSTALLED_LOGIN)
+        self.assertEqual(result.version, "5.1.0")
+        self.assertNotIn("/", self.server.paths)
+
+    def test_api_probe_error_still_means_installed(self) -> None:
+        base_url = self._serve()
+        self.server.api_answer = (
+            json.dumps({"result": "error", "message": "requires 'view' access"}),
+            "application/json; charset=utf-8",
+        )
+
+        with HttpClient(base_url, timeout=5) as client:
+            result = probe_api(client)
+
+        self.assertTrue(result.installed)
+        self.assertIsNone(result.version)
+        self.assertIn("view", result.error)
+
+    def test_api_probe_falls_back_to_html_heuristics(self) -> None:
+        base_url = self._serve()
+        # Before installation Matomo answers every request with the wizard.
+        self.server.api_answer = (
+            "<html><title>Matomo › Installation</title><body>",
+            "text/html",
+        )
+
+        with HttpClient(base_url, timeout=5) as client:
+            result = probe_api(client)
+
+        self.assertEqual(result.state, INSTALLER)
+        self.assertEqual(len(self.server.paths), 1)
+
+    def test_installer_trusts_given_state(self) -> None:
+        config = Config(
+            base_url="http://127.0.0.1:9",  # nothing listens; must not be used
+            admin_user="admin",
+            admin_password="pw",
+            admin_email="admin@example.org",
+        )
+        state = ProbeResult(INSTALLED_LOGIN, status=200, looks_like_matomo=True)
+
+        self.assertIs(WebInstaller().ensure_installed(config, state=state), state)
+
+    def test_run_fetches_front_page_once(self) -> None:
+        base_url = self._serve()
+        config = Config(
+            base_url=base_url,
+            admin_user="admin",
+            admin_password="pw",
+            admin_email="admin@example.org",
+            probe_mode="html",
+        )
+
+        self.assertEqual(run(config), "tok")
+        self.assertEqual(self.server.paths.count("/"), 1)
+
+    def test_run_probes_api_instead_of_front_page(self) -> None:
+        base_url = self._serve()
+        config = Config(
+            base_url=base_url,
+            admin_user="admin",
+            admin_password="pw",
+            admin_email="admin@example.org",
+        )
+
+        self.assertEqual(run(config), "tok")
+        self.assertNotIn("/", self.server.paths)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import json
+import os
+import stat
+import tempfile
+import threading
+import unittest
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from matomo_bootstrap.http import HttpClient
+from matomo_bootstrap.matomo_api import MatomoApi
+from matomo_bootstrap.session_store import SessionStore
+
+
+class _MatomoHandler(BaseHTTPRequestHandler):
+    """Fake Login.logme + session-authenticated UsersManager API."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args) -> None:
+        return None
+
+    def _send(self, payload: object, headers=()) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authenticated(self) -> bool:
+        cookie = self.headers.get("Cookie") or ""
+        return f"MATOMO_SESSID={self.server.session_id}" in cookie
+
+    def do_GET(self) -> None:
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        if query.get("action") == ["logme"]:
+            self.server.logins += 1
+            self._send(
+                "ok",
+                [("Set-Cookie", f"MATOMO_SESSID={self.server.session_id}; Path=/")],
+            )
+        else:
+            self._send("?")
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or "0")
+        form = urllib.parse.parse_qs(self.rfile.read(length).decode())
+        if not self._authenticated():
+            self._send({"result": "error", "message": "login required"})
+        elif form["method"] == ["UsersManager.getUser"]:
+            self._send({"login": form["userLogin"][0]})
+        else:
+            self._send({"value": "tok"})
+
+
+class TestSessionStore(unittest.TestCase):
+    def setUp(self) -> None:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _MatomoHandler)
+        server.logins = 0
+        server.session_id = "s1"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.server = server
+        host, port = server.server_address
+        self.base_url = f"http://{host}:{port}"
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = SessionStore(os.path.join(tmp.name, "sessions"))
+
+    def _run(self) -> str:
+        with self.store.open(self.base_url, "admin") as session:
+            with HttpClient(self.base_url, timeout=5, cookies=session.jar) as client:
+                token = MatomoApi(client=client).create_app_specific_token(
+                    admin_user="admin", admin_password="pw", description="ci"
+                )
+            session.save()
+        return token
+
+    def test_second_run_reuses_stored_session(self) -> None:
+        self.assertEqual(self._run(), "tok")
+        self.assertEqual(self._run(), "tok")
+
+        self.assertEqual(self.server.logins, 1)
+        path = self.store.path_for(self.base_url, "admin")
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+        self.assertEqual(stat.S_IMODE(os.stat(self.store.directory).st_mode), 0o700)
+
+    def test_expired_session_logs_in_again(self) -> None:
+        self._run()
+        self.server.session_id = "s2"  # server forgot the old session
+
+        self.assertEqual(self._run(), "tok")
+        self.assertEqual(self.server.logins, 2)
+
+    def test_sessions_are_keyed_by_url_and_user(self) -> None:
+        self.assertNotEqual(
+            self.store.path_for(self.base_url, "admin"),
+            self.store.path_for(self.base_url, "other"),
+        )
+        self.assertNotEqual(
+            self.store.path_for(self.base_url, "admin"),
+            self.store.path_for("http://other.example", "admin"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+_SRC = str(Path(__file__).resolve().parents[2] / "src")
+# Modules only the bootstrap run needs; `--status` must not load them.
+_NOT_FOR_STATUS = (
+    "matomo_bootstrap.service",
+    "matomo_bootstrap.endpoints",
+    "matomo_bootstrap.checkpoint",
+    "matomo_bootstrap.session_store",
+    "matomo_bootstrap.matomo_api",
+    "concurrent.futures",
+)
+# Generous (a cold start here takes ~60ms) but far below loading Playwright.
+_STATUS_IMPORT_BUDGET_S = 0.5
+
+
+class _InstalledHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args) -> None:
+        return None
+
+    def do_GET(self) -> None:
+        body = json.dumps({"value": "5.1.0"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _run(*args: str, code: str | None = None) -> subprocess.CompletedProcess:
+    env = {
+        k: v
+        for k, v in os.environ.items()
+        if not k.startswith(("MATOMO_", "PYTHONPATH"))
+    }
+    env["PYTHONPATH"] = _SRC
+    command = [sys.executable] + (["-c", code] if code else ["-m", "matomo_bootstrap"])
+    return subprocess.run(
+        command + list(args), env=env, capture_output=True, text=True, timeout=30
+    )
+
+
+class TestStatusMode(unittest.TestCase):
+    def setUp(self) -> None:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _InstalledHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        host, port = server.server_address
+        self.base_url = f"http://{host}:{port}"
+
+    def test_prints_json_without_credentials(self) -> None:
+        proc = _run("--status", "--base-url", self.base_url)
+
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        record = json.loads(proc.stdout)
+        self.assertEqual(record["base_url"], self.base_url)
+        self.assertTrue(record["installed"])
+        self.assertEqual(record["version"], "5.1.0")
+
+    def test_unreachable_instance_exits_nonzero(self) -> None:
+        proc = _run("--check", "--base-url", "http://127.0.0.1:9", "--timeout", "1")
+
+        self.assertEqual(proc.returncode, 1, proc.stderr)
+        self.assertFalse(json.loads(proc.stdout)["reachable"])
+
+    def test_never_imports_the_installer(self) -> None:
+        code = (
+            "import sys, time\n"
+            "started = time.perf_counter()\n"
+            "from matomo_bootstrap.__main__ import main\n"
+            "if 'matomo_bootstrap.http' in sys.modules:\n"
+            "    raise SystemExit('__main__ imports the HTTP stack')\n"
+            "import matomo_bootstrap.status\n"
+            "elapsed = time.perf_counter() - started\n"
+            "code = main()\n"
+            "loaded = [m for m in sys.modules if m.startswith('playwright')\n"
+            "          or m.startswith('matomo_bootstrap.installers')\n"
+            f"          or m in {_NOT_FOR_STATUS!r}]\n"
+            "print(loaded, elapsed, file=sys.stderr)\n"
+            f"raise SystemExit(3 if loaded or elapsed > {_STATUS_IMPORT_BUDGET_S}"
+            " else code)\n"
+        )
+        proc = _run("--status", "--base-url", self.base_url, code=code)
+
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import socket
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from matomo_bootstrap.installers.web import wait_http
+from matomo_bootstrap.polling import Backoff
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args) -> None:
+        return None
+
+    def do_HEAD(self) -> None:
+        self.server.methods.append(self.command)
+        self.send_response(503)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestWaitHttp(unittest.TestCase):
+    def test_detects_late_server_without_a_second_of_lag(self) -> None:
+        port = _free_port()
+        servers = []
+
+        def start_later() -> None:
+            time.sleep(0.3)
+            server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+            server.methods = []
+            servers.append(server)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        starter = threading.Thread(target=start_later)
+        starter.start()
+        try:
+            elapsed = wait_http(f"http://127.0.0.1:{port}", timeout=10)
+        finally:
+            starter.join()
+            for server in servers:
+                server.shutdown()
+                server.server_close()
+
+        self.assertGreaterEqual(elapsed, 0.3)
+        self.assertLess(elapsed, 0.9)
+        # Reachable means "any HTTP answer", found with a single HEAD probe.
+        self.assertEqual(servers[0].methods, ["HEAD"])
+
+    def test_gives_up_after_timeout(self) -> None:
+        port = _free_port()
+
+        with self.assertRaisesRegex(RuntimeError, "did not become reachable"):
+            wait_http(f"http://127.0.0.1:{port}", timeout=0.3)
+
+    def test_backoff_is_capped(self) -> None:
+        backoff = Backoff(initial_s=0.05, factor=2.0, max_s=0.15)
+
+        self.assertEqual([backoff.next() for _ in range(4)], [0.05, 0.1, 0.15, 0.15])
+        backoff.reset()
+        self.assertEqual(backoff.next(), 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+
+from matomo_bootstrap.installers.web import (
+    NEXT_LOCATOR_CANDIDATES,
+    _first_next_locator,
+    _first_present_css_locator,
+)
+
+
+class _Locator:
+    """
+    Matches the page elements (`page.present`, one label each, in document
+    order) described by any of its candidate labels.
+    """
+
+    def __init__(self, page, labels, *, visible_only: bool = False):
+        self._page = page
+        self.labels = list(labels)
+        self.visible_only = visible_only
+
+    def _matches(self):
+        return [label for label in self._page.present if label in self.labels]
+
+    def or_(self, other):
+        return _Locator(self._page, self.labels + other.labels)
+
+    def locator(self, selector: str):
+        assert selector == "visible=true"
+        return _Locator(self._page, self.labels, visible_only=True)
+
+    @property
+    def first(self):
+        return self
+
+    def count(self) -> int:
+        self._page.counts.append(self.labels)
+        if self._page.broken and len(self.labels) > 1:
+            raise RuntimeError("Unsupported selector in selector list")
+        return len(self._matches())
+
+    def is_visible(self) -> bool:
+        return self.count() > 0
+
+    def nth(self, index: int):
+        return _Locator(self._page, [self._matches()[index]])
+
+    def evaluate_all(self, _script, labels):
+        self._page.evaluations += 1
+        return [labels.index(label) for label in self._matches()]
+
+
+class _Page:
+    def __init__(self, present, *, broken: bool = False):
+        self.present = list(present)
+        self.broken = broken
+        self.counts = []
+        self.evaluations = 0
+
+    def get_by_role(self, role: str, name: str):
+        return _Locator(self, [f"{role}:{name}"])
+
+    def get_by_text(self, text: str, exact: bool = True):
+        return _Locator(self, [f"text:{text}*"])
+
+    def locator(self, selector: str):
+        return _Locator(self, [f"css:{selector}"])
+
+
+class TestCompiledLocators(unittest.TestCase):
+    def test_one_lookup_resolves_the_whole_candidate_table(self) -> None:
+        page = _Page(["button:Weiter"])
+
+        loc, label = _first_next_locator(page)
+
+        self.assertIsNotNone(loc)
+        self.assertEqual(label, "button:Weiter")
+        self.assertEqual(page.counts, [list(NEXT_LOCATOR_CANDIDATES)])
+        self.assertEqual(page.evaluations, 1)
+
+    def test_table_priority_wins_over_document_order(self) -> None:
+        page = _Page(["text:Next*", "button:Weiter", "link:Next »"])
+
+        loc, label = _first_next_locator(page)
+
+        self.assertEqual(label, "link:Next »")
+        self.assertEqual(loc.labels, ["link:Next »"])
+        self.assertEqual(page.evaluations, 1)
+
+    def test_miss_costs_a_single_count(self) -> None:
+        page = _Page([])
+
+        self.assertEqual(_first_next_locator(page), (None, ""))
+        self.assertEqual(len(page.counts), 1)
+
+    def test_broken_combined_selector_falls_back_to_each_candidate(self) -> None:
+        page = _Page(["css:input[name='login']"], broken=True)
+
+        loc, label = _first_present_css_locator(
+            page, ("#login-0", "input[name='login']")
+        )
+
+        self.assertIsNotNone(loc)
+        self.assertEqual(label, "css:input[name='login']")
+
+
+if __name__ == "__main__":
+    unittest.main()
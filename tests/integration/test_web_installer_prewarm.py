@@ -0,0 +1,156 @@
+import json
+import socket
+import threading
+import time
+import unittest
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from matomo_bootstrap.config import Config
+from matomo_bootstrap.installers.browser import BrowserWorker
+from matomo_bootstrap.installers.web import WebInstaller
+from matomo_bootstrap.probe import INSTALLED_LOGIN, INSTALLER, ProbeResult
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args) -> None:
+        return None
+
+    def _reply(self, with_body: bool) -> None:
+        payload = json.dumps({"value": "5.1.0"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if with_body:
+            self.wfile.write(payload)
+
+    def do_HEAD(self) -> None:
+        self._reply(with_body=False)
+
+    def do_GET(self) -> None:
+        self._reply(with_body=True)
+
+
+class _FakeBrowser:
+    def __init__(self, launch_s: float = 0.0, close_s: float = 0.0) -> None:
+        self.launch_s = launch_s
+        self.close_s = close_s
+        self.events: list[tuple[str, float, str]] = []
+        self.closed = threading.Event()
+
+    def launcher(self):
+        @contextmanager
+        def launch():
+            time.sleep(self.launch_s)
+            self._record("launched")
+            try:
+                yield self
+            finally:
+                time.sleep(self.close_s)
+                self._record("closed")
+                self.closed.set()
+
+        return launch
+
+    def _record(self, event: str) -> None:
+        self.events.append((event, time.monotonic(), threading.current_thread().name))
+
+    def names(self) -> list[str]:
+        return [event for event, _, _ in self.events]
+
+
+def _config(base_url: str) -> Config:
+    return Config(
+        base_url=base_url,
+        admin_user="admin",
+        admin_password="pw",
+        admin_email="admin@example.org",
+    )
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestBrowserPrewarm(unittest.TestCase):
+    def test_browser_launches_during_wait_and_is_closed_when_installed(self) -> None:
+        port = _free_port()
+        browser = _FakeBrowser()
+        servers = []
+
+        def start_later() -> None:
+            time.sleep(0.4)
+            server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+            servers.append((server, time.monotonic()))
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        starter = threading.Thread(target=start_later)
+        starter.start()
+        try:
+            installer = WebInstaller(prewarm=True, launch_browser=browser.launcher())
+            state = installer.ensure_installed(_config(f"http://127.0.0.1:{port}"))
+        finally:
+            starter.join()
+            for server, _ in servers:
+                server.shutdown()
+                server.server_close()
+
+        self.assertEqual(state.state, INSTALLED_LOGIN)
+        self.assertTrue(browser.closed.wait(5))
+        self.assertEqual(browser.names(), ["launched", "closed"])
+        launched_at = browser.events[0][1]
+        self.assertLess(launched_at, servers[0][1])
+
+    def test_installer_runs_on_the_prewarmed_browser_thread(self) -> None:
+        browser = _FakeBrowser(close_s=0.2)
+        seen = {}
+
+        class _Installer(WebInstaller):
+            def _drive_installer(self, drive_browser, config, deadline):
+                seen["browser"] = drive_browser
+                seen["thread"] = threading.current_thread().name
+                return ProbeResult(INSTALLED_LOGIN, looks_like_matomo=True)
+
+        installer = _Installer(prewarm=False, launch_browser=browser.launcher())
+        state = installer.ensure_installed(
+            _config("http://127.0.0.1:9"),
+            state=ProbeResult(INSTALLER, installer_step="welcome"),
+        )
+
+        self.assertTrue(state.installed)
+        self.assertIs(seen["browser"], browser)
+        self.assertEqual(seen["thread"], browser.events[0][2])
+        self.assertNotEqual(seen["thread"], threading.current_thread().name)
+        # A browser the installer used is shut down before returning.
+        self.assertTrue(browser.closed.is_set())
+        self.assertEqual(browser.names(), ["launched", "closed"])
+
+    def test_close_does_not_wait_for_a_slow_launch(self) -> None:
+        browser = _FakeBrowser(launch_s=1.0)
+        worker = BrowserWorker(browser.launcher())
+
+        started = time.monotonic()
+        worker.close()
+
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertTrue(browser.closed.wait(5))
+        self.assertEqual(browser.names(), ["launched", "closed"])
+
+    def test_launch_errors_surface_from_run(self) -> None:
+        @contextmanager
+        def broken_launch():
+            raise ModuleNotFoundError("No module named 'playwright'")
+            yield
+
+        with BrowserWorker(broken_launch) as worker:
+            with self.assertRaises(ModuleNotFoundError):
+                worker.run(lambda browser: None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+
+from matomo_bootstrap.installers.web import (
+    _click_next_with_wait,
+    _page_snapshot,
+    _wait_for_superuser_login_field,
+)
+
+_SUPERUSER_URL = "http://matomo/index.php?module=Installation&action=setupSuperUser"
+
+
+class _ClickRecorder:
+    """A control whose first match in the page is a hidden duplicate."""
+
+    def __init__(self, page, label: str, *, visible_only: bool = False):
+        self._page = page
+        self._label = label
+        self._visible_only = visible_only
+
+    def locator(self, selector: str):
+        assert selector == "visible=true"
+        return _ClickRecorder(self._page, self._label, visible_only=True)
+
+    @property
+    def first(self):
+        return self
+
+    def click(self, **_kwargs) -> None:
+        if not self._visible_only and self._page.hidden_duplicate:
+            raise TimeoutError("element is not visible")
+        self._page.clicked.append(self._label)
+        self._page.url = self._page.next_url
+
+
+class _NoMatch:
+    def count(self) -> int:
+        return 0
+
+
+class _SnapshotPage:
+    """Answers `page.evaluate`; CSS lookups are recorded and never match."""
+
+    def __init__(self, snapshots, *, url: str = _SUPERUSER_URL):
+        self._snapshots = list(snapshots)
+        self.url = url
+        self.next_url = url
+        self.evaluations = 0
+        self.clicked = []
+        self.lookups = []
+        self.hidden_duplicate = False
+
+    def evaluate(self, _script, _args):
+        self.evaluations += 1
+        if len(self._snapshots) > 1:
+            return {"url": self.url, **self._snapshots.pop(0)}
+        return {"url": self.url, **self._snapshots[0]}
+
+    def locator(self, selector: str):
+        self.lookups.append(selector)
+        return _NoMatch()
+
+    def title(self) -> str:
+        return "Installation"
+
+    def get_by_text(self, *args, **_kwargs):
+        raise AssertionError(f"unexpected text lookup: {args}")
+
+    def get_by_role(self, role: str, name: str):
+        return _ClickRecorder(self, f"{role}:{name}")
+
+    def wait_for_load_state(self, *_args, **_kwargs):
+        return None
+
+    def wait_for_timeout(self, *_args, **_kwargs):
+        return None
+
+
+class TestWebInstallerSnapshot(unittest.TestCase):
+    def test_wait_for_superuser_form_uses_one_evaluation_per_poll(self) -> None:
+        page = _SnapshotPage([{}, {}, {"superuser_form": True}])
+
+        visible = _wait_for_superuser_login_field(
+            page, timeout_s=1.0, poll_interval_ms=1
+        )
+
+        self.assertTrue(visible)
+        self.assertEqual(page.evaluations, 3)
+        self.assertNotIn("#login-0", page.lookups)
+        self.assertNotIn("form#generalsetupform", page.lookups)
+
+    def test_click_next_clicks_the_reported_candidate(self) -> None:
+        page = _SnapshotPage(
+            [{"next_control": "link:Next »"}],
+            url="http://matomo/index.php?module=Installation&action=welcome",
+        )
+        page.next_url = "http://matomo/index.php?module=Installation&action=systemCheck"
+
+        step = _click_next_with_wait(page, timeout_s=1)
+
+        self.assertEqual(step, "Installation:systemCheck")
+        self.assertEqual(page.clicked, ["link:Next »"])
+        self.assertEqual(page.evaluations, 1)
+
+    def test_click_next_skips_a_hidden_duplicate(self) -> None:
+        page = _SnapshotPage(
+            [{"next_control": "button:Next »"}],
+            url="http://matomo/index.php?module=Installation&action=welcome",
+        )
+        page.next_url = "http://matomo/index.php?module=Installation&action=systemCheck"
+        page.hidden_duplicate = True
+
+        step = _click_next_with_wait(page, timeout_s=1)
+
+        self.assertEqual(step, "Installation:systemCheck")
+        self.assertEqual(page.clicked, ["button:Next »"])
+        self.assertEqual(page.evaluations, 1)
+
+    def test_snapshot_reports_step_hint(self) -> None:
+        snapshot = _page_snapshot(_SnapshotPage([{"superuser_login_field": True}]))
+
+        self.assertEqual(snapshot.step, "Installation:setupSuperUser")
+        self.assertTrue(snapshot.superuser_form_ready)
+        self.assertTrue(snapshot.interactive)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import contextlib
+import io
+import unittest
+
+from matomo_bootstrap.installers import web
+from matomo_bootstrap.installers.web import WarningSampler, _page_warnings
+
+_URL = "http://matomo/index.php?module=Installation&action=setupSuperUser"
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _EvaluatePage:
+    """Answers the warnings script; any per-selector lookup is a failure."""
+
+    def __init__(self, texts=(), *, invalid: int = 0, url: str = _URL):
+        self.texts = list(texts)
+        self.invalid = invalid
+        self.url = url
+        self.evaluations = 0
+
+    def evaluate(self, _script, args):
+        self.evaluations += 1
+        selectors, per_selector = args
+        assert ".alert.alert-danger" in selectors and per_selector > 0
+        return {
+            "url": self.url,
+            "title": "Installation",
+            "texts": self.texts,
+            "invalid": self.invalid,
+        }
+
+    def locator(self, selector: str):
+        raise AssertionError(f"unexpected locator lookup: {selector}")
+
+    def title(self) -> str:
+        raise AssertionError("title comes with the evaluation")
+
+
+class TestBatchedPageWarnings(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = _Clock()
+        sampler = WarningSampler(interval_s=5, clock=self.clock)
+        original = web._WARNING_SAMPLER
+        web._WARNING_SAMPLER = sampler
+        self.addCleanup(setattr, web, "_WARNING_SAMPLER", original)
+
+    def _warnings(self, page, **kwargs) -> tuple[list[str], str]:
+        err = io.StringIO()
+        with contextlib.redirect_stderr(err):
+            out = _page_warnings(page, **kwargs)
+        return out, err.getvalue()
+
+    def test_collects_everything_in_one_evaluation(self) -> None:
+        page = _EvaluatePage(["Invalid nonce", "Invalid nonce"], invalid=2)
+
+        out, err = self._warnings(page)
+
+        self.assertEqual(out, ["Invalid nonce", "2 field(s) marked aria-invalid=true."])
+        self.assertEqual(page.evaluations, 1)
+        self.assertIn(f"page warnings/errors detected @ {_URL} (Installation)", err)
+
+    def test_clean_page_is_not_rechecked_within_the_interval(self) -> None:
+        page = _EvaluatePage()
+
+        self.assertEqual(self._warnings(page), ([], ""))
+        self.clock.now += 1
+        self.assertEqual(self._warnings(page), ([], ""))
+        self.assertEqual(page.evaluations, 1)
+
+        self._warnings(page, force=True)
+        self.assertEqual(page.evaluations, 2)
+
+        page.url = _URL.replace("setupSuperUser", "firstWebsiteSetup")
+        self._warnings(page)
+        self.assertEqual(page.evaluations, 3)
+
+        self.clock.now += 5
+        self._warnings(page)
+        self.assertEqual(page.evaluations, 4)
+
+    def test_page_with_warnings_is_always_rechecked(self) -> None:
+        page = _EvaluatePage(["Session expired"])
+
+        self._warnings(page)
+        out, _ = self._warnings(page)
+
+        self.assertEqual(out, ["Session expired"])
+        self.assertEqual(page.evaluations, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()